@@ -0,0 +1,73 @@
+"""Benchmark of the cryptography backends"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+from timeit import timeit
+
+from minimalcryptocurrency import available_backends
+from minimalcryptocurrency.backends import create_backend
+
+# Number of operations measured by backend
+NUMBER = 200
+
+
+def benchmark(name, number=NUMBER):
+    """Measure the operations of a backend
+
+    Args:
+        name (String): the name of the backend
+        number (Integer): the number of times each operation is done
+
+    Return:
+        (Dictionary): the operations per second of each operation
+    """
+
+    backend = create_backend(name)
+    key = backend.generate_private_key()
+    signing_key = backend.load_signing_key(key)
+    public_key = backend.public_key(signing_key)
+    verifying_key = backend.load_verifying_key(public_key)
+    message = b'benchmark'
+    signature = backend.sign(signing_key, message)
+
+    operations = {
+        'public key': lambda: backend.public_key(backend.load_signing_key(key)),
+        'sign': lambda: backend.sign(signing_key, message),
+        'verify': lambda: backend.verify(verifying_key, signature, message),
+        'parse and verify': lambda: backend.verify(backend.load_verifying_key(public_key), signature, message),
+    }
+
+    return {operation: number / timeit(function, number=number) for operation, function in operations.items()}
+
+
+def main():
+    """Print the operations per second of the available backends"""
+
+    print('%-14s %18s %12s %12s %18s' % ('backend', 'public key', 'sign', 'verify', 'parse and verify'))
+
+    for name in available_backends():
+        result = benchmark(name)
+        print('%-14s %18.0f %12.0f %12.0f %18.0f' % (name, result['public key'], result['sign'],
+                                                     result['verify'], result['parse and verify']))
+
+
+if __name__ == '__main__':
+    main()
@@ -19,17 +19,157 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import asyncio
+import math
+import os
+import struct
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from hashlib import sha256
 
+from minimalcryptocurrency import merkle_leaves
+from minimalcryptocurrency import merkle_proof
+from minimalcryptocurrency import merkle_root
+from minimalcryptocurrency.cryptography import running_loop
+
+# Block hashed over the repr of its values
+LEGACY_VERSION = 1
+
+# Block hashed over a fixed binary header
+HEADER_VERSION = 2
+
+# Header fields before the proof: version, index, previous hash, timestamp,
+# Merkle root and difficulty
+_HEADER = struct.Struct('<IQ32sq32sd')
+
+# Last header field: the proof
+_PROOF = struct.Struct('<Q')
+
+# Origin of the timestamps in the header
+_EPOCH = datetime(1970, 1, 1)
+
+# Number of proofs tried in each task of the parallel and asynchronous mining
+_CHUNK_SIZE = 16384
+
+
+def _encode_proof(version, proof):
+    """Serialize the proof as it is hashed in a block version
+
+    Args:
+        version (Integer): the version of the block
+        proof (Integer): the proof
+
+    Return:
+        (Bytes): the serialized proof
+    """
+
+    if version == HEADER_VERSION:
+        return _PROOF.pack(proof)
+
+    return repr(proof).encode('utf-8')
+
+
+def _timestamp_microseconds(timestamp):
+    """Convert a timestamp to microseconds since the epoch
+
+    Naive dates are interpreted as UTC and numbers as seconds.
+
+    Args:
+        timestamp (Time): the block time
+
+    Return:
+        (Integer): the number of microseconds
+    """
+
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+        return (timestamp - _EPOCH) // timedelta(microseconds=1)
+
+    return int(round(timestamp * 1000000))
+
+
+def _difficulty_target(difficulty):
+    """Calculate the target for a difficulty
+
+    A hash satisfies the difficulty when, as an integer, it is lower than the
+    target ``2 ** (256 - difficulty)``. For integer values this is the same as
+    starting with ``difficulty`` zero bits, fractional values are also valid.
+
+    Args:
+        difficulty (Double): the number of zeros in the hash to validate the block
+
+    Return:
+        (Integer): the target
+    """
+
+    whole = math.floor(difficulty)
+
+    if whole >= 256:
+        return 1
+
+    target = 1 << (256 - whole)
+    fraction = difficulty - whole
+
+    if fraction:
+        target = (target * int(2 ** -fraction * (1 << 53))) >> 53
+
+    return target
+
+
+def _search_proof(prefix, suffix, target, init, maximum_iter, version=LEGACY_VERSION):
+    """Search a valid proof in a range of values
+
+    Try the proofs from ``init`` to ``init + maximum_iter``, both included. The
+    prefix is hashed only once and its state is copied for every proof, so the
+    cost of each try does not depend on the size of the block.
+
+    Args:
+        prefix (Bytes): the serialized block before the proof
+        suffix (Bytes): the serialized block after the proof
+        target (Integer): the maximum value of a valid hash, excluded
+        init (Integer): The values to use in the first proof
+        maximum_iter (Integer): The maximum number of iterations in the mining process
+        version (Integer): the version of the block
+
+    Return:
+        (Integer): the first valid proof in the range, None otherwise
+    """
+
+    midstate = sha256(prefix)
+
+    for proof in range(init, init + maximum_iter + 1):
+        block_hash = midstate.copy()
+        block_hash.update(_encode_proof(version, proof) + suffix)
+
+        if int.from_bytes(block_hash.digest(), 'big') < target:
+            return proof
+
+    return None
+
 
 class Block:
     """Block object"""
 
-    def __init__(self, index, data, previous_hash=None, timestamp=None, proof=0, difficulty=0):
+    LEGACY_VERSION = LEGACY_VERSION
+    HEADER_VERSION = HEADER_VERSION
+
+    # All the fields of the binary header, the proof included
+    HEADER_STRUCT = struct.Struct(_HEADER.format + 'Q')
+
+    def __init__(self, index, data, previous_hash=None, timestamp=None, proof=0, difficulty=0,
+                 version=LEGACY_VERSION):
         """Create a new Block Object
 
-        Create a new Block Object
+        Create a new Block Object. The hash of the legacy version is calculated
+        over the repr of all the values of the block, the hash of the header
+        version is calculated over a fixed binary header which contains the
+        Merkle root of the data instead of the data.
 
         Args:
             index (Integer): the index of the block
@@ -37,11 +177,15 @@ class Block:
             previous_hash (String): the hash of previous block
             timestamp (Time): the genesis block time
             proof (Integer): the proof
-            difficulty (Integer): the number of zeros in the hash to validate the block
+            difficulty (Double): the number of zeros in the hash to validate the block
+            version (Integer): the version of the block hash
         """
 
         # Default values for internal properties
         self.__proof = None
+        self.__difficulty = None
+        self.__merkle_root = None
+        self.target = None
         self.hash = None
 
         # Define basic information about the Block
@@ -49,10 +193,15 @@ class Block:
             self.index = index.index + 1
             self.previous_hash = index.hash
             self.difficulty = index.difficulty
+            self.version = index.version
         else:
             self.index = index
             self.previous_hash = previous_hash
             self.difficulty = difficulty
+            self.version = version
+
+        if self.version not in (LEGACY_VERSION, HEADER_VERSION):
+            raise ValueError("Unknown block version %r" % self.version)
 
         # Get actual date or use timestamp
         if timestamp is None:
@@ -90,9 +239,7 @@ class Block:
                         zeros indicated in the ``difficulty`` parameter.
         """
 
-        binary_hash = bin(int(self.hash, 16))[2:].zfill(len(self.hash) * 4)
-
-        return binary_hash[:self.difficulty] == "0" * self.difficulty
+        return int(self.hash, 16) < self.target
 
     @property
     def is_valid(self):
@@ -105,6 +252,36 @@ class Block:
 
         return self.hash_satisfies_difficulty and self.hash == self.calculate_hash()
 
+    @property
+    def bits(self):
+        """The target in the compact format"""
+
+        return Block.target_to_bits(self.target)
+
+    @property
+    def work(self):
+        """The expected number of hashes to find the proof of the block"""
+
+        return 2 ** 256 // self.target
+
+    @property
+    def difficulty(self):
+        """The difficulty
+
+        The number of zeros in the hash to validate the block
+        """
+
+        return self.__difficulty
+
+    @difficulty.setter
+    def difficulty(self, difficulty):
+        """Set the difficulty"""
+
+        self.__difficulty = difficulty
+
+        # Calculate target
+        self.target = _difficulty_target(difficulty)
+
     @property
     def proof(self):
         """The proof of work
@@ -132,12 +309,188 @@ class Block:
             self (Block): A Block object
         """
 
-        block = [self.index, self.previous_hash, self.timestamp, self.data, self.proof, self.difficulty]
+        return sha256(self.hashed_bytes()).hexdigest()
+
+    def hashed_bytes(self):
+        """Serialize the block as it is hashed
+
+        The bytes can be hashed in other process, the repr of the data hashed
+        in the legacy version is only the same in the process of the block.
+
+        Args:
+            self (Block): A Block object
+
+        Return:
+            (Bytes): the prefix, the serialized proof and the suffix of the block
+        """
+
+        prefix, suffix = self.hash_parts()
+
+        return prefix + _encode_proof(self.version, self.proof) + suffix
+
+    def hash_parts(self):
+        """Serialize the block around the proof
+
+        The hash of the block is the hash of the prefix, the serialized proof
+        and the suffix, so the parts that do not depend on the proof can be
+        calculated once and reused for every proof tried in the mining process.
+        In the header version the proof is the last field of the header and
+        the suffix is empty.
+
+        Args:
+            self (Block): A Block object
+
+        Return:
+            (Tuple): the bytes before and after the proof
+        """
+
+        if self.version == HEADER_VERSION:
+            return self.header_prefix(), b''
+
+        prefix = '[%s, ' % ', '.join(repr(value) for value in [self.index, self.previous_hash,
+                                                                self.timestamp, self.data])
+        suffix = ', %r]' % (self.difficulty,)
+
+        return prefix.encode('utf-8'), suffix.encode('utf-8')
+
+    @property
+    def header(self):
+        """The binary header of the block
+
+        The header contains, in little endian, the version, the index, the
+        previous hash, the timestamp in microseconds, the Merkle root of the
+        data, the difficulty and the proof.
+        """
+
+        return self.header_prefix() + _PROOF.pack(self.proof)
+
+    def header_prefix(self):
+        """Serialize the header fields before the proof
+
+        Args:
+            self (Block): A Block object
+
+        Return:
+            (Bytes): the header without the proof
+        """
+
+        if self.previous_hash is None:
+            previous_hash = bytes(32)
+        else:
+            previous_hash = bytes.fromhex(self.previous_hash)
+
+        return _HEADER.pack(self.version, self.index, previous_hash, _timestamp_microseconds(self.timestamp),
+                            self.merkle_root, self.difficulty)
+
+    @property
+    def merkle_root(self):
+        """The Merkle root of the data in the block"""
 
-        return sha256(repr(block).encode('utf-8')).hexdigest()
+        if self.__merkle_root is not None:
+            return self.__merkle_root
+
+        return merkle_root(merkle_leaves(self.data))
+
+    @property
+    def pruned(self):
+        """Indicate if the data of the block has been discarded"""
+
+        return self.__merkle_root is not None
+
+    def prune(self, root=None):
+        """Discard the data of the block
+
+        The Merkle root of the data is kept, so the hash of the block does not
+        change. Only the blocks of the header version can be pruned, the hash
+        of the legacy version depends on the data.
+
+        Args:
+            root (Bytes): the Merkle root of the data, by default the root of the current data
+        """
+
+        if self.version != HEADER_VERSION:
+            raise ValueError("Only the blocks of the header version can be pruned")
+
+        self.__merkle_root = self.merkle_root if root is None else root
+        self.data = None
+
+    def merkle_proof(self, position):
+        """Calculate the proof of inclusion of a value of the data
+
+        Args:
+            position (Integer): the position of the value in the data
+
+        Return:
+            (Array): the hashes of the siblings in the Merkle tree
+        """
+
+        if self.pruned:
+            raise ValueError("The data of the block has been pruned")
+
+        return merkle_proof(merkle_leaves(self.data), position)
 
     @staticmethod
-    def genesis_block(data=None, timestamp=None, proof=0, difficulty=0, mining=False):
+    def difficulty_to_target(difficulty):
+        """Calculate the target for a difficulty
+
+        Args:
+            difficulty (Double): the number of zeros in the hash to validate the block
+
+        Return:
+            (Integer): the target
+        """
+
+        return _difficulty_target(difficulty)
+
+    @staticmethod
+    def bits_to_target(bits):
+        """Expand a target from the compact format
+
+        The compact format stores the size in bytes of the target in the
+        highest byte and its three most significant bytes in the rest.
+
+        Args:
+            bits (Integer): the target in the compact format
+
+        Return:
+            (Integer): the target
+        """
+
+        size = bits >> 24
+        mantissa = bits & 0x007fffff
+
+        if size <= 3:
+            return mantissa >> (8 * (3 - size))
+
+        return mantissa << (8 * (size - 3))
+
+    @staticmethod
+    def target_to_bits(target):
+        """Compress a target to the compact format
+
+        Args:
+            target (Integer): the target
+
+        Return:
+            (Integer): the target in the compact format
+        """
+
+        size = (target.bit_length() + 7) // 8
+
+        if size <= 3:
+            mantissa = target << (8 * (3 - size))
+        else:
+            mantissa = target >> (8 * (size - 3))
+
+        # The mantissa is signed, move a byte where its highest bit is set
+        if mantissa & 0x00800000:
+            mantissa >>= 8
+            size += 1
+
+        return (size << 24) | mantissa
+
+    @staticmethod
+    def genesis_block(data=None, timestamp=None, proof=0, difficulty=0, mining=False, version=LEGACY_VERSION):
         """Generate a genesis block
 
         Args:
@@ -146,6 +499,7 @@ class Block:
             proof (Integer): the proof
             difficulty (Integer): the number of zeros in the hash to validate the block
             mining (Boolean): logical value indicating if the block must be mined
+            version (Integer): the version of the block hash
 
         Return:
              A Block
@@ -157,7 +511,7 @@ class Block:
             hash_id = '%s' % timestamp
             hash_id = sha256(hash_id.encode('utf-8')).hexdigest()
 
-        block = Block(0, data, hash_id, timestamp, proof, difficulty)
+        block = Block(0, data, hash_id, timestamp, proof, difficulty, version)
 
         if mining:
             while not block.is_valid:
@@ -165,7 +519,7 @@ class Block:
 
         return block
 
-    def mining(self, init=None, maximum_iter=1000):
+    def mining(self, init=None, maximum_iter=1000, workers=1, executor=None):
         """Mining the Block
 
         Implements the search of an integer for the proof which satisficed the
@@ -173,22 +527,185 @@ class Block:
         `init` property. The maximum number of values to tried can be also
         configured using the `init` property.
 
+        When more than one worker or an executor is used the proofs are
+        searched in parallel. Each worker tries ``maximum_iter`` values after
+        its own initial value and the ranges of the workers are consecutive.
+        The ranges are split in chunks evaluated in order, so the proof found
+        is the lowest one and no more chunks are started once it is found. An
+        executor kept between calls avoids starting the processes every time.
+
+        Args:
+            self (Block): A Block object
+            init (Integer): The values to use in the first proof
+            maximum_iter (Integer): The maximum number of iterations in the mining process
+            workers (Integer): The number of processes, None to use all the cores
+            executor (Executor): the executor of the chunks, by default a new pool of processes
+
+        Return:
+             (Logical): True if a valid proof has been found
+        """
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        if workers > 1 or executor is not None:
+            return self.__parallel_mining(init, maximum_iter, workers, executor)
+
+        if init is None:
+            init = self.proof
+
+        prefix, suffix = self.hash_parts()
+        proof = _search_proof(prefix, suffix, self.target, init, maximum_iter, self.version)
+
+        # Use the proof found or the last value tried
+        if proof is None:
+            self.proof = init + maximum_iter
+        else:
+            self.proof = proof
+
+        return self.is_valid
+
+    def __parallel_mining(self, init, maximum_iter, workers, executor):
+        """Mining the Block in chunks evaluated by an executor
+
+        Args:
+            self (Block): A Block object
+            init (Integer): The values to use in the first proof
+            maximum_iter (Integer): The maximum number of iterations for each worker
+            workers (Integer): The number of chunks evaluated at a time
+            executor (Executor): the executor of the chunks, None to use a new pool of processes
+
+        Return:
+             (Logical): True if a valid proof has been found
+        """
+
+        if init is None:
+            init = self.proof
+
+        prefix, suffix = self.hash_parts()
+        last = init + workers * (maximum_iter + 1) - 1
+        chunk_size = min(_CHUNK_SIZE, maximum_iter + 1)
+        own_executor = executor is None
+        pending = deque()
+        start = init
+        proof = None
+
+        if own_executor:
+            executor = ProcessPoolExecutor(workers)
+
+        try:
+            while proof is None and (pending or start <= last):
+                # Keep the next chunks queued while the first ones are evaluated
+                while start <= last and len(pending) < 2 * workers:
+                    count = min(chunk_size, last - start + 1)
+                    pending.append(executor.submit(_search_proof, prefix, suffix, self.target, start, count - 1,
+                                                   self.version))
+                    start += count
+
+                proof = pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+            if own_executor:
+                executor.shutdown()
+
+        # Use the lowest proof found or the last value tried
+        if proof is None:
+            self.proof = last
+        else:
+            self.proof = proof
+
+        return self.is_valid
+
+    async def mining_async(self, init=None, maximum_iter=1000, workers=1, executor=None, chunk_size=_CHUNK_SIZE,
+                           progress=None, stop=None):
+        """Mining the Block without blocking the event loop
+
+        The proofs are tried in chunks by a pool of processes, so the event
+        loop only waits for the results. The block is serialized and validated
+        in a thread of the loop. The chunks are evaluated in order, so the
+        proof found is the same one found by ``mining``. The task can be
+        cancelled at any time, the chunks not started are discarded and the
+        proof is the last value tried.
+
         Args:
             self (Block): A Block object
             init (Integer): The values to use in the first proof
             maximum_iter (Integer): The maximum number of iterations in the mining process
+            workers (Integer): The number of chunks evaluated at a time, None to use all the cores
+            executor (Executor): the executor of the chunks, by default a new pool of processes
+            chunk_size (Integer): The number of proofs tried in each chunk
+            progress (Function): called with the number of proofs tried and the total after each chunk
+            stop (Function): called after each chunk, the mining stops where it returns True
 
         Return:
              (Logical): True if a valid proof has been found
         """
 
-        if init is not None:
-            self.proof = init
+        if init is None:
+            init = self.proof
+
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        loop = running_loop()
+        prefix, suffix = await loop.run_in_executor(None, self.hash_parts)
+        last = init + maximum_iter
+        own_executor = executor is None
+        pending = deque()
+        start = init
+        tried = 0
+        proof = None
 
-        number_iter = 0
+        if own_executor:
+            executor = ProcessPoolExecutor(workers)
+
+        try:
+            while proof is None and (pending or start <= last):
+                # Keep the next chunks queued while the first ones are evaluated
+                while start <= last and len(pending) < 2 * workers:
+                    count = min(chunk_size, last - start + 1)
+                    pending.append((start, count, loop.run_in_executor(executor, _search_proof, prefix, suffix,
+                                                                       self.target, start, count - 1,
+                                                                       self.version)))
+                    start += count
+
+                chunk, count, future = pending.popleft()
+                proof = await future
+                tried += count if proof is None else proof - chunk + 1
+
+                if progress is not None:
+                    progress(tried, maximum_iter + 1)
+
+                if proof is None and stop is not None and stop():
+                    break
+        except asyncio.CancelledError:
+            if tried:
+                self.proof = init + tried - 1
+
+            raise
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+            if own_executor:
+                executor.shutdown(wait=False)
+
+        # Use the proof found or the last value tried
+        if proof is None and tried:
+            proof = init + tried - 1
+
+        return await loop.run_in_executor(None, self.__assign_proof, proof)
+
+    def __assign_proof(self, proof):
+        """Set the proof where it is given and validate the block
+
+        Return:
+             (Logical): True if the block is valid
+        """
 
-        while not self.is_valid and number_iter < maximum_iter:
-            self.proof += 1
-            number_iter += 1
+        if proof is not None:
+            self.proof = proof
 
         return self.is_valid
@@ -19,20 +19,365 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import os
+import threading
+
+from collections import deque
+from copy import copy
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from datetime import timedelta
+from functools import wraps
+from hashlib import sha256
 
 from minimalcryptocurrency import Block
+from minimalcryptocurrency import BlockStore
 from minimalcryptocurrency import OutputTransaction
 from minimalcryptocurrency import Transaction
 from minimalcryptocurrency import UnspentList
 from minimalcryptocurrency import Wallet
+from minimalcryptocurrency import encode_block_record
+from minimalcryptocurrency import read_block_records
+from minimalcryptocurrency import read_snapshot
+from minimalcryptocurrency import verify_signatures
+from minimalcryptocurrency import verify_signatures_async
+from minimalcryptocurrency import write_snapshot
+from minimalcryptocurrency.cache import LRUCache
+from minimalcryptocurrency.cryptography import running_loop
+
+
+def _seconds(interval):
+    """Convert the interval between two timestamps to seconds"""
+
+    if isinstance(interval, timedelta):
+        return interval.total_seconds()
+
+    return interval
+
+
+def _hash_inputs(blocks):
+    """Serialize the blocks to validate their hashes in other process
+
+    Return:
+        (Array): the hashed bytes, the hash and the target of each block, None for the objects which are not blocks
+    """
+
+    return [(block.hashed_bytes(), block.hash, block.target) if isinstance(block, Block) else None
+            for block in blocks]
+
+
+def _validate_hashes(inputs):
+    """Evaluate if the hash and the proof of work of the blocks are valid
+
+    Args:
+        inputs (Array): the hashed bytes, the hash and the target of each block
+
+    Return:
+        (Array): True for each valid block
+    """
+
+    return [values is not None and int(values[1], 16) < values[2] and sha256(values[0]).hexdigest() == values[1]
+            for values in inputs]
+
+
+def _synchronized(method):
+    """Run a method of the blockchain holding the lock of the writers"""
+
+    @wraps(method)
+    def synchronized(blockchain, *args, **kwargs):
+        with blockchain.lock:
+            return method(blockchain, *args, **kwargs)
+
+    return synchronized
+
+
+class BlockValidationError(Exception):
+    """Error raised where a block cannot be appended to the chain"""
+
+    def __init__(self, height, message):
+        """Create a new BlockValidationError Object
+
+        Args:
+            height (Integer): the height of the invalid block
+            message (String): the reason of the error
+        """
+
+        super().__init__("Invalid block at height %d: %s" % (height, message))
+        self.height = height
+
+
+class _WriterLock:
+    """Reentrant lock which runs a function before its owner releases it"""
+
+    def __init__(self, on_release):
+        """Create a new _WriterLock Object
+
+        Args:
+            on_release (Function): called holding the lock before the outermost release
+        """
+
+        self.__lock = threading.RLock()
+        self.__depth = 0
+        self.__on_release = on_release
+
+    def acquire(self, blocking=True, timeout=-1):
+        """Acquire the lock
+
+        Return:
+            (Logical): True if the lock has been acquired
+        """
+
+        if not self.__lock.acquire(blocking, timeout):
+            return False
+
+        self.__depth += 1
+
+        return True
+
+    def release(self):
+        """Release the lock"""
+
+        try:
+            if self.__depth == 1:
+                self.__on_release()
+        finally:
+            self.__depth -= 1
+            self.__lock.release()
+
+    def __enter__(self):
+        """ Implement with self. """
+
+        self.acquire()
+
+        return self
+
+    def __exit__(self, *args):
+        """ Implement with self. """
+
+        self.release()
+
+
+class _Detached:
+    """Blocks removed from a chain, linked to the ones removed later"""
+
+    def __init__(self):
+        """Create a new _Detached Object for the next removal"""
+
+        self.height = None
+        self.blocks = None
+        self.next = None
+
+    def detach(self, height, blocks):
+        """Record the blocks removed from a height to the end of the chain
+
+        Args:
+            height (Integer): the height of the first block removed
+            blocks (Array): the blocks removed
+
+        Return:
+            (_Detached): the record of the next removal
+        """
+
+        self.height = height
+        self.blocks = blocks
+        self.next = _Detached()
+
+        return self.next
+
+
+class ChainSnapshot:
+    """Immutable state of a blockchain at a given last block
+
+    The balances are stored as the changes since the previous snapshot, so a
+    new snapshot only costs the addresses changed by the chain. The changes
+    are merged every ``MERGE_DEPTH`` snapshots. The blocks are read from the
+    chain, the blocks removed from it after the snapshot are read from the
+    records of the removals. The cumulative work is calculated on the first
+    access where the chain has not calculated it yet.
+    """
+
+    MERGE_DEPTH = 64
+
+    def __init__(self, version, blocks, height, chain_work, balances, previous=None, detached=None):
+        """Create a new ChainSnapshot Object
+
+        Args:
+            version (Integer): the number of changes of the chain
+            blocks (Sequence): the blocks of the chain, only the blocks before the height are used
+            height (Integer): the number of blocks
+            chain_work (Object): the cumulative work of the chain or a function which calculates it from the snapshot
+            balances (Dictionary): the confirmed and the unconfirmed balance of the addresses changed since the
+                                   previous snapshot, None where the unspent transactions are not available
+            previous (ChainSnapshot): the previous snapshot, None where the balances contain all the addresses
+            detached (_Detached): the record of the next removal of blocks from the chain
+        """
+
+        self.version = version
+        self.height = height
+        self.__chain_work = chain_work
+        self.last_block = blocks[height - 1] if height > 0 else None
+        self.__blocks = blocks
+        self.__detached = _Detached() if detached is None else detached
+        self.__depth = 0
+
+        if previous is not None and balances is not None and previous.__balances is not None:
+            if previous.__depth + 1 < self.MERGE_DEPTH:
+                self.__depth = previous.__depth + 1
+            else:
+                merged = previous.__merged()
+                merged.update(balances)
+                balances = merged
+                previous = None
+        else:
+            previous = None
+
+        self.__balances = balances
+        self.__previous = previous
+
+    def __len__(self):
+        """ Return len(self). """
+
+        return self.height
+
+    @property
+    def chain_work(self):
+        """The cumulative work of the chain"""
+
+        chain_work = self.__chain_work
+
+        if callable(chain_work):
+            chain_work = chain_work(self)
+            self.__chain_work = chain_work
+
+        return chain_work
+
+    @property
+    def has_balances(self):
+        """Indicate if the balances of the addresses are available"""
+
+        return self.__balances is not None
+
+    def __merged(self):
+        """Merge the balances of the snapshot and the previous ones"""
+
+        changes = []
+        snapshot = self
+
+        while snapshot is not None:
+            changes.append(snapshot.__balances)
+            snapshot = snapshot.__previous
+
+        merged = {}
+
+        for balances in reversed(changes):
+            merged.update(balances)
+
+        return {address: value for address, value in merged.items() if value != (0, 0)}
+
+    def __lookup(self, address):
+        """Get the confirmed and the unconfirmed balance of an address"""
+
+        snapshot = self
+
+        while snapshot is not None and snapshot.__balances is not None:
+            value = snapshot.__balances.get(address)
+
+            if value is not None:
+                return value
+
+            snapshot = snapshot.__previous
+
+        return 0, 0
+
+    def balance(self, address):
+        """Get the confirmed balance of an address
+
+        Args:
+            address (String): an address
+
+        Return:
+            (Double): the total amount in the address
+        """
+
+        return self.__lookup(address)[0]
+
+    def address_amount(self, address):
+        """Get the balance of an address not spent by the unconfirmed transactions
+
+        Args:
+            address (String): an address
+
+        Return:
+            (Double): the amount available in the address
+        """
+
+        return self.__lookup(address)[1]
+
+    def block(self, height):
+        """Get a block of the chain
+
+        Args:
+            height (Integer): the height of the block
+
+        Return:
+            (Block): the block
+        """
+
+        if height < 0:
+            height += self.height
+
+        if not 0 <= height < self.height:
+            raise IndexError("block height out of range")
+
+        while True:
+            detached = self.__detached
+
+            while detached.next is not None:
+                if detached.height <= height:
+                    return detached.blocks[height - detached.height]
+
+                detached = detached.next
+
+            try:
+                block = self.__blocks[height]
+            except IndexError:
+                block = None
+
+            # The block has not been removed while it was read
+            if detached.next is None:
+                if block is None:
+                    raise IndexError("block height out of range")
+
+                return block
 
 
 class BlockChain:
-    """BlockChain object"""
+    """BlockChain object
+
+    The methods which change the chain hold ``lock``. The writers publish an
+    immutable ``snapshot`` of the last block and the balances before they
+    release the lock, so the readers use it without waiting for them. The
+    lookups of blocks and transactions do not hold the lock either. Mining
+    does not hold the lock.
+    """
+
+    SNAPSHOT_FILE = 'unspent.dat'
+    SIDE_CACHE_SIZE = 256
+    UNDO_DEPTH = 100
+
+    def __init__(self, block=None, store=None):
+        """BlockChain object
 
-    def __init__(self, block=None):
-        """BlockChain object"""
+        The blocks are kept in memory unless a store is given. The blocks of a
+        store which is not empty are trusted, so the genesis block is ignored
+        and they are not validated until ``revalidate(full=True)`` is called.
+        An empty store requires the genesis block, a ValueError is raised
+        otherwise, so a default genesis block is never written to disk.
+
+        Args:
+            block (Block): the genesis block
+            store (BlockStore): the store of the blocks on disk
+        """
 
         # Difficulty update parameters
         # 59 Seconds - the minimum interval between blocks is a minute
@@ -44,23 +389,69 @@ class BlockChain:
         # 144 block - the time for evaluate intervals (one per day 6 * 24)
         self.difficulty_interval = 144
 
+        # Lock of the writers, number of changes of the chain and state for the readers
+        self.lock = _WriterLock(self.__publish)
+        self.__version = 0
+        self.__snapshot = None
+
+        # Unspent list of the last snapshot and record of the next removal of blocks for the snapshots
+        self.__published_unspent = None
+        self.__detached = _Detached()
+
         # Currency values
         self.__unspent = None
         self.amount_mining = 0
 
-        # Validate the inputs
-        if block is None:
-            self.__candidate = Block.genesis_block()
-        elif isinstance(block, Block):
-            self.__candidate = block
-        else:
-            raise Exception("The input parameter must be a Block object")
+        # Hash and unspent transactions spent by the last blocks applied to the unspent list
+        self.__undo = deque(maxlen=self.UNDO_DEPTH)
 
-        if self.__candidate.is_valid:
-            self.chain = [self.__candidate]
+        # Number of recent blocks whose data is kept, None to keep all, and blocks already checked
+        self.prune_depth = None
+        self.__pruned = 0
+
+        # File with the snapshot of the unspent transactions
+        self.snapshot_path = None
+
+        # Height of each block hash and position of each transaction id, built on the first lookup
+        self.__block_index = None
+        self.__transaction_index = None
+
+        # Cumulative work of the blocks in the chain, built on the first fork
+        self.__work = None
+
+        # Blocks out of the chain with their cumulative work indexed by hash
+        self.__side_blocks = LRUCache(self.SIDE_CACHE_SIZE)
+
+        # Hashes of the blocks with invalid transactions and of their descendants
+        self.__invalid_blocks = LRUCache(self.SIDE_CACHE_SIZE)
+
+        # Number of blocks already validated and hash of the last one
+        self.__validated = 0
+        self.__validated_hash = None
+
+        if store is not None and len(store) > 0:
+            self.chain = store
             self.__candidate = None
+            self.__validated = len(store)
+            self.__validated_hash = store[-1].hash
         else:
-            self.chain = []
+            # Validate the inputs
+            if block is None and store is not None:
+                raise ValueError("The genesis block is required for an empty store")
+            elif block is None:
+                self.__candidate = Block.genesis_block()
+            elif isinstance(block, Block):
+                self.__candidate = block
+            else:
+                raise Exception("The input parameter must be a Block object")
+
+            self.chain = [] if store is None else store
+
+            if self.__candidate.is_valid:
+                self.chain.append(self.__candidate)
+                self.__candidate = None
+
+        self.__publish()
 
     def __repr__(self):
         """ Return repr(self). """
@@ -87,44 +478,830 @@ class BlockChain:
             2) All blocks has previous block hash and a valid id
             3) All blocks are valid and
 
+        Only the blocks appended since the last validation are evaluated. The
+        changes made in place to blocks already validated are not detected,
+        use ``revalidate(full=True)`` to evaluate the whole chain.
+
+        Return:
+             (Logical): True if BlockChain is valid
+        """
+
+        # Nothing has been appended since the last validation, the lock is not needed
+        validated, validated_hash = self.__validated, self.__validated_hash
+        last_block = self.__read_block(validated - 1) if 0 < validated == self.num_blocks else None
+
+        if last_block is not None and last_block.hash == validated_hash:
+            return True
+
+        return self.revalidate()
+
+    @_synchronized
+    def revalidate(self, full=False):
+        """Validate the blockchain
+
+        Validate the blocks after the last validated one. The whole chain is
+        validated where ``full`` is set or where the last validated block is
+        no longer in the chain.
+
+        Args:
+            full (Logical): validate all the blocks in the chain
+
+        Return:
+             (Logical): True if BlockChain is valid
+        """
+
+        start = self.__validated
+
+        if full or start > self.num_blocks or \
+                (start > 0 and self.chain[start - 1].hash != self.__validated_hash):
+            start = 0
+
+        # Reset the validated blocks until the validation finish
+        self.__validated = 0
+        self.__validated_hash = None
+
+        if not self.chain:
+            return False
+
+        for step in range(start, self.num_blocks):
+            if not self.chain[step].is_valid:
+                return False
+            elif step > 0 and self.chain[step].previous_hash != self.chain[step - 1].hash:
+                return False
+            elif step > 0 and self.chain[step].index != self.chain[step - 1].index + 1:
+                return False
+
+        self.__validated = self.num_blocks
+        self.__validated_hash = self.last_block.hash
+
+        return True
+
+    @property
+    def candidate_block(self):
+        """Return the candidate for block for the chain"""
+
+        return self.__candidate
+
+    @property
+    def last_block(self):
+        """Return the last block in the BlockChain"""
+
+        if self.chain:
+            return self.chain[-1]
+
+        return None
+
+    @property
+    def num_blocks(self):
+        """Return the number of blocks in the chain"""
+
+        return len(self.chain)
+
+    def snapshot(self):
+        """Get the state of the chain for the readers
+
+        The snapshot is published by the writers, so it is read without the
+        lock. Only the first read of the balances builds the list of unspent
+        transactions where it is not available, and the changes made to the
+        list out of the blockchain, as the transactions appended to the list
+        returned by ``get_unspent_list``, are published before the read.
+
+        Return:
+            (ChainSnapshot): the immutable state of the chain
+        """
+
+        snapshot = self.__snapshot
+        unspent = self.__unspent
+
+        if not snapshot.has_balances:
+            self.get_unspent_list()
+            snapshot = self.__snapshot
+        elif unspent is not None and (unspent is not self.__published_unspent or unspent.has_changes):
+            with self.lock:
+                self.__publish()
+
+            snapshot = self.__snapshot
+
+        return snapshot
+
+    def __publish(self):
+        """Publish the state of the chain for the readers where it has changed
+
+        Only the balances changed since the previous snapshot are read from
+        the list of unspent transactions.
+        """
+
+        snapshot = self.__snapshot
+        unspent = self.__unspent
+        previous = snapshot
+
+        if unspent is not self.__published_unspent:
+            # The list has been replaced, all its balances are read
+            self.__published_unspent = unspent
+            previous = None
+        elif snapshot is not None and snapshot.version == self.__version and \
+                (unspent is None or not unspent.has_changes):
+            return
+
+        if unspent is not None:
+            balances = unspent.changed_balances()
+        elif any(isinstance(block.data, list) for block in self.chain[:1]):
+            balances = None
+        else:
+            balances = {}
+
+        # The work of a store is not read until it is needed
+        if not self.chain:
+            chain_work = 0
+        elif self.__work is not None:
+            chain_work = self.__work[-1]
+        else:
+            chain_work = self.__snapshot_work
+
+        self.__snapshot = ChainSnapshot(self.__version, self.chain, self.num_blocks, chain_work, balances, previous,
+                                        self.__detached)
+
+    @_synchronized
+    def __snapshot_work(self, snapshot):
+        """Calculate the cumulative work of a snapshot
+
+        The work of the blocks removed from the chain after the snapshot is
+        added to the work of the chain up to the last block they share.
+
+        Return:
+            (Integer): the expected number of hashes to build the chain of the snapshot
+        """
+
+        height = snapshot.height
+        work = 0
+
+        while height > 0 and (height > self.num_blocks or
+                              self.chain[height - 1].hash != snapshot.block(height - 1).hash):
+            height -= 1
+            work += snapshot.block(height).work
+
+        return work + (self.__chain_work(height - 1) if height > 0 else 0)
+
+    def __push_block(self, block):
+        """Append a block to the chain and its indexes"""
+
+        self.chain.append(block)
+        self.__index_block(self.num_blocks - 1)
+        self.__version += 1
+
+        if self.__work is not None:
+            self.__work.append(self.__work[-1] + block.work)
+
+    def __append_block(self, block):
+        """Append a valid block to the chain
+
+        Apply the transactions of the block to the list of unspent
+        transactions, where it has been already generated.
+
+        Args:
+            block (Block): the block to append
+        """
+
+        self.__push_block(block)
+
+        if self.__unspent is not None and not self.__apply_block(self.__unspent, block):
+            self.__reset_unspent()
+
+        self.__prune_blocks()
+
+    def __apply_block(self, unspent, block, verified=None, undo=None):
+        """Apply the transactions of a block and save its undo data
+
+        Args:
+            unspent (UnspentList): the list of unspent transactions
+            block (Block): the block to apply
+            verified (Dictionary): results of the signatures already validated
+            undo (Array): where the undo data is saved, by default the undo data of the chain
+
+        Return:
+            (logical): True if the transactions of the block are valid
+        """
+
+        if undo is None:
+            undo = self.__undo
+
+        spent = []
+
+        if block.pruned:
+            return False
+
+        if isinstance(block.data, list) and not unspent.confirm_transactions(block.data, verified=verified,
+                                                                               spent=spent):
+            return False
+
+        undo.append((block.hash, spent))
+
+        return True
+
+    def __revert_blocks(self, height):
+        """Revert the transactions of the blocks from a height to the end
+
+        Return:
+            (logical): True if the undo data of all the blocks is available
+        """
+
+        blocks = self.chain[height:]
+
+        if len(blocks) > len(self.__undo) or \
+                any(self.__undo[step - len(blocks)][0] != block.hash for step, block in enumerate(blocks)):
+            return False
+
+        if any(block.pruned for block in blocks):
+            return False
+
+        for block in reversed(blocks):
+            _, spent = self.__undo.pop()
+
+            if isinstance(block.data, list):
+                self.__unspent.revert_transactions(block.data, spent)
+
+        return True
+
+    def __reset_unspent(self):
+        """Remove the list of unspent transactions to rebuild it"""
+
+        self.__unspent = None
+        self.__undo.clear()
+
+    def __prune_blocks(self):
+        """Discard the data of the blocks older than the pruning depth"""
+
+        if self.prune_depth is None or self.__unspent is None or not isinstance(self.chain, list):
+            return
+
+        for height in range(self.__pruned, self.num_blocks - self.prune_depth):
+            block = self.chain[height]
+
+            if block.version == Block.HEADER_VERSION and not block.pruned:
+                if self.__transaction_index is not None and isinstance(block.data, list):
+                    for transaction in block.data:
+                        if self.__transaction_index.get(transaction.hash_id, (None,))[0] == height:
+                            del self.__transaction_index[transaction.hash_id]
+
+                # The blocks can be shared with other chains
+                block = copy(block)
+                block.prune()
+                self.chain[height] = block
+
+        self.__pruned = max(self.__pruned, self.num_blocks - self.prune_depth)
+
+    @_synchronized
+    def prune(self, depth):
+        """Enable the pruning mode
+
+        The data of the blocks older than the depth is discarded once their
+        transactions are applied to the list of unspent transactions, so only
+        their headers and Merkle roots are kept. A pruned chain cannot switch
+        to a branch which forks before a pruned block, and the list of unspent
+        transactions can only be loaded from a snapshot. Only the blocks of the
+        header version in memory are pruned, the blocks in a store are not
+        kept in memory.
+
+        Args:
+            depth (Integer): the number of recent blocks whose data is kept, None to disable it
+        """
+
+        self.prune_depth = depth
+
+        if depth is not None:
+            self.get_unspent_list()
+            self.__prune_blocks()
+
+    def __block_ids(self, height):
+        """Return the hash of a block and the ids of the transactions in its data
+
+        The blocks of a store are read without building their objects.
+
+        Return:
+            (Tuple): the hash and a list with the position and the id of each transaction
+        """
+
+        if isinstance(self.chain, BlockStore):
+            view = self.chain.view(height)
+
+            return view.hash.hex(), [(position, transaction.hash_id.hex())
+                                     for position, transaction in view.listed_transactions()]
+
+        block = self.chain[height]
+        transactions = []
+
+        if isinstance(block.data, list):
+            transactions = [(position, transaction.hash_id) for position, transaction in enumerate(block.data)
+                            if isinstance(transaction, Transaction)]
+
+        return block.hash, transactions
+
+    def __index_block(self, height, block_index=None, transaction_index=None):
+        """Add a block and its transactions to the indexes, by default the indexes of the chain"""
+
+        if block_index is None:
+            block_index, transaction_index = self.__block_index, self.__transaction_index
+
+        if block_index is None:
+            return
+
+        block_hash, transactions = self.__block_ids(height)
+        block_index[block_hash] = height
+
+        for position, hash_id in transactions:
+            transaction_index[hash_id] = (height, position)
+
+    def __unindex_blocks(self, height):
+        """Remove the blocks from a height to the end from the indexes"""
+
+        if self.__block_index is None:
+            return
+
+        for step in range(height, self.num_blocks):
+            block_hash, transactions = self.__block_ids(step)
+
+            if self.__block_index.get(block_hash) == step:
+                del self.__block_index[block_hash]
+
+            for position, hash_id in transactions:
+                if self.__transaction_index.get(hash_id) == (step, position):
+                    del self.__transaction_index[hash_id]
+
+    @_synchronized
+    def rebuild_indexes(self):
+        """Rebuild the indexes of the block hashes and transaction ids
+
+        The indexes are built aside, so the lookups never read them partially built.
+        """
+
+        block_index = {}
+        transaction_index = {}
+
+        for height in range(self.num_blocks):
+            self.__index_block(height, block_index, transaction_index)
+
+        self.__transaction_index = transaction_index
+        self.__block_index = block_index
+
+    def __read_block(self, height):
+        """Read a block without the lock
+
+        Return:
+            (Block): the block, None where it has been removed
+        """
+
+        try:
+            return self.chain[height]
+        except IndexError:
+            return None
+
+    def __transaction_block(self, location, hash_id):
+        """Read the block of a transaction without the lock
+
+        Return:
+            (Block): the block, None where the transaction is not at the location
+        """
+
+        height, position = location
+        block = self.__read_block(height)
+        data = None if block is None else block.data
+
+        if isinstance(data, list) and position < len(data) and getattr(data[position], 'hash_id', None) == hash_id:
+            return block
+
+        return None
+
+    def get_block(self, hash_id):
+        """Get a block of the chain by its hash
+
+        The index is read without the lock, which is only taken to build the
+        index where it is missing or out of date.
+
+        Args:
+            hash_id (String): the hash of the block
+
+        Return:
+            (Block): the block, None if it is not in the chain
+        """
+
+        block_index = self.__block_index
+
+        if block_index is not None:
+            height = block_index.get(hash_id)
+
+            if height is None:
+                return None
+
+            block = self.__read_block(height)
+
+            if block is not None and block.hash == hash_id:
+                return block
+
+        return self.__find_block(hash_id)
+
+    @_synchronized
+    def __find_block(self, hash_id):
+        """Get a block by its hash holding the lock"""
+
+        if self.__block_index is None:
+            self.rebuild_indexes()
+
+        for _ in range(2):
+            height = self.__block_index.get(hash_id)
+
+            if height is None:
+                return None
+            elif height < self.num_blocks and self.chain[height].hash == hash_id:
+                return self.chain[height]
+
+            # The chain has been modified out of the blockchain
+            self.rebuild_indexes()
+
+        return None
+
+    def get_transaction_location(self, hash_id):
+        """Get the position of a transaction in the chain
+
+        The index is read without the lock, which is only taken to build the
+        index where it is missing or out of date.
+
+        Args:
+            hash_id (String): the id of the transaction
+
+        Return:
+            (Tuple): the height of the block and the position in its data, None if it is not in the chain
+        """
+
+        transaction_index = self.__transaction_index
+
+        if transaction_index is not None:
+            location = transaction_index.get(hash_id)
+
+            if location is None:
+                return None
+            elif self.__transaction_block(location, hash_id) is not None:
+                return location
+
+        return self.__find_transaction(hash_id)
+
+    @_synchronized
+    def __find_transaction(self, hash_id):
+        """Get the position of a transaction holding the lock"""
+
+        if self.__transaction_index is None:
+            self.rebuild_indexes()
+
+        for _ in range(2):
+            location = self.__transaction_index.get(hash_id)
+
+            if location is None:
+                return None
+            elif self.__transaction_block(location, hash_id) is not None:
+                return location
+
+            # The chain has been modified out of the blockchain
+            self.rebuild_indexes()
+
+        return None
+
+    def __locate_transaction(self, hash_id):
+        """Get the block and the position of a confirmed transaction
+
+        Return:
+            (Tuple): the block and the position in its data, None if it is not in the chain
+        """
+
+        location = self.get_transaction_location(hash_id)
+
+        if location is None:
+            return None
+
+        block = self.__transaction_block(location, hash_id)
+
+        if block is None:
+            # The chain has been changed after the lookup
+            with self.lock:
+                return self.__locate_transaction(hash_id)
+
+        return block, location[1]
+
+    def get_transaction(self, hash_id):
+        """Get a confirmed transaction by its id
+
+        Args:
+            hash_id (String): the id of the transaction
+
+        Return:
+            (Transaction): the transaction, None if it is not in the chain
+        """
+
+        location = self.__locate_transaction(hash_id)
+
+        if location is None:
+            return None
+
+        block, position = location
+
+        return block.data[position]
+
+    def transaction_proof(self, hash_id):
+        """Get the proof of inclusion of a confirmed transaction
+
+        Args:
+            hash_id (String): the id of the transaction
+
+        Return:
+            (Tuple): the hash of the block, the position in its data and the Merkle proof, None if it is not in the
+                     chain
+        """
+
+        location = self.__locate_transaction(hash_id)
+
+        if location is None:
+            return None
+
+        block, position = location
+
+        return block.hash, position, block.merkle_proof(position)
+
+    def __difficulty_at(self, height, block_at):
+        """Calculate the difficulty of the block at a height with the parameters of the chain"""
+
+        return self.expected_difficulty(height, block_at, self.difficulty_interval, self.block_interval)
+
+    @staticmethod
+    def expected_difficulty(height, block_at, difficulty_interval, block_interval):
+        """Calculate the difficulty of the block at a height
+
+        The difficulty is updated every ``difficulty_interval`` blocks, it is
+        increased where the mean interval between the last blocks is lower than
+        ``block_interval`` and decreased where it is greater.
+
+        Args:
+            height (Integer): the height of the block
+            block_at (Function): return the block or the header at a lower height
+            difficulty_interval (Integer): the number of blocks between updates of the difficulty
+            block_interval (Double): the objective interval between blocks in seconds
+
+        Return:
+            (Double): the difficulty
+        """
+
+        last_block = block_at(height - 1)
+
+        if height > difficulty_interval and height % difficulty_interval == 0:
+            interval = _seconds(last_block.timestamp - block_at(height - difficulty_interval - 1).timestamp)
+            interval /= difficulty_interval
+
+            if interval > block_interval:
+                return last_block.difficulty - 1
+            elif interval < block_interval:
+                return last_block.difficulty + 1
+
+        return last_block.difficulty
+
+    @_synchronized
+    def next_difficulty(self):
+        """Calculate the difficulty of the next block
+
+        Return:
+            (Double): the difficulty
+        """
+
+        return self.__difficulty_at(self.num_blocks, self.chain.__getitem__)
+
+    @_synchronized
+    def append_blocks(self, blocks, workers=1):
+        """Append a batch of blocks after the last one
+
+        The linkage, proof of work, difficulty, timestamp interval and
+        transactions of all the blocks are validated in one pass, with the
+        signatures of the whole batch validated at once. Either all the blocks
+        are appended or none of them.
+
+        Args:
+            blocks (Iterable): the blocks in order
+            workers (Integer): the number of processes to validate the signatures, None to use all the cores
+
+        Return:
+            (Integer): the number of blocks appended
+        """
+
+        return self.__append_blocks(list(blocks), workers, None, True)
+
+    @_synchronized
+    def __append_validated(self, blocks, verified):
+        """Append a batch of blocks with the hashes and signatures already validated"""
+
+        return self.__append_blocks(blocks, 1, verified, False)
+
+    def __append_blocks(self, blocks, workers, verified, check_hashes):
+        """Validate and append a batch of blocks
+
+        Args:
+            blocks (Array): the blocks in order
+            workers (Integer): the number of processes to validate the signatures
+            verified (Dictionary): results of the signatures already validated
+            check_hashes (Logical): validate the hash and the proof of work of the blocks
+
+        Return:
+            (Integer): the number of blocks appended
+        """
+
+        base = self.num_blocks
+
+        def block_at(height):
+            return self.chain[height] if height < base else blocks[height - base]
+
+        previous = self.last_block
+
+        for height, block in enumerate(blocks, base):
+            error = self.__block_error(height, block, previous, block_at, check_hashes)
+
+            if error is not None:
+                raise BlockValidationError(height, error)
+
+            previous = block
+
+        # Apply the transactions to the unspent list
+        unspent = self.__unspent
+
+        if unspent is None and any(isinstance(block.data, list) for block in blocks):
+            unspent = self.get_unspent_list()
+
+        if unspent is not None:
+            if verified is None and workers != 1:
+                signatures = list(self.__batch_signatures(unspent, blocks))
+                verified = dict(zip(signatures, verify_signatures(signatures, workers)))
+
+            # The undo data of the whole batch is kept until all the blocks are valid
+            unconfirmed = list(unspent.unconfirmed)
+            undo = []
+
+            for step, block in enumerate(blocks):
+                if not self.__apply_block(unspent, block, verified, undo):
+                    self.__revert_applied(unspent, blocks[:step], undo, unconfirmed)
+                    raise BlockValidationError(base + step, "invalid transactions")
+
+            self.__undo.extend(undo)
+
+        validated = self.__validated == base
+
+        for block in blocks:
+            self.__push_block(block)
+
+        if validated and blocks:
+            self.__validated = self.num_blocks
+            self.__validated_hash = self.last_block.hash
+
+        if blocks:
+            self.__candidate = None
+
+        self.__prune_blocks()
+
+        return len(blocks)
+
+    def __block_error(self, height, block, previous, block_at, check_hash=True):
+        """Find why a block cannot follow other one
+
+        Args:
+            height (Integer): the height of the block
+            block (Block): the block to validate
+            previous (Block): the previous block in its branch
+            block_at (Function): return the block of the branch at a lower height
+            check_hash (Logical): validate the hash and the proof of work of the block
+
+        Return:
+            (String): the reason why the block is not valid, None where it is valid
+        """
+
+        if not isinstance(block, Block):
+            return "not a Block object"
+        elif block.index != previous.index + 1 or block.previous_hash != previous.hash:
+            return "it does not follow the previous block"
+        elif block.difficulty != self.__difficulty_at(height, block_at):
+            return "unexpected difficulty"
+        elif _seconds(block.timestamp - previous.timestamp) < self.minimum_interval:
+            return "too close to the previous block"
+        elif check_hash and not block.is_valid:
+            return "invalid hash or proof of work"
+
+        return None
+
+    async def append_blocks_async(self, blocks, workers=None, executor=None, chunk_size=256, progress=None):
+        """Append a batch of blocks without blocking the event loop
+
+        The hashes of the blocks and the signatures of the transactions are
+        validated in chunks by a pool of processes, then the blocks are
+        validated and appended as in ``append_blocks`` in a thread. The blocks
+        are serialized for the processes in a thread of the loop, so the
+        legacy blocks, whose hash depends on the repr of their data, are
+        hashed over the same bytes as in this process.
+
+        Args:
+            blocks (Iterable): the blocks in order
+            workers (Integer): the number of chunks evaluated at a time, None to use all the cores
+            executor (Executor): the executor of the chunks, by default a new pool of processes
+            chunk_size (Integer): the number of blocks in each chunk
+            progress (Function): called with the number of blocks validated and the total after each chunk
+
+        Return:
+            (Integer): the number of blocks appended
+        """
+
+        blocks = list(blocks)
+        loop = running_loop()
+        own_executor = executor is None
+
+        if executor is None:
+            executor = ProcessPoolExecutor(workers)
+
+        try:
+            base = self.num_blocks
+
+            for start in range(0, len(blocks), chunk_size):
+                inputs = await loop.run_in_executor(None, _hash_inputs, blocks[start:start + chunk_size])
+                results = await loop.run_in_executor(executor, _validate_hashes, inputs)
+
+                if not all(results):
+                    raise BlockValidationError(base + start + results.index(False), "invalid hash or proof of work")
+
+                if progress is not None:
+                    progress(min(start + chunk_size, len(blocks)), len(blocks))
+
+            verified = None
+            signatures = await loop.run_in_executor(None, self.__gather_signatures, blocks)
+
+            if signatures:
+                results = await verify_signatures_async(signatures, workers, executor)
+                verified = dict(zip(signatures, results))
+        finally:
+            if own_executor:
+                executor.shutdown(wait=False)
+
+        return await loop.run_in_executor(None, self.__append_validated, blocks, verified)
+
+    @staticmethod
+    def __revert_applied(unspent, blocks, undo, unconfirmed):
+        """Revert the transactions of blocks applied but not appended
+
+        The unconfirmed transactions are restored as they were before the
+        blocks were applied.
+
+        Args:
+            unspent (UnspentList): the list of unspent transactions
+            blocks (Array): the blocks applied
+            undo (Array): the undo data of the blocks
+            unconfirmed (Array): the unconfirmed transactions before the blocks
+        """
+
+        for block, (_, spent) in zip(reversed(blocks), reversed(undo)):
+            if isinstance(block.data, list):
+                unspent.revert_transactions(block.data, spent, readmit=False)
+
+        unspent.reset_unconfirmed(unconfirmed)
+
+    @_synchronized
+    def __gather_signatures(self, blocks):
+        """Gather the signatures of a batch of blocks which follows the chain
+
         Return:
-             (Logical): True if BlockChain is valid
+            (Array): the message, the signature and the public key of each spend
         """
 
-        if self.chain:
-            for step in range(self.num_blocks - 1, 0, -1):
-                if not self.chain[step].is_valid:
-                    return False
-                elif self.chain[step].previous_hash != self.chain[step - 1].hash:
-                    return False
-                elif self.chain[step].index != self.chain[step - 1].index + 1:
-                    return False
-
-            return self.chain[0].is_valid
+        if not any(isinstance(block.data, list) for block in blocks):
+            return []
 
-        return False
+        return list(self.__batch_signatures(self.get_unspent_list(), blocks))
 
-    @property
-    def candidate_block(self):
-        """Return the candidate for block for the chain"""
+    @staticmethod
+    def __batch_signatures(unspent, blocks):
+        """Gather the signatures of the transactions of a batch of blocks
 
-        return self.__candidate
+        Return:
+            (Set): the message, the signature and the public key of each spend
+        """
 
-    @property
-    def last_block(self):
-        """Return the last block in the BlockChain"""
+        outputs = {}
+        signatures = set()
 
-        if self.chain:
-            return self.chain[-1]
+        for block in blocks:
+            if isinstance(block.data, list):
+                for transaction in block.data:
+                    if not transaction.is_coinbase:
+                        for inputs in transaction.inputs:
+                            source = unspent.unspent.get(inputs.outpoint)
+                            address = outputs.get(inputs.outpoint) if source is None else source.address
 
-        return None
+                            if address is not None:
+                                signatures.add((transaction.hash_id, transaction.signature, address))
 
-    @property
-    def num_blocks(self):
-        """Return the number of blocks in the chain"""
+                    for index, output in enumerate(transaction.outputs):
+                        outputs[(transaction.hash_id, index)] = output.address
 
-        return len(self.chain)
+        return signatures
 
+    @_synchronized
     def add_candidate(self, data, timestamp=None, proof=0):
         """Insert a new candidate in the chain
 
@@ -140,28 +1317,18 @@ class BlockChain:
                 timestamp = datetime.now()
 
             # Validate minimum timestamp period
-            interval = timestamp - self.last_block.timestamp
-            if interval.total_seconds() < self.minimum_interval:
+            if _seconds(timestamp - self.last_block.timestamp) < self.minimum_interval:
                 return False
 
-            # Evaluate the difficulty
-            if self.num_blocks > self.difficulty_interval and self.num_blocks % self.difficulty_interval == 0:
-                interval = self.chain[-1].timestamp - self.chain[-self.difficulty_interval - 1].timestamp
-                interval = interval.total_seconds() / self.difficulty_interval
-
-                if interval > self.block_interval:
-                    difficulty = self.last_block.difficulty - 1
-                elif interval < self.block_interval:
-                    difficulty = self.last_block.difficulty + 1
-
-            else:
-                difficulty = self.last_block.difficulty
+            difficulty = self.next_difficulty()
 
             self.__candidate = Block(self.last_block.index + 1, data, previous_hash=self.last_block.hash,
-                                     timestamp=timestamp, proof=proof, difficulty=difficulty)
+                                     timestamp=timestamp, proof=proof, difficulty=difficulty,
+                                     version=self.last_block.version)
 
             return True
 
+    @_synchronized
     def add_transaction(self, key, address, amount):
         """Add a transaction in the blockchain
 
@@ -186,19 +1353,20 @@ class BlockChain:
 
         return unspent.append_unconfirmed(transaction)
 
+    @_synchronized
     def candidate_proof(self, proof):
         """Set the proof for a candidate"""
 
         self.__candidate.proof = proof
 
         if self.__candidate.is_valid:
-            self.chain.append(self.__candidate)
+            self.__append_block(self.__candidate)
             self.__candidate = None
-            self.__unspent = None
             return True
 
         return False
 
+    @_synchronized
     def generate_candidate(self, address, timestamp=None, proof=0):
         """Generate a new candidate block with a reward to the miner
 
@@ -211,14 +1379,20 @@ class BlockChain:
             (logical): true where the candidate can be assigned
         """
 
+        # Get the timestamp value where it is None
+        if timestamp is None:
+            timestamp = datetime.now()
+
         output = OutputTransaction(address, self.amount_mining)
         transaction = Transaction(timestamp, output)
 
-        self.__unspent.append_unconfirmed(transaction)
-        data = self.__unspent.unconfirmed
+        unspent = self.get_unspent_list()
+        unspent.append_unconfirmed(transaction)
+        data = unspent.unconfirmed
 
         return self.add_candidate(data, timestamp=timestamp, proof=proof)
 
+    @_synchronized
     def get_unspent_list(self):
         """Get the list of unspent transaction
 
@@ -227,17 +1401,149 @@ class BlockChain:
         """
 
         if self.__unspent is None:
-            self.__unspent = UnspentList()
+            if self.snapshot_path is None or not self.load_snapshot():
+                self.rebuild_unspent_list()
 
-            for block in self.chain:
-                for transaction in block.data:
-                    assert self.__unspent.append_unconfirmed(transaction)
+        return self.__unspent
 
-                if block.is_valid:
-                    self.__unspent.confirm_unconfirmed()
+    @_synchronized
+    def rebuild_unspent_list(self, workers=1):
+        """Rebuild the list of unspent transaction from the genesis block
+
+        The list is updated with every new block, so it only has to be rebuilt
+        where the chain is replaced. The unconfirmed transactions are lost. A
+        ValueError is raised where the data of a block has been pruned.
+
+        Args:
+            workers (Integer): the number of processes to validate the signatures, None to use all the cores
+
+        Return:
+            (UnspentList): the list unspent transactions
+        """
+
+        verified = None
+
+        if workers != 1:
+            signatures = list(self.__chain_signatures())
+            verified = dict(zip(signatures, verify_signatures(signatures, workers)))
+
+        self.__unspent = UnspentList()
+        self.__undo.clear()
+
+        for block in self.chain:
+            if block.pruned:
+                self.__reset_unspent()
+                raise ValueError("The list cannot be rebuilt from pruned blocks")
+
+            assert self.__apply_block(self.__unspent, block, verified)
+
+        self.__prune_blocks()
 
         return self.__unspent
 
+    @_synchronized
+    def load_snapshot(self, path=None):
+        """Load the list of unspent transactions from a snapshot
+
+        The snapshot is only used where its last block is in the chain, then
+        the blocks after it are applied to the list. The unconfirmed
+        transactions are lost.
+
+        Args:
+            path (String): the file of the snapshot, by default the snapshot path of the blockchain
+
+        Return:
+            (Boolean): True if the snapshot is valid for the chain
+        """
+
+        path = self.__snapshot_file(path)
+
+        try:
+            with open(path, 'rb') as stream:
+                unspent, height, tip_hash = read_snapshot(stream)
+        except (OSError, ValueError):
+            return False
+
+        if not 0 < height <= self.num_blocks or self.chain[height - 1].hash != tip_hash:
+            return False
+
+        self.__undo.clear()
+
+        for step in range(height, self.num_blocks):
+            if not self.__apply_block(unspent, self.chain[step]):
+                self.__undo.clear()
+                return False
+
+        self.__unspent = unspent
+        self.__prune_blocks()
+
+        return True
+
+    @_synchronized
+    def save_snapshot(self, path=None):
+        """Save a snapshot of the list of unspent transactions
+
+        The snapshot is streamed to a temporary file which replaces the
+        previous one, so a failure does not corrupt it. A ValueError is raised
+        where no file is given and the blockchain has no snapshot path.
+
+        Args:
+            path (String): the file of the snapshot, by default the snapshot path of the blockchain
+        """
+
+        path = self.__snapshot_file(path)
+        unspent = self.get_unspent_list()
+
+        with open(path + '.tmp', 'wb') as stream:
+            write_snapshot(stream, unspent, self.num_blocks, self.last_block.hash)
+            stream.flush()
+            os.fsync(stream.fileno())
+
+        os.replace(path + '.tmp', path)
+
+    def __snapshot_file(self, path):
+        """Return the file of a snapshot, by default the snapshot path of the blockchain
+
+        A ValueError is raised where no file is given and the blockchain has no snapshot path.
+        """
+
+        path = path or self.snapshot_path
+
+        if path is None:
+            raise ValueError("The blockchain has no snapshot path, a file is required")
+
+        return path
+
+    def __chain_signatures(self):
+        """Gather the signatures of all the transactions in the chain
+
+        Return:
+            (Set): the message, the signature and the public key of each spend
+        """
+
+        transactions = {}
+        signatures = set()
+
+        for block in self.chain:
+            # The data which is not a list of transactions is not applied to the unspent list
+            if not isinstance(block.data, list):
+                continue
+
+            for transaction in block.data:
+                if not isinstance(transaction, Transaction):
+                    continue
+                elif not transaction.is_coinbase:
+                    for inputs in transaction.inputs:
+                        source = transactions.get(inputs.hash_id)
+
+                        if source is not None and 0 <= inputs.index < len(source.outputs):
+                            signatures.add((transaction.hash_id, transaction.signature,
+                                            source.outputs[inputs.index].address))
+
+                transactions[transaction.hash_id] = transaction
+
+        return signatures
+
     def get_wallet(self, key=None):
         """Get the wallet of a user
 
@@ -250,7 +1556,7 @@ class BlockChain:
 
         return Wallet(key, self)
 
-    def mining_candidate(self, init=None, maximum_iter=1000):
+    def mining_candidate(self, init=None, maximum_iter=1000, workers=1, executor=None):
         """Mining the Candidate Block
 
         Implements the search of an integer for the proof which satisficed the
@@ -262,26 +1568,130 @@ class BlockChain:
             self (Block): A Block object
             init (Integer): The values to use in the first proof
             maximum_iter (Integer): The maximum number of iterations in the mining process
+            workers (Integer): The number of processes used in the mining, None to use all the cores
+            executor (Executor): the executor of the parallel mining, by default a new pool of processes
 
         Return:
              (Logical): True if a valid proof has been found
         """
 
-        if self.__candidate is None:
+        with self.lock:
+            candidate = self.__candidate
+
+        if candidate is None or not candidate.mining(init, maximum_iter, workers, executor):
             return False
 
-        if self.__candidate.mining(init, maximum_iter):
-            self.chain.append(self.__candidate)
-            self.__candidate = None
-            self.__unspent = None
-            return True
+        return self.__append_mined(candidate)
 
-        return False
+    async def mining_candidate_async(self, init=None, maximum_iter=1000, workers=1, executor=None,
+                                     chunk_size=None, progress=None):
+        """Mining the Candidate Block without blocking the event loop
+
+        The candidate is mined with ``Block.mining_async``, which stops where
+        the candidate is replaced or other block is appended to the chain.
+        The task can also be cancelled at any time.
+
+        Args:
+            init (Integer): The values to use in the first proof
+            maximum_iter (Integer): The maximum number of iterations in the mining process
+            workers (Integer): The number of chunks evaluated at a time, None to use all the cores
+            executor (Executor): the executor of the chunks, by default a new pool of processes
+            chunk_size (Integer): The number of proofs tried in each chunk, by default the one of the block
+            progress (Function): called with the number of proofs tried and the total after each chunk
+
+        Return:
+             (Logical): True if a valid proof has been found
+        """
+
+        with self.lock:
+            candidate = self.__candidate
+
+        if candidate is None:
+            return False
+
+        def stop():
+            return not self.__is_current(candidate)
+
+        options = {} if chunk_size is None else {'chunk_size': chunk_size}
+
+        if not await candidate.mining_async(init, maximum_iter, workers, executor, progress=progress, stop=stop,
+                                            **options):
+            return False
+
+        # The transactions of the block are applied in a thread
+        return await running_loop().run_in_executor(None, self.__append_mined, candidate)
+
+    def __is_current(self, candidate):
+        """Indicate if a candidate is still the next block of the chain"""
+
+        return self.__candidate is candidate and \
+            (self.last_block is None or candidate.previous_hash == self.last_block.hash)
+
+    @_synchronized
+    def __append_mined(self, candidate):
+        """Append a candidate mined without the lock
+
+        Return:
+             (Logical): True if the candidate is still the next block of the chain
+        """
+
+        # The chain can change while the lock is released
+        if not self.__is_current(candidate):
+            return False
+
+        self.__append_block(candidate)
+        self.__candidate = None
+
+        return True
+
+    @staticmethod
+    def open(path, amount_mining=None):
+        """Open a blockchain stored on disk
+
+        The blocks are read lazily from the store. Where the amount of mining
+        is not given it is the amount of the genesis transaction. The snapshot
+        of the unspent transactions is saved in the directory of the store.
+        A ValueError is raised where the store is empty, a new store is
+        created with the genesis block by ``new_cryptocurrency``.
+
+        Args:
+            path (String): the directory of the store
+            amount_mining (Double): the reward for the miners
+
+        Return:
+            (BlockChain): the blockchain of the store
+        """
+
+        store = BlockStore(path)
+
+        try:
+            blockchain = BlockChain(store=store)
+        except ValueError:
+            store.close()
+            raise
+
+        blockchain.snapshot_path = os.path.join(path, BlockChain.SNAPSHOT_FILE)
+
+        if amount_mining is None:
+            amount_mining = 0
+
+            if blockchain.num_blocks > 0 and isinstance(blockchain.chain[0].data, list):
+                amount_mining = sum(output.amount
+                                    for transaction in blockchain.chain[0].data if transaction.is_coinbase
+                                    for output in transaction.outputs)
+
+        blockchain.amount_mining = amount_mining
+
+        return blockchain
 
     @staticmethod
-    def new_cryptocurrency(address, amount, timestamp=None, proof=0, difficulty=0, mining=False):
+    def new_cryptocurrency(address, amount, timestamp=None, proof=0, difficulty=0, mining=False,
+                           version=Block.HEADER_VERSION, store=None):
         """Create a new cryptocurrency
 
+        The blocks of a cryptocurrency use the header version by default, so
+        the hash of the blocks does not depend on the repr of the transactions.
+
         Args:
             address (string): the address of the first user
             amount (Double): the amount for the first user
@@ -289,6 +1699,8 @@ class BlockChain:
             proof (Integer): the proof
             difficulty (Integer): the number of zeros in the hash to validate the block
             mining (Boolean): logical value indicating if the block must be mined
+            version (Integer): the version of the block hash
+            store (BlockStore): the store of the blocks on disk
 
         Return:
             (BlockChain): A new blockchain
@@ -297,27 +1709,320 @@ class BlockChain:
         output = OutputTransaction(address, amount)
         transaction = Transaction(timestamp, output)
         block = Block.genesis_block([transaction], timestamp=timestamp, proof=proof, difficulty=difficulty,
-                                    mining=mining)
+                                    mining=mining, version=version)
 
-        blokchain = BlockChain(block)
+        blokchain = BlockChain(block, store)
         blokchain.amount_mining = amount
 
         return blokchain
 
+    @_synchronized
+    def chain_work(self, height=None):
+        """Return the cumulative work of the chain
+
+        Args:
+            height (Integer): the height of the last block, by default the last block of the chain
+
+        Return:
+            (Integer): the expected number of hashes to build the chain
+        """
+
+        return self.__chain_work(height)
+
+    def __chain_work(self, height=None):
+        """Return the cumulative work of the chain up to a height"""
+
+        if self.__work is None:
+            self.__work = []
+
+            # The blocks of a store are read without building their objects
+            if isinstance(self.chain, BlockStore):
+                blocks = (self.chain.view(height) for height in range(self.num_blocks))
+            else:
+                blocks = self.chain
+
+            for block in blocks:
+                self.__work.append(block.work + (self.__work[-1] if self.__work else 0))
+
+        if height is None:
+            height = self.num_blocks - 1
+
+        return self.__work[height]
+
+    @_synchronized
+    def add_block(self, block):
+        """Add a block received from other node
+
+        The block is appended where it follows the last block. Otherwise it is
+        kept in a bounded cache of side branches and the chain switches to its
+        branch where its cumulative work is greater, validating only the
+        blocks after the common ancestor. The block is validated with the same
+        rules as ``append_blocks``, the difficulty over the blocks of its own
+        branch. The blocks with invalid transactions found in a switch are
+        discarded with the blocks after them, so their descendants are
+        rejected without trying the switch again.
+
+        Args:
+            block (Block): the block to add
+
+        Return:
+            (logical): True if the block is valid, its parent is known and its branch can be switched to
+        """
+
+        if not isinstance(block, Block) or block.hash in self.__side_blocks or \
+                block.hash in self.__invalid_blocks or self.get_block(block.hash) is not None:
+            return False
+        elif block.previous_hash in self.__invalid_blocks:
+            self.__invalid_blocks.put(block.hash, True)
+            return False
+
+        # Get the parent in the chain or in a side branch
+        parent = self.get_block(block.previous_hash)
+        branch = []
+
+        if parent is not None:
+            work = self.chain_work(parent.index)
+        else:
+            parent, work = self.__side_blocks.get(block.previous_hash, (None, None))
+            branch = self.__branch(parent) if parent is not None else None
+
+        if work is None or branch is None:
+            return False
+
+        # The previous blocks are read from the branch of the parent after the fork
+        base = parent.index + 1 - len(branch)
+
+        def block_at(height):
+            return self.chain[height] if height < base else branch[height - base]
+
+        if self.__block_error(parent.index + 1, block, parent, block_at) is not None:
+            return False
+
+        work += block.work
+
+        if parent.hash == self.last_block.hash:
+            if self.__connect_blocks([block]) is not None:
+                self.__invalid_blocks.put(block.hash, True)
+                return False
+
+            self.__candidate = None
+        else:
+            self.__side_blocks.put(block.hash, (block, work))
+
+            if work > self.chain_work() and not self.__switch_branch(block):
+                return False
+
+        return True
+
+    def export_blocks(self, start=0, stop=None):
+        """Serialize the blocks of the chain one by one
+
+        Each block is serialized in the binary format of the block store
+        preceded by its size, so the records can be written to a stream and
+        read with ``import_blocks``.
+
+        Args:
+            start (Integer): the height of the first block
+            stop (Integer): the height after the last block, by default the end of the chain
+
+        Return:
+            (Generator): the serialized blocks
+        """
+
+        start, stop, _ = slice(start, stop).indices(self.num_blocks)
+
+        for height in range(start, stop):
+            yield encode_block_record(self.chain[height])
+
+    @_synchronized
+    def import_blocks(self, stream):
+        """Add the blocks serialized in a stream
+
+        The blocks are read, validated and added one by one with
+        ``add_block``, so only one block of the stream is in memory at a time
+        and they are validated with the same rules as ``append_blocks``.
+        The blocks already in the chain are skipped. The legacy blocks with
+        transactions are not valid once imported, their hash depends on the
+        repr of the transaction objects.
+
+        Args:
+            stream (File): a binary file with the records of ``export_blocks``
+
+        Return:
+            (Integer): the number of blocks added before the first invalid one
+        """
+
+        count = 0
+
+        for block in read_block_records(stream):
+            if self.get_block(block.hash) is not None:
+                continue
+            elif not self.add_block(block):
+                break
+
+            count += 1
+
+        return count
+
+    def __connect_blocks(self, blocks):
+        """Append validated blocks after validating their transactions
+
+        Return:
+            (Block): the first block with invalid transactions, None where all the blocks have been appended
+        """
+
+        height = self.num_blocks
+        validated = self.__validated == height
+        unspent = self.__unspent
+
+        if unspent is None and any(isinstance(block.data, list) for block in blocks):
+            unspent = self.get_unspent_list()
+
+        for block in blocks:
+            if unspent is not None and not self.__apply_block(unspent, block):
+                if self.num_blocks > height:
+                    self.__disconnect_blocks(height)
+
+                return block
+
+            self.__push_block(block)
+
+            if validated:
+                self.__validated = self.num_blocks
+                self.__validated_hash = block.hash
+
+        self.__prune_blocks()
+
+        return None
+
+    def __disconnect_blocks(self, height):
+        """Move the blocks from a height to the end to the side branches
+
+        The transactions of the blocks are reverted with their undo data and
+        appended again to the unconfirmed list. The list of unspent
+        transactions is rebuilt where the undo data is not available.
+
+        Return:
+            (Array): the removed blocks
+        """
+
+        if self.__unspent is not None and not self.__revert_blocks(height):
+            self.__reset_unspent()
+
+        blocks = self.chain[height:]
+
+        for block in blocks:
+            self.__side_blocks.put(block.hash, (block, self.chain_work(block.index)))
+
+        # The snapshots read the removed blocks from the record
+        self.__detached = self.__detached.detach(height, blocks)
+        self.__unindex_blocks(height)
+        del self.chain[height:]
+        self.__version += 1
+
+        if self.__work is not None:
+            del self.__work[height:]
+
+        if self.__validated > height:
+            self.__validated = height
+            self.__validated_hash = self.chain[height - 1].hash
+
+        return blocks
+
+    def __branch(self, block):
+        """Get the blocks of a side branch from the fork to a block
+
+        Return:
+            (Array): the blocks in order, None where a block has been removed from the cache
+        """
+
+        branch = [block]
+
+        while self.get_block(branch[-1].previous_hash) is None:
+            parent, _ = self.__side_blocks.get(branch[-1].previous_hash, (None, None))
+
+            if parent is None:
+                return None
+
+            branch.append(parent)
+
+        branch.reverse()
+
+        return branch
+
+    def __switch_branch(self, block):
+        """Switch the chain to the branch of a block
+
+        The block with invalid transactions and the blocks after it in the
+        branch are marked as invalid where the switch fails.
+
+        Return:
+            (logical): True if the chain has been switched
+        """
+
+        branch = self.__branch(block)
+
+        if branch is None:
+            return False
+
+        # The transactions of the pruned blocks cannot be reverted
+        if branch[0].index < self.__pruned:
+            return False
+
+        removed = self.__disconnect_blocks(branch[0].index)
+
+        for value in branch:
+            self.__side_blocks.pop(value.hash)
+
+        invalid = self.__connect_blocks(branch)
+
+        if invalid is not None:
+            # The blocks before the invalid one are back in the side branches
+            for value in branch[branch.index(invalid):]:
+                self.__invalid_blocks.put(value.hash, True)
+
+            # Restore the previous branch
+            self.__connect_blocks(removed)
+
+            for value in removed:
+                self.__side_blocks.pop(value.hash)
+
+            return False
+
+        self.__candidate = None
+
+        return True
+
+    @_synchronized
     def replace_chain(self, new_chain):
-        """Replace this chair for a longest one
+        """Replace this chain for a one with more work
+
+        The blocks of the new chain after the common ancestor are added to
+        the block tree, so only they are validated and the chain switches to
+        them where their cumulative work is greater.
 
         Return:
             (logical): True is the replacement is valid
         """
 
-        if isinstance(new_chain, BlockChain):
-            if new_chain.num_blocks > self.num_blocks:
-                if new_chain.chain[0] == self.chain[0]:
-                    if new_chain.is_valid:
-                        self.chain = new_chain.chain
-                        self.__candidate = new_chain.candidate_block
+        if isinstance(new_chain, BlockChain) and new_chain.num_blocks > 0:
+            if new_chain.chain[0] == self.chain[0]:
+                fork = 1
+
+                while fork < min(self.num_blocks, new_chain.num_blocks) and \
+                        self.chain[fork].hash == new_chain.chain[fork].hash:
+                    fork += 1
+
+                for block in new_chain.chain[fork:]:
+                    if block.hash not in self.__side_blocks and not self.add_block(block):
+                        return False
+
+                # The branch was already known
+                block, work = self.__side_blocks.get(new_chain.last_block.hash, (None, None))
+
+                if block is not None and work > self.chain_work():
+                    self.__switch_branch(block)
 
-                        return True
+                return self.last_block.hash == new_chain.last_block.hash and fork < new_chain.num_blocks
 
         return False
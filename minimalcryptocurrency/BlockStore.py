@@ -0,0 +1,243 @@
+"""BlockStore"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+import mmap
+import os
+import struct
+import threading
+
+from minimalcryptocurrency.cache import LRUCache
+from minimalcryptocurrency.serialization import BlockView
+from minimalcryptocurrency.serialization import decode_block
+from minimalcryptocurrency.serialization import encode_block
+
+# Size of the records in the log and offsets in the index
+_SIZE = struct.Struct('<I')
+_OFFSET = struct.Struct('<Q')
+
+
+class BlockStore:
+    """Append-only store of blocks on disk
+
+    The blocks are serialized one after the other in a log file, each one
+    preceded by its size. An index file stores the offset in the log of each
+    height as a fixed width integer, so it is memory mapped and a block is
+    read without deserializing the previous ones. The store behaves as a list
+    of blocks and can be read from several threads.
+    """
+
+    LOG_FILE = 'blocks.dat'
+    INDEX_FILE = 'blocks.idx'
+
+    def __init__(self, path, cache_size=256):
+        """Open or create a BlockStore Object
+
+        The records partially written at the end of the files are discarded.
+
+        Args:
+            path (String): the directory of the store
+            cache_size (Integer): the number of decoded blocks kept in memory
+        """
+
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.__log = open(os.path.join(path, self.LOG_FILE), 'a+b')
+        self.__index = open(os.path.join(path, self.INDEX_FILE), 'a+b')
+        self.__map = None
+        self.__blocks = LRUCache(cache_size)
+        self.__lock = threading.RLock()
+
+        self.__count = os.fstat(self.__index.fileno()).st_size // _OFFSET.size
+        self.__end = 0
+        self.__recover()
+
+    def __recover(self):
+        """Discard the records partially written"""
+
+        log_size = os.fstat(self.__log.fileno()).st_size
+
+        while self.__count > 0:
+            offset = self.__offset(self.__count - 1)
+            header = os.pread(self.__log.fileno(), _SIZE.size, offset)
+
+            if len(header) == _SIZE.size and offset + _SIZE.size + _SIZE.unpack(header)[0] <= log_size:
+                self.__end = offset + _SIZE.size + _SIZE.unpack(header)[0]
+                break
+
+            self.__count -= 1
+
+        self.__truncate_files()
+
+    def __truncate_files(self):
+        """Truncate the files to the records in the store"""
+
+        self.__unmap()
+        self.__log.truncate(self.__end)
+        self.__index.truncate(self.__count * _OFFSET.size)
+
+    def __unmap(self):
+        """Close the map of the index"""
+
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+
+    def __offset(self, height):
+        """Return the offset in the log of a height"""
+
+        if self.__map is None or len(self.__map) < (height + 1) * _OFFSET.size:
+            self.__unmap()
+            self.__index.flush()
+            self.__map = mmap.mmap(self.__index.fileno(), 0, access=mmap.ACCESS_READ)
+
+        return _OFFSET.unpack_from(self.__map, height * _OFFSET.size)[0]
+
+    def __len__(self):
+        """ Return len(self). """
+
+        return self.__count
+
+    def __iter__(self):
+        """ Implement iter(self). """
+
+        for height in range(self.__count):
+            yield self[height]
+
+    def __getitem__(self, height):
+        """ Return self[height]. """
+
+        if isinstance(height, slice):
+            return [self[step] for step in range(*height.indices(self.__count))]
+
+        if height < 0:
+            height += self.__count
+
+        if not 0 <= height < self.__count:
+            raise IndexError("block height out of range")
+
+        with self.__lock:
+            block = self.__blocks.get(height)
+
+            if block is None:
+                block = decode_block(self.read(height))
+                self.__blocks.put(height, block)
+
+        return block
+
+    def __delitem__(self, height):
+        """ Delete self[height:], only the last blocks can be removed. """
+
+        if isinstance(height, slice):
+            if height.stop is not None or height.step not in (None, 1):
+                raise ValueError("Only the last blocks can be removed from the store")
+
+            height = height.start or 0
+
+        if height < 0:
+            height += self.__count
+
+        if 0 <= height < self.__count:
+            self.truncate(height)
+
+    def append(self, block):
+        """Append a block at the end of the store
+
+        The record is written with a single sequential write before the index,
+        so a failure never leaves an indexed block partially written.
+
+        Args:
+            block (Block): the block to append
+        """
+
+        record = encode_block(block)
+
+        with self.__lock:
+            self.__log.write(_SIZE.pack(len(record)) + record)
+            self.__log.flush()
+            self.__index.write(_OFFSET.pack(self.__end))
+            self.__index.flush()
+
+            self.__blocks.put(self.__count, block)
+            self.__end += _SIZE.size + len(record)
+            self.__count += 1
+
+    def extend(self, blocks):
+        """Append several blocks at the end of the store
+
+        Args:
+            blocks (Iterable): the blocks to append
+        """
+
+        for block in blocks:
+            self.append(block)
+
+    def read(self, height):
+        """Read the serialized block of a height
+
+        Args:
+            height (Integer): the height of the block
+
+        Return:
+            (Bytes): the serialized block
+        """
+
+        with self.__lock:
+            offset = self.__offset(height)
+
+        size = _SIZE.unpack(os.pread(self.__log.fileno(), _SIZE.size, offset))[0]
+
+        return os.pread(self.__log.fileno(), size, offset + _SIZE.size)
+
+    def view(self, height):
+        """Read a block without building its objects
+
+        Args:
+            height (Integer): the height of the block
+
+        Return:
+            (BlockView): the view of the serialized block
+        """
+
+        return BlockView(self.read(height))
+
+    def truncate(self, height):
+        """Remove the blocks from a height to the end
+
+        Args:
+            height (Integer): the number of blocks to keep
+        """
+
+        with self.__lock:
+            if height < self.__count:
+                self.__end = self.__offset(height)
+                self.__count = height
+                self.__blocks.clear()
+                self.__truncate_files()
+
+    def close(self):
+        """Close the files of the store"""
+
+        with self.__lock:
+            self.__unmap()
+            self.__log.close()
+            self.__index.close()
@@ -0,0 +1,265 @@
+"""HeaderChain"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+from datetime import datetime
+from datetime import timedelta
+from hashlib import sha256
+
+from minimalcryptocurrency import Block
+from minimalcryptocurrency import BlockChain
+from minimalcryptocurrency import verify_merkle_proof
+
+# Origin of the timestamps in the header
+_EPOCH = datetime(1970, 1, 1)
+
+
+class BlockHeader:
+    """Header of a block without its data"""
+
+    def __init__(self, header):
+        """Create a new BlockHeader Object
+
+        Args:
+            header (Bytes): the binary header of a block of the header version
+        """
+
+        self.header = bytes(header)
+        self.hash = sha256(self.header).hexdigest()
+
+        self.version, self.index, previous_hash, timestamp, self.merkle_root, self.difficulty, self.proof = \
+            Block.HEADER_STRUCT.unpack(self.header)
+
+        self.previous_hash = None if self.index == 0 else previous_hash.hex()
+        self.timestamp = _EPOCH + timedelta(microseconds=timestamp)
+        self.target = Block.difficulty_to_target(self.difficulty)
+
+    def __repr__(self):
+        """ Return repr(self). """
+
+        return "BlockHeader: %d (%s)\n Hash: %s\n Previous: %s" % (
+            self.index, self.timestamp, self.hash, self.previous_hash)
+
+    @property
+    def is_valid(self):
+        """Evaluate if the hash satisfies the difficulty"""
+
+        return self.version == Block.HEADER_VERSION and int(self.hash, 16) < self.target
+
+    @property
+    def work(self):
+        """The expected number of hashes to find the proof of the block"""
+
+        return 2 ** 256 // self.target
+
+    @staticmethod
+    def from_block(block):
+        """Create the header of a block
+
+        Args:
+            block (Block): a block of the header version
+
+        Return:
+            (BlockHeader): the header of the block
+        """
+
+        return BlockHeader(block.header)
+
+
+class HeaderChain:
+    """Chain of block headers for light clients
+
+    The headers are validated by the proof of work, the link to the previous
+    one, the difficulty and the interval between blocks with the same rules
+    and parameters as ``BlockChain``, without the data of the blocks. They are
+    kept as contiguous bytes instead of objects, the header objects are
+    created on access.
+    """
+
+    def __init__(self, header):
+        """Create a new HeaderChain Object
+
+        Args:
+            header (Object): the genesis block, its header or its binary header
+        """
+
+        # Difficulty update parameters, the same as the ones of the blockchain
+        self.minimum_interval = 59
+        self.block_interval = 600
+        self.difficulty_interval = 144
+
+        # Binary headers and hashes of the blocks one after the other
+        self.__headers = bytearray()
+        self.__hashes = bytearray()
+
+        # Height of each hash and cumulative work of the chain
+        self.__heights = {}
+        self.__work = 0
+
+        header = self.__to_header(header)
+
+        if not header.is_valid or header.index != 0:
+            raise ValueError("The genesis header is not valid")
+
+        self.__append(header)
+
+    def __len__(self):
+        """ Return len(self). """
+
+        return len(self.__heights)
+
+    def __getitem__(self, height):
+        """ Return self[height]. """
+
+        if height < 0:
+            height += len(self)
+
+        if not 0 <= height < len(self):
+            raise IndexError("header height out of range")
+
+        size = Block.HEADER_STRUCT.size
+
+        return BlockHeader(self.__headers[height * size:(height + 1) * size])
+
+    @staticmethod
+    def __to_header(header):
+        """Convert a block or binary header to a BlockHeader"""
+
+        if isinstance(header, BlockHeader):
+            return header
+        elif isinstance(header, Block):
+            return BlockHeader.from_block(header)
+
+        return BlockHeader(header)
+
+    def __append(self, header):
+        """Append a valid header"""
+
+        hash_id = bytes.fromhex(header.hash)
+
+        self.__heights[hash_id] = len(self)
+        self.__headers += header.header
+        self.__hashes += hash_id
+        self.__work += header.work
+
+    @property
+    def chain_work(self):
+        """The cumulative work of the chain"""
+
+        return self.__work
+
+    @property
+    def last_header(self):
+        """Return the last header in the chain"""
+
+        return self[-1]
+
+    @property
+    def num_headers(self):
+        """Return the number of headers in the chain"""
+
+        return len(self)
+
+    def add_header(self, header):
+        """Append the header of the next block
+
+        Args:
+            header (Object): a block, its header or its binary header
+
+        Return:
+            (Logical): True if the header is valid and follows the last one
+        """
+
+        header = self.__to_header(header)
+        last_hash = bytes(self.__hashes[-32:]).hex()
+
+        if header.previous_hash != last_hash or header.index != len(self) or not header.is_valid:
+            return False
+
+        # The difficulty claimed by the header is not trusted
+        difficulty = BlockChain.expected_difficulty(len(self), self.__getitem__, self.difficulty_interval,
+                                                    self.block_interval)
+
+        if header.difficulty != difficulty:
+            return False
+        elif (header.timestamp - self.last_header.timestamp).total_seconds() < self.minimum_interval:
+            return False
+
+        self.__append(header)
+
+        return True
+
+    def add_headers(self, headers):
+        """Append the headers of the next blocks
+
+        Args:
+            headers (Iterable): blocks, headers or binary headers in order
+
+        Return:
+            (Integer): the number of headers appended before the first invalid one
+        """
+
+        count = 0
+
+        for header in headers:
+            if not self.add_header(header):
+                break
+
+            count += 1
+
+        return count
+
+    def get_header(self, hash_id):
+        """Get a header by the hash of its block
+
+        Args:
+            hash_id (String): the hash of the block
+
+        Return:
+            (BlockHeader): the header, None if it is not in the chain
+        """
+
+        height = self.__heights.get(bytes.fromhex(hash_id))
+
+        if height is None:
+            return None
+
+        return self[height]
+
+    def verify_transaction(self, hash_id, block_hash, position, proof):
+        """Verify the inclusion of a transaction in a block of the chain
+
+        Args:
+            hash_id (String): the id of the transaction
+            block_hash (String): the hash of the block
+            position (Integer): the position of the transaction in the block
+            proof (Array): the Merkle proof of the transaction
+
+        Return:
+            (Logical): True if the transaction is in the block
+        """
+
+        header = self.get_header(block_hash)
+
+        if header is None:
+            return False
+
+        return verify_merkle_proof(bytes.fromhex(hash_id), position, proof, header.merkle_root)
@@ -20,11 +20,12 @@
 #
 
 from datetime import datetime
+from fractions import Fraction
 from hashlib import sha256
 
-from ecdsa import SigningKey
-
 from minimalcryptocurrency import is_signature_valid
+from minimalcryptocurrency import signature
+from minimalcryptocurrency import verify_signatures
 
 
 class InputTransaction:
@@ -47,11 +48,22 @@ class InputTransaction:
         return self.hash_id == transaction.hash_id and \
                self.index == transaction.index
 
+    def __hash__(self):
+        """ Return hash(self). """
+
+        return hash(self.outpoint)
+
     def __repr__(self):
         """ Return repr(self). """
 
         return "%s (%d)" % (self.hash_id, self.index)
 
+    @property
+    def outpoint(self):
+        """The key of the spent output: the transaction id and the index"""
+
+        return self.hash_id, self.index
+
 
 class OutputTransaction:
     """Output transaction class"""
@@ -102,6 +114,12 @@ class Transaction:
         else:
             self.sign(key)
 
+    @property
+    def is_coinbase(self):
+        """Indicate if the transaction creates currency without inputs"""
+
+        return self.inputs is None or isinstance(self.inputs, datetime)
+
     def generate_transaction_id(self):
         """Calculate the id of the transaction
 
@@ -137,8 +155,7 @@ class Transaction:
             (String): the signature of the transaction
         """
 
-        signature_key = SigningKey.from_string(bytes.fromhex(key))
-        self.signature = signature_key.sign(self.hash_id.encode('utf-8')).hex()
+        self.signature = signature(self.hash_id, key)
 
 
 class UnspentList:
@@ -147,28 +164,59 @@ class UnspentList:
     def __init__(self):
         """Create a new UnspentList Object"""
 
-        # List of unspent transactions
-        self.unspent = []
+        # Unspent transactions indexed by transaction id and index
+        self.unspent = {}
 
         # List of new transactions to be spend
         self.unconfirmed = []
 
-    def __spend(self, transaction):
-        """Spend the transaction"""
+        # Unspent transactions and confirmed balance of each address
+        self.__addresses = {}
+        self.__balances = {}
 
-        use_transactions = []
+        # Outputs spent by unconfirmed transactions and their amount by address
+        self.__claimed = set()
+        self.__pending = {}
 
-        # Validate input transaction
-        if not isinstance(transaction.inputs, datetime):
+        # Outputs created by unconfirmed transactions without inputs
+        self.__coinbase = set()
+
+        # Addresses whose balances have changed since the last call to changed_balances
+        self.__changed = set()
+
+    def __claim(self, transaction):
+        """Mark the outputs spent by an unconfirmed transaction"""
+
+        if transaction.is_coinbase:
+            for index in range(len(transaction.outputs)):
+                self.__coinbase.add((transaction.hash_id, index))
+        else:
             for inputs in transaction.inputs:
-                for unspent in self.unspent:
-                    if unspent.hash_id == inputs.hash_id and \
-                            unspent.index == inputs.index:
-                        use_transactions.append(unspent)
+                unspent = self.unspent[inputs.outpoint]
+
+                self.__claimed.add(unspent.outpoint)
+                self.__pending[unspent.address] = self.__pending.get(unspent.address, 0) + Fraction(unspent.amount)
+                self.__changed.add(unspent.address)
+
+    def __clear_unconfirmed(self):
+        """Remove all the unconfirmed transactions"""
+
+        self.__changed.update(self.__pending)
+        self.unconfirmed = []
+        self.__claimed = set()
+        self.__pending = {}
+        self.__coinbase = set()
+
+    def __spend(self, transaction, spent=None):
+        """Spend the transaction"""
 
         # Spend all transactions
-        for unspent in use_transactions:
-            self.unspent.remove(unspent)
+        if not transaction.is_coinbase:
+            for inputs in transaction.inputs:
+                unspent = self.remove_unspent(inputs.outpoint)
+
+                if spent is not None:
+                    spent.append(unspent)
 
         # Create the new transaction
         for index in range(len(transaction.outputs)):
@@ -176,12 +224,59 @@ class UnspentList:
                                          transaction.outputs[index].address,
                                          transaction.outputs[index].amount)
 
-            self.unspent.append(unspent)
+            self.add_unspent(unspent)
+
+    def add_unspent(self, unspent):
+        """Add an unspent transaction
+
+        Args:
+            unspent (UnspentTransaction): an unspent transaction
+
+        Returns:
+            (Boolean): True if the unspent transaction was not in the list
+        """
+
+        if unspent.outpoint in self.unspent:
+            return False
+
+        self.unspent[unspent.outpoint] = unspent
+        self.__addresses.setdefault(unspent.address, {})[unspent.outpoint] = unspent
+        self.__balances[unspent.address] = self.__balances.get(unspent.address, 0) + Fraction(unspent.amount)
+        self.__changed.add(unspent.address)
+
+        return True
+
+    def remove_unspent(self, outpoint):
+        """Remove an unspent transaction
+
+        Args:
+            outpoint (Tuple): the transaction id and the index of the output
+
+        Returns:
+            (UnspentTransaction): the removed transaction, None if it is not in the list
+        """
+
+        unspent = self.unspent.pop(outpoint, None)
+
+        if unspent is not None:
+            self.__changed.add(unspent.address)
+            address_unspent = self.__addresses[unspent.address]
+            del address_unspent[outpoint]
+
+            if address_unspent:
+                self.__balances[unspent.address] -= Fraction(unspent.amount)
+            else:
+                del self.__addresses[unspent.address]
+                del self.__balances[unspent.address]
+
+        return unspent
 
     def address_amount(self, address):
         """Calculate total unspent amount for an account
 
-        Get all unspent transactions and get the total amount in this account
+        The confirmed balance of each address is updated with every change of
+        the unspent transactions, the amounts are added as fractions to avoid
+        rounding errors.
 
         Args:
             address (String): an address
@@ -190,14 +285,48 @@ class UnspentList:
             (Double): the total amount in the address
         """
 
-        amount = 0
+        amount = self.__balances.get(address, 0) - self.__pending.get(address, 0)
 
-        transactions = self.address_transactions(address)
+        if amount.denominator == 1:
+            return int(amount)
 
-        for transaction in transactions:
-            amount += transaction.amount
+        return float(amount)
+
+    def confirmed_balances(self):
+        """Calculate the confirmed balance of every address
+
+        The amounts spent by the unconfirmed transactions are not subtracted.
+
+        Returns:
+            (Dictionary): the total amount of each address
+        """
+
+        return {address: int(amount) if amount.denominator == 1 else float(amount)
+                for address, amount in self.__balances.items()}
 
-        return amount
+    @property
+    def has_changes(self):
+        """Indicate if a balance has changed since the last call to ``changed_balances``"""
+
+        return bool(self.__changed)
+
+    def changed_balances(self):
+        """Get the balances changed since the last call
+
+        Returns:
+            (Dictionary): the confirmed balance and the amount returned by ``address_amount`` of each address
+        """
+
+        changed = self.__changed
+        self.__changed = set()
+        balances = {}
+
+        for address in changed:
+            amount = self.__balances.get(address, 0)
+            balances[address] = (int(amount) if amount.denominator == 1 else float(amount),
+                                 self.address_amount(address))
+
+        return balances
 
     def address_transactions(self, address):
         """Get all unspent transactions for an account
@@ -209,48 +338,148 @@ class UnspentList:
             (Array): an array of unspent transactions
         """
 
-        result = []
-
-        for unspent in self.unspent:
-            if unspent.address == address:
-                result.append(unspent)
+        return [unspent for unspent in self.__addresses.get(address, {}).values()
+                if unspent.outpoint not in self.__claimed]
 
-        # Remove unconfirmed from the results
-        for unconfirmed in self.unconfirmed:
-            if not isinstance(unconfirmed.inputs, datetime):
-                for unconfirmed_inputs in unconfirmed.inputs:
-                    for unspent in result:
-                        if unconfirmed_inputs.index == unspent.index and \
-                                unconfirmed_inputs.hash_id == unspent.hash_id:
-                            result.remove(unspent)
-
-        return result
-
-    def append_unconfirmed(self, transaction):
+    def append_unconfirmed(self, transaction, verified=None):
         """Append and uncofrimed trasaction
 
         Args:
             transaction (Transaction): an transaction object
+            verified (Dictionary): results of the signatures already validated
 
         Returns:
             (Boolean): True is the transaction can been append to the unconfirmed list
         """
-        if self.validate_transaction(transaction):
+        if self.validate_transaction(transaction, verified):
             self.unconfirmed.append(transaction)
+            self.__claim(transaction)
             return True
 
         return False
 
-    def confirm_unconfirmed(self):
-        """Confirm the list of unconfirmed transactions"""
+    def append_unconfirmed_batch(self, transactions, workers=None):
+        """Append a list of unconfirmed transactions
 
-        for unconfirmed in self.unconfirmed:
-            self.__spend(unconfirmed)
+        The signatures of all the transactions are validated in a pool of
+        processes before appending the transactions one by one, so the result
+        is the same as calling ``append_unconfirmed`` for each transaction.
 
-        self.unconfirmed = []
+        Args:
+            transactions (Array): the transaction objects
+            workers (Integer): the number of processes, None to use all the cores
+
+        Returns:
+            (Array): True for each transaction appended to the unconfirmed list
+        """
+
+        transactions = list(transactions)
+        verified = self.verify_signatures(transactions, workers)
+
+        return [self.append_unconfirmed(transaction, verified) for transaction in transactions]
+
+    def confirm_unconfirmed(self, spent=None):
+        """Confirm the list of unconfirmed transactions
+
+        Args:
+            spent (Array): where given, the unspent transactions spent are appended to it
+        """
+
+        unconfirmed = self.unconfirmed
+        self.__clear_unconfirmed()
+
+        for transaction in unconfirmed:
+            self.__spend(transaction, spent)
 
         return True
 
+    def confirm_transactions(self, transactions, workers=1, verified=None, spent=None):
+        """Confirm the transactions of a new block
+
+        Spend the transactions of the block and keep in the unconfirmed list
+        the transactions which are not in the block and are still valid. The
+        unspent transactions spent by the block are the undo data to revert it
+        with ``revert_transactions``.
+
+        Args:
+            transactions (Array): the transactions of the block
+            workers (Integer): the number of processes to validate the signatures, None to use all the cores
+            verified (Dictionary): results of the signatures already validated
+            spent (Array): where given, the unspent transactions spent by the block are appended to it
+
+        Returns:
+            (Boolean): True if all the transactions of the block are valid, the list is not modified otherwise
+        """
+
+        if verified is None:
+            verified = self.verify_signatures(transactions, workers)
+
+        unconfirmed = self.unconfirmed
+        self.__clear_unconfirmed()
+
+        for transaction in transactions:
+            if not self.append_unconfirmed(transaction, verified):
+                self.__clear_unconfirmed()
+
+                for pending in unconfirmed:
+                    self.unconfirmed.append(pending)
+                    self.__claim(pending)
+
+                return False
+
+        self.confirm_unconfirmed(spent)
+
+        # Keep the valid transactions which are not in the block
+        confirmed = set(transaction.hash_id for transaction in transactions)
+
+        for transaction in unconfirmed:
+            if transaction.hash_id not in confirmed:
+                self.append_unconfirmed(transaction)
+
+        return True
+
+    def revert_transactions(self, transactions, spent, readmit=True):
+        """Revert the transactions of the last confirmed block
+
+        Remove the outputs of the transactions and restore the unspent
+        transactions which they spent. The transactions of the block, except
+        the ones without inputs, are appended again to the unconfirmed list
+        before the previous unconfirmed transactions that are still valid.
+
+        Args:
+            transactions (Array): the transactions of the block
+            spent (Array): the unspent transactions spent by the block
+            readmit (Logical): update the unconfirmed list, otherwise it is not modified
+        """
+
+        position = len(spent)
+
+        for transaction in reversed(transactions):
+            for index in range(len(transaction.outputs)):
+                self.remove_unspent((transaction.hash_id, index))
+
+            if not transaction.is_coinbase:
+                position -= len(transaction.inputs)
+
+                for unspent in spent[position:position + len(transaction.inputs)]:
+                    self.add_unspent(unspent)
+
+        if readmit:
+            self.reset_unconfirmed([transaction for transaction in transactions if not transaction.is_coinbase] +
+                                   self.unconfirmed)
+
+    def reset_unconfirmed(self, transactions):
+        """Replace the list of unconfirmed transactions
+
+        Args:
+            transactions (Array): the new unconfirmed transactions, only the valid ones are appended
+        """
+
+        self.__clear_unconfirmed()
+
+        for transaction in transactions:
+            self.append_unconfirmed(transaction)
+
     def spend_transaction(self, transaction):
         """Spend a transaction
 
@@ -271,11 +500,12 @@ class UnspentList:
 
         return False
 
-    def validate_transaction(self, transaction):
+    def validate_transaction(self, transaction, verified=None):
         """Validate a transaction
 
         Args:
             transaction (Transaction): an transaction object
+            verified (Dictionary): results of the signatures already validated
 
         Returns:
             (Boolean): True is the transaction can been spent
@@ -289,31 +519,38 @@ class UnspentList:
         need_validation = True
 
         # Validate input transaction
-        if transaction.inputs is None or isinstance(transaction.inputs, datetime):
+        if transaction.is_coinbase:
             need_validation = False
 
-            for unconfirmed in self.unconfirmed:
-                for unconfirmed_outputs in unconfirmed.outputs:
-                    for outputs in transaction.outputs:
-                        if unconfirmed_outputs == outputs:
-                            return False
+            # validata that the outputs are not on the unconfirmed
+            for index in range(len(transaction.outputs)):
+                if (transaction.hash_id, index) in self.__coinbase:
+                    return False
         else:
+            spent = set()
+
             for inputs in transaction.inputs:
-                for unspent in self.unspent:
-                    # validata that the transaction is not on the unconfirmed
-                    for unconfirmed in self.unconfirmed:
-                        for unconfirmed_inputs in unconfirmed.inputs:
-                            if unconfirmed_inputs == inputs:
-                                return False
-
-                    # Validate the signature
-                    if unspent.hash_id == inputs.hash_id and \
-                            unspent.index == inputs.index:
-                        if is_signature_valid(transaction.hash_id,
-                                              transaction.signature, unspent.address):
-                            use_transactions.append(unspent)
-                        else:
-                            return False
+                # validata that the transaction is not on the unconfirmed
+                if inputs.outpoint in self.__claimed:
+                    return False
+
+                # Validate the signature
+                unspent = self.unspent.get(inputs.outpoint)
+
+                if unspent is not None and unspent.outpoint not in spent:
+                    spent.add(unspent.outpoint)
+
+                    message = (transaction.hash_id, transaction.signature, unspent.address)
+
+                    if verified is not None and message in verified:
+                        valid = verified[message]
+                    else:
+                        valid = is_signature_valid(*message)
+
+                    if valid:
+                        use_transactions.append(unspent)
+                    else:
+                        return False
 
         # Validate the number of transactions
         if need_validation and len(transaction.inputs) != len(use_transactions):
@@ -335,6 +572,38 @@ class UnspentList:
         # Finish the validation
         return True
 
+    def verify_signatures(self, transactions, workers=None):
+        """Validate the signatures of a list of transactions
+
+        Gather the signatures of the transactions which spend an unspent
+        transaction and validate them in a pool of processes. With one worker
+        nothing is validated in advance and the result is empty.
+
+        Args:
+            transactions (Array): the transaction objects
+            workers (Integer): the number of processes, None to use all the cores
+
+        Returns:
+            (Dictionary): the result for each message, signature and public key
+        """
+
+        if workers == 1:
+            return {}
+
+        signatures = set()
+
+        for transaction in transactions:
+            if isinstance(transaction, Transaction) and not transaction.is_coinbase:
+                for inputs in transaction.inputs:
+                    unspent = self.unspent.get(inputs.outpoint)
+
+                    if unspent is not None:
+                        signatures.add((transaction.hash_id, transaction.signature, unspent.address))
+
+        signatures = list(signatures)
+
+        return dict(zip(signatures, verify_signatures(signatures, workers)))
+
 
 class UnspentTransaction:
     """Unspent transactions class"""
@@ -361,3 +630,14 @@ class UnspentTransaction:
             return True
 
         return False
+
+    def __hash__(self):
+        """ Return hash(self). """
+
+        return hash(self.outpoint)
+
+    @property
+    def outpoint(self):
+        """The key of the output: the transaction id and the index"""
+
+        return self.hash_id, self.index
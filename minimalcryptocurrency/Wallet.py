@@ -19,11 +19,10 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>
 #
 
-from ecdsa import SigningKey
-
 from minimalcryptocurrency import InputTransaction
 from minimalcryptocurrency import OutputTransaction
 from minimalcryptocurrency import Transaction
+from minimalcryptocurrency import generate_private_key
 from minimalcryptocurrency import generate_public_key
 
 
@@ -42,12 +41,11 @@ class Wallet:
         """
 
         if private is None:
-            sk = SigningKey.generate()
-            self.private = sk.to_string().hex()
-            self.public = sk.get_verifying_key().to_string().hex()
+            self.private = generate_private_key()
         else:
             self.private = private
-            self.public = generate_public_key(private)
+
+        self.public = generate_public_key(self.private)
 
         self.unspent = None
         self.blockchain = blockchain
@@ -70,6 +68,8 @@ class Wallet:
     def generate_transaction_to(self, account, amount):
         """Generate the transactions to an account
 
+        The unspent transactions of the blockchain are read holding its lock.
+
         Args:
             account (String): the destination account
             amount (Double): the amount to transfer
@@ -78,11 +78,20 @@ class Wallet:
             (Transaction): a signed transaction where it is possible, None otherwise.
         """
 
+        if self.blockchain is not None:
+            with self.blockchain.lock:
+                return self.__generate_transaction(account, amount)
+
+        return self.__generate_transaction(account, amount)
+
+    def __generate_transaction(self, account, amount):
+        """Generate the transactions to an account"""
+
         # Update unspent list
         self.__update_unspent()
 
         # Validate if there are enough balance
-        if self.get_balance() < amount:
+        if self.unspent is None or self.unspent.address_amount(self.public) < amount:
             return None
 
         # Get the unspent transaction
@@ -125,12 +134,15 @@ class Wallet:
     def get_balance(self):
         """Get the balance in the Wallet
 
+        The balance of a wallet of a blockchain is read from its snapshot, so
+        it does not wait for the writers.
+
         Returns:
             (Double): the total amount in the wallet
         """
 
-        # Update unspent list
-        self.__update_unspent()
+        if self.blockchain is not None:
+            return self.blockchain.snapshot().address_amount(self.public)
 
         if self.unspent is None:
             return 0
@@ -154,6 +166,15 @@ class Wallet:
             (Boolean): True is the transfer were done.
         """
 
+        if self.blockchain is not None:
+            with self.blockchain.lock:
+                return self.__transfer(account, amount)
+
+        return self.__transfer(account, amount)
+
+    def __transfer(self, account, amount):
+        """Transfer from the wallet ot another account"""
+
         # Update unspent list
         self.__update_unspent()
 
@@ -1,8 +1,27 @@
 """minimalcryptocurrency - a minimal implementation of a blockchain"""
 
+from minimalcryptocurrency.backends import available_backends
+
+from minimalcryptocurrency.cryptography import clear_key_cache
+from minimalcryptocurrency.cryptography import clear_signature_cache
+from minimalcryptocurrency.cryptography import generate_private_key
 from minimalcryptocurrency.cryptography import generate_public_key
+from minimalcryptocurrency.cryptography import get_backend
 from minimalcryptocurrency.cryptography import is_signature_valid
+from minimalcryptocurrency.cryptography import key_cache_info
+from minimalcryptocurrency.cryptography import precompute_key
+from minimalcryptocurrency.cryptography import set_backend
+from minimalcryptocurrency.cryptography import set_key_cache_size
+from minimalcryptocurrency.cryptography import set_signature_cache_size
 from minimalcryptocurrency.cryptography import signature
+from minimalcryptocurrency.cryptography import signature_cache_info
+from minimalcryptocurrency.cryptography import verify_signatures
+from minimalcryptocurrency.cryptography import verify_signatures_async
+
+from minimalcryptocurrency.merkle import merkle_leaves
+from minimalcryptocurrency.merkle import merkle_proof
+from minimalcryptocurrency.merkle import merkle_root
+from minimalcryptocurrency.merkle import verify_merkle_proof
 
 from minimalcryptocurrency.Transaction import InputTransaction
 from minimalcryptocurrency.Transaction import OutputTransaction
@@ -13,7 +32,27 @@ from minimalcryptocurrency.Transaction import UnspentTransaction
 from minimalcryptocurrency.Wallet import Wallet
 
 from minimalcryptocurrency.Block import Block
+
+from minimalcryptocurrency.serialization import BlockView
+from minimalcryptocurrency.serialization import TransactionView
+from minimalcryptocurrency.serialization import decode_block
+from minimalcryptocurrency.serialization import decode_transaction
+from minimalcryptocurrency.serialization import decode_unspent
+from minimalcryptocurrency.serialization import encode_block
+from minimalcryptocurrency.serialization import encode_block_record
+from minimalcryptocurrency.serialization import encode_transaction
+from minimalcryptocurrency.serialization import encode_unspent
+from minimalcryptocurrency.serialization import read_block_records
+from minimalcryptocurrency.serialization import read_snapshot
+from minimalcryptocurrency.serialization import write_snapshot
+
+from minimalcryptocurrency.BlockStore import BlockStore
 from minimalcryptocurrency.BlockChain import BlockChain
+from minimalcryptocurrency.BlockChain import BlockValidationError
+from minimalcryptocurrency.BlockChain import ChainSnapshot
+
+from minimalcryptocurrency.HeaderChain import BlockHeader
+from minimalcryptocurrency.HeaderChain import HeaderChain
 
 __version__ = '0.1.2'
 __author__ = u'Daniel Rodríguez Pérez <daniel.rodriguez.perez@gmail.com>'
@@ -0,0 +1,297 @@
+"""Cryptography backends"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+from ecdsa import SigningKey, VerifyingKey, BadSignatureError
+from ecdsa import NIST192p
+from ecdsa.ellipticcurve import Point
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+except ImportError:
+    ec = None
+
+# Size in bytes of the numbers of the curve NIST P-192
+_SIZE = 24
+
+
+class Backend:
+    """Interface of the cryptography backends
+
+    The keys are NIST P-192 keys. The private keys are the secret exponent
+    and the public keys the coordinates of the point, both big endian. The
+    signatures are the values ``r`` and ``s`` of an ECDSA signature with
+    SHA-1, also big endian.
+    """
+
+    name = None
+
+    def generate_private_key(self):
+        """Generate a new private key
+
+        Return:
+            (Bytes): the private key
+        """
+
+        raise NotImplementedError
+
+    def load_signing_key(self, key):
+        """Parse a private key
+
+        Args:
+            key (Bytes): the private key
+
+        Return:
+            (Object): the signing key of the backend
+        """
+
+        raise NotImplementedError
+
+    def load_verifying_key(self, public_key):
+        """Parse a public key
+
+        Args:
+            public_key (Bytes): the public key
+
+        Return:
+            (Object): the verifying key of the backend, None where the key is not valid
+        """
+
+        raise NotImplementedError
+
+    def precompute(self, verifying_key):
+        """Prepare a verifying key to validate many signatures
+
+        Args:
+            verifying_key (Object): the verifying key of the backend
+
+        Return:
+            (Object): the prepared verifying key
+        """
+
+        return verifying_key
+
+    def public_key(self, signing_key):
+        """Calculate the public key of a signing key
+
+        Args:
+            signing_key (Object): the signing key of the backend
+
+        Return:
+            (Bytes): the public key
+        """
+
+        raise NotImplementedError
+
+    def sign(self, signing_key, message):
+        """Sign a message
+
+        Args:
+            signing_key (Object): the signing key of the backend
+            message (Bytes): the message
+
+        Return:
+            (Bytes): the signature
+        """
+
+        raise NotImplementedError
+
+    def verify(self, verifying_key, signature, message):
+        """Validate the signature of a message
+
+        Args:
+            verifying_key (Object): the verifying key of the backend
+            signature (Bytes): the signature
+            message (Bytes): the message
+
+        Return:
+            (Logical): True if the signature is valid
+        """
+
+        raise NotImplementedError
+
+
+class EcdsaBackend(Backend):
+    """Backend based on the pure Python ecdsa package"""
+
+    name = 'ecdsa'
+
+    def generate_private_key(self):
+        """Generate a new private key"""
+
+        return SigningKey.generate(curve=NIST192p).to_string()
+
+    def load_signing_key(self, key):
+        """Parse a private key"""
+
+        return SigningKey.from_string(key, curve=NIST192p)
+
+    def load_verifying_key(self, public_key):
+        """Parse a public key"""
+
+        try:
+            return VerifyingKey.from_string(public_key, curve=NIST192p)
+        except AssertionError:
+            # The key is not valid
+            return None
+
+    def precompute(self, verifying_key):
+        """Prepare a verifying key to validate many signatures"""
+
+        if not hasattr(verifying_key, 'precompute'):
+            return verifying_key
+
+        # The points parsed from strings have no order, which is required
+        curve = verifying_key.curve
+        point = verifying_key.pubkey.point
+        point = Point(curve.curve, point.x(), point.y(), curve.order)
+
+        verifying_key = VerifyingKey.from_public_point(point, curve)
+        verifying_key.precompute()
+
+        return verifying_key
+
+    def public_key(self, signing_key):
+        """Calculate the public key of a signing key"""
+
+        return signing_key.get_verifying_key().to_string()
+
+    def sign(self, signing_key, message):
+        """Sign a message"""
+
+        return signing_key.sign(message)
+
+    def verify(self, verifying_key, signature, message):
+        """Validate the signature of a message"""
+
+        try:
+            return verifying_key.verify(signature, message)
+        except AssertionError:
+            # The key is not valid
+            return False
+        except BadSignatureError:
+            # The signature is not valid
+            return False
+
+
+class CryptographyBackend(Backend):
+    """Backend based on the native cryptography package
+
+    The keys and signatures are the same as the ones of the ecdsa backend.
+    """
+
+    name = 'cryptography'
+
+    def __init__(self):
+        """Create a new CryptographyBackend Object"""
+
+        if ec is None:
+            raise ImportError("The cryptography package is not installed")
+
+        self.curve = ec.SECP192R1()
+        self.algorithm = ec.ECDSA(hashes.SHA1())
+
+    def generate_private_key(self):
+        """Generate a new private key"""
+
+        private_value = ec.generate_private_key(self.curve).private_numbers().private_value
+
+        return private_value.to_bytes(_SIZE, 'big')
+
+    def load_signing_key(self, key):
+        """Parse a private key"""
+
+        return ec.derive_private_key(int.from_bytes(key, 'big'), self.curve)
+
+    def load_verifying_key(self, public_key):
+        """Parse a public key"""
+
+        try:
+            return ec.EllipticCurvePublicKey.from_encoded_point(self.curve, b'\x04' + public_key)
+        except ValueError:
+            # The key is not valid
+            return None
+
+    def public_key(self, signing_key):
+        """Calculate the public key of a signing key"""
+
+        numbers = signing_key.public_key().public_numbers()
+
+        return numbers.x.to_bytes(_SIZE, 'big') + numbers.y.to_bytes(_SIZE, 'big')
+
+    def sign(self, signing_key, message):
+        """Sign a message"""
+
+        r, s = decode_dss_signature(signing_key.sign(message, self.algorithm))
+
+        return r.to_bytes(_SIZE, 'big') + s.to_bytes(_SIZE, 'big')
+
+    def verify(self, verifying_key, signature, message):
+        """Validate the signature of a message"""
+
+        if len(signature) != 2 * _SIZE:
+            return False
+
+        r = int.from_bytes(signature[:_SIZE], 'big')
+        s = int.from_bytes(signature[_SIZE:], 'big')
+
+        try:
+            verifying_key.verify(encode_dss_signature(r, s), message, self.algorithm)
+        except InvalidSignature:
+            return False
+
+        return True
+
+
+def available_backends():
+    """Get the names of the backends which can be used
+
+    Return:
+        (Array): the names of the backends
+    """
+
+    names = [EcdsaBackend.name]
+
+    if ec is not None:
+        names.append(CryptographyBackend.name)
+
+    return names
+
+
+def create_backend(name):
+    """Create a backend by name
+
+    Args:
+        name (String): the name of the backend
+
+    Return:
+        (Backend): the backend
+    """
+
+    for backend in (EcdsaBackend, CryptographyBackend):
+        if backend.name == name:
+            return backend()
+
+    raise ValueError("Unknown cryptography backend %r" % name)
@@ -0,0 +1,130 @@
+"""Cache"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+from collections import OrderedDict
+from collections import namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache:
+    """Bounded cache which evicts the least recently used values"""
+
+    def __init__(self, maxsize=1024):
+        """Create a new LRUCache Object
+
+        Args:
+            maxsize (Integer): the maximum number of values, 0 disables the cache
+        """
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__values = OrderedDict()
+
+    def __contains__(self, key):
+        """ Return key in self. """
+
+        return key in self.__values
+
+    def __len__(self):
+        """ Return len(self). """
+
+        return len(self.__values)
+
+    def clear(self):
+        """Remove all the values and reset the counters"""
+
+        self.__values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Get a value and mark it as recently used
+
+        Args:
+            key (Object): the key of the value
+            default (Object): the value to return where the key is not in the cache
+
+        Return:
+            (Object): the value of the key
+        """
+
+        try:
+            self.__values.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+
+        return self.__values[key]
+
+    def info(self):
+        """Get the statistics of the cache
+
+        Return:
+            (CacheInfo): the hits, misses, maximum size and current size
+        """
+
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.__values))
+
+    def pop(self, key, default=None):
+        """Remove a value
+
+        Args:
+            key (Object): the key of the value
+            default (Object): the value to return where the key is not in the cache
+
+        Return:
+            (Object): the value of the key
+        """
+
+        return self.__values.pop(key, default)
+
+    def put(self, key, value):
+        """Store a value evicting the least recently used where it is full
+
+        Args:
+            key (Object): the key of the value
+            value (Object): the value
+        """
+
+        if self.maxsize <= 0:
+            return
+
+        self.__values[key] = value
+        self.__values.move_to_end(key)
+
+        while len(self.__values) > self.maxsize:
+            self.__values.popitem(last=False)
+
+    def resize(self, maxsize):
+        """Change the maximum number of values
+
+        Args:
+            maxsize (Integer): the maximum number of values, 0 disables the cache
+        """
+
+        self.maxsize = maxsize
+
+        while len(self.__values) > max(maxsize, 0):
+            self.__values.popitem(last=False)
@@ -19,8 +19,172 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import asyncio
+import os
 
-from ecdsa import SigningKey, VerifyingKey, BadSignatureError
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from minimalcryptocurrency.backends import create_backend
+from minimalcryptocurrency.cache import LRUCache
+
+# Backend used for keys and signatures
+_backend = create_backend('ecdsa')
+
+# Results of the signatures already validated
+_signature_cache = LRUCache(65536)
+
+# Parsed signing and verifying keys
+_key_cache = LRUCache(1024)
+
+
+def _signing_key(key):
+    """Get the parsed signing key of a private key
+
+    Args:
+        key (String): a private key
+
+    Return:
+        (Object): the signing key of the backend
+    """
+
+    cache_key = (_backend.name, 'private', key)
+    signing_key = _key_cache.get(cache_key)
+
+    if signing_key is None:
+        signing_key = _backend.load_signing_key(bytes.fromhex(key))
+        _key_cache.put(cache_key, signing_key)
+
+    return signing_key
+
+
+def _verifying_key(public_key):
+    """Get the parsed verifying key of a public key
+
+    Args:
+        public_key (String): the public key
+
+    Return:
+        (Object): the verifying key of the backend, None where the key is not valid
+    """
+
+    cache_key = (_backend.name, 'public', public_key)
+    verifying_key = _key_cache.get(cache_key)
+
+    if verifying_key is None:
+        verifying_key = _backend.load_verifying_key(bytes.fromhex(public_key))
+
+        if verifying_key is not None:
+            _key_cache.put(cache_key, verifying_key)
+
+    return verifying_key
+
+
+def clear_key_cache():
+    """Remove all the keys of the parsed key cache"""
+
+    _key_cache.clear()
+
+
+def get_backend():
+    """Get the backend used for keys and signatures
+
+    Return:
+        (Backend): the backend
+    """
+
+    return _backend
+
+
+def key_cache_info():
+    """Get the statistics of the parsed key cache
+
+    Return:
+        (CacheInfo): the hits, misses, maximum size and current size
+    """
+
+    return _key_cache.info()
+
+
+def precompute_key(public_key):
+    """Precompute the multiples of a public key used frequently
+
+    The precomputation speeds up the validation of the signatures of the key,
+    as the ones of an exchange hot wallet, while the key is in the cache.
+
+    Args:
+        public_key (String): the public key
+    """
+
+    verifying_key = _verifying_key(public_key)
+
+    if verifying_key is not None:
+        _key_cache.put((_backend.name, 'public', public_key), _backend.precompute(verifying_key))
+
+
+def clear_signature_cache():
+    """Remove all the results of the signature cache"""
+
+    _signature_cache.clear()
+
+
+def set_backend(backend):
+    """Change the backend used for keys and signatures
+
+    All the backends generate the same public keys and validate the
+    signatures of the others.
+
+    Args:
+        backend (Object): a Backend object or the name of a backend
+    """
+
+    global _backend
+
+    if isinstance(backend, str):
+        backend = create_backend(backend)
+
+    _backend = backend
+
+
+def set_key_cache_size(maxsize):
+    """Change the maximum number of keys in the parsed key cache
+
+    Args:
+        maxsize (Integer): the maximum number of keys, 0 disables the cache
+    """
+
+    _key_cache.resize(maxsize)
+
+
+def set_signature_cache_size(maxsize):
+    """Change the maximum number of results in the signature cache
+
+    Args:
+        maxsize (Integer): the maximum number of results, 0 disables the cache
+    """
+
+    _signature_cache.resize(maxsize)
+
+
+def signature_cache_info():
+    """Get the statistics of the signature cache
+
+    Return:
+        (CacheInfo): the hits, misses, maximum size and current size
+    """
+
+    return _signature_cache.info()
+
+
+def generate_private_key():
+    """Generate a new private key
+
+    Return:
+        (String): the private key in hex format
+    """
+
+    return _backend.generate_private_key().hex()
 
 
 def generate_public_key(key):
@@ -35,14 +199,15 @@ def generate_public_key(key):
         (String): the public key for the private key
     """
 
-    sk = SigningKey.from_string(bytes.fromhex(key))
-
-    return sk.get_verifying_key().to_string().hex()
+    return _backend.public_key(_signing_key(key)).hex()
 
 
 def is_signature_valid(message, signature, public_key):
     """Validate if a message has a valid signature
 
+    The results are stored in a bounded cache, so a signature is validated
+    only once while it is used.
+
     Args:
         message (String): the message which has been signed
         signature (String): the signature of the message
@@ -52,17 +217,49 @@ def is_signature_valid(message, signature, public_key):
         (Logical): True if the message has been signed by the public key
     """
 
-    try:
-        vk = VerifyingKey.from_string(bytes.fromhex(public_key))
-        return vk.verify(bytes.fromhex(signature), message.encode('utf-8'))
-    except AssertionError:
+    key = (message, signature, public_key)
+    result = _signature_cache.get(key)
+
+    if result is None:
+        result = _verify(message, signature, public_key)
+        _signature_cache.put(key, result)
+
+    return result
+
+
+def _verify(message, signature, public_key, backend=None):
+    """Validate if a message has a valid signature without the cache
+
+    Args:
+        message (String): the message which has been signed
+        signature (String): the signature of the message
+        public_key (String): the public key
+        backend (String): the name of the backend, None to use the actual one
+
+    Return:
+        (Logical): True if the message has been signed by the public key
+    """
+
+    if backend is not None and backend != _backend.name:
+        set_backend(backend)
+
+    vk = _verifying_key(public_key)
+
+    if vk is None:
         # The key is not valid
         return False
-    except BadSignatureError:
-        # The signature is not valid
-        return False
 
-    return False
+    return _backend.verify(vk, bytes.fromhex(signature), message.encode('utf-8'))
+
+
+def _verify_chunk(signatures, backend):
+    """Validate a chunk of signatures with a backend
+
+    Return:
+        (Array): True for each signature which is valid
+    """
+
+    return [_verify(*values, backend) for values in signatures]
 
 
 def signature(message, key):
@@ -76,6 +273,123 @@ def signature(message, key):
         (String): the signature of the message
     """
 
-    sk = SigningKey.from_string(bytes.fromhex(key))
+    return _backend.sign(_signing_key(key), message.encode('utf-8')).hex()
+
+
+def verify_signatures(signatures, workers=None):
+    """Validate a list of signatures in a pool of processes
+
+    Args:
+        signatures (Array): tuples with the message, the signature and the public key
+        workers (Integer): the number of processes, None to use all the cores
+
+    Return:
+        (Array): True for each signature which is valid
+    """
+
+    signatures = list(signatures)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Only validate the signatures which are not in the cache
+    results = [_signature_cache.get(tuple(values)) for values in signatures]
+    pending = [tuple(values) for values, result in zip(signatures, results) if result is None]
+
+    if workers <= 1 or len(pending) <= 1:
+        pending_results = [_verify(*values) for values in pending]
+    else:
+        chunksize = max(1, len(pending) // (4 * workers))
+
+        with ProcessPoolExecutor(workers) as executor:
+            pending_results = list(executor.map(_verify, *zip(*pending), repeat(_backend.name),
+                                                chunksize=chunksize))
+
+    pending_results = iter(pending_results)
+
+    for step, values in enumerate(signatures):
+        if results[step] is None:
+            results[step] = next(pending_results)
+            _signature_cache.put(tuple(values), results[step])
+
+    return results
+
+
+def running_loop():
+    """Get the event loop of the running coroutine
+
+    Inside a coroutine the current loop is the running one, it is used where
+    ``asyncio.get_running_loop`` is not available, before Python 3.7.
+
+    Return:
+        (AbstractEventLoop): the running loop
+    """
+
+    if hasattr(asyncio, 'get_running_loop'):
+        return asyncio.get_running_loop()
+
+    return asyncio.get_event_loop()
+
+
+async def verify_signatures_async(signatures, workers=None, executor=None, chunk_size=256, progress=None):
+    """Validate a list of signatures without blocking the event loop
+
+    The signatures which are not in the cache are validated in chunks by a
+    pool of processes, so the event loop only waits for the results.
+
+    Args:
+        signatures (Array): tuples with the message, the signature and the public key
+        workers (Integer): the number of chunks evaluated at a time, None to use all the cores
+        executor (Executor): the executor of the chunks, by default a new pool of processes
+        chunk_size (Integer): the number of signatures in each chunk
+        progress (Function): called with the number of signatures validated and the total after each chunk
+
+    Return:
+        (Array): True for each signature which is valid
+    """
+
+    signatures = [tuple(values) for values in signatures]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    # Only validate the signatures which are not in the cache
+    results = [_signature_cache.get(values) for values in signatures]
+    pending = [values for values, result in zip(signatures, results) if result is None]
+    pending_results = []
+
+    if pending:
+        loop = running_loop()
+        own_executor = executor is None
+        futures = deque()
+        start = 0
+
+        if own_executor:
+            executor = ProcessPoolExecutor(workers)
+
+        try:
+            while futures or start < len(pending):
+                while start < len(pending) and len(futures) < 2 * workers:
+                    futures.append(loop.run_in_executor(executor, _verify_chunk, pending[start:start + chunk_size],
+                                                        _backend.name))
+                    start += chunk_size
+
+                pending_results.extend(await futures.popleft())
+
+                if progress is not None:
+                    progress(len(pending_results), len(pending))
+        finally:
+            for future in futures:
+                future.cancel()
+
+            if own_executor:
+                executor.shutdown(wait=False)
+
+    pending_results = iter(pending_results)
+
+    for step, values in enumerate(signatures):
+        if results[step] is None:
+            results[step] = next(pending_results)
+            _signature_cache.put(values, results[step])
 
-    return sk.sign(message.encode('utf-8')).hex()
+    return results
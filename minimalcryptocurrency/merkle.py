@@ -0,0 +1,136 @@
+"""Merkle tree functions"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+from hashlib import sha256
+
+
+def merkle_leaves(data):
+    """Calculate the leaves of the Merkle tree of the data of a block
+
+    The leaf of a transaction is its id, the leaf of any other object is the
+    hash of its representation. A list of values has one leaf per value.
+
+    Args:
+        data (Object): data store in the block
+
+    Return:
+        (Array): the leaves of the tree as bytes
+    """
+
+    if data is None:
+        return []
+
+    if not isinstance(data, (list, tuple)):
+        data = [data]
+
+    leaves = []
+
+    for value in data:
+        if hasattr(value, 'hash_id'):
+            leaves.append(bytes.fromhex(value.hash_id))
+        else:
+            leaves.append(sha256(repr(value).encode('utf-8')).digest())
+
+    return leaves
+
+
+def merkle_root(leaves):
+    """Calculate the root of a Merkle tree
+
+    The nodes of each level are hashed in pairs, duplicating the last one
+    where the number of nodes is odd.
+
+    Args:
+        leaves (Array): the leaves of the tree as bytes
+
+    Return:
+        (Bytes): the root of the tree, 32 zero bytes for an empty tree
+    """
+
+    if not leaves:
+        return bytes(32)
+
+    level = list(leaves)
+
+    while len(level) > 1:
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+
+        level = [sha256(level[step] + level[step + 1]).digest() for step in range(0, len(level), 2)]
+
+    return level[0]
+
+
+def merkle_proof(leaves, position):
+    """Calculate the proof of inclusion of a leaf in a Merkle tree
+
+    The proof is the sibling of the node of the leaf in each level of the
+    tree, from the leaves to the root.
+
+    Args:
+        leaves (Array): the leaves of the tree as bytes
+        position (Integer): the position of the leaf
+
+    Return:
+        (Array): the hashes of the siblings as bytes
+    """
+
+    if not 0 <= position < len(leaves):
+        raise IndexError("leaf position out of range")
+
+    proof = []
+    level = list(leaves)
+
+    while len(level) > 1:
+        if len(level) % 2 == 1:
+            level.append(level[-1])
+
+        proof.append(level[position ^ 1])
+        level = [sha256(level[step] + level[step + 1]).digest() for step in range(0, len(level), 2)]
+        position //= 2
+
+    return proof
+
+
+def verify_merkle_proof(leaf, position, proof, root):
+    """Verify the proof of inclusion of a leaf in a Merkle tree
+
+    Args:
+        leaf (Bytes): the leaf
+        position (Integer): the position of the leaf
+        proof (Array): the hashes of the siblings from the leaves to the root
+        root (Bytes): the root of the tree
+
+    Return:
+        (Logical): True if the leaf is in the tree
+    """
+
+    node = leaf
+
+    for sibling in proof:
+        if position % 2 == 0:
+            node = sha256(node + sibling).digest()
+        else:
+            node = sha256(sibling + node).digest()
+
+        position //= 2
+
+    return position == 0 and node == root
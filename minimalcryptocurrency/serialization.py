@@ -0,0 +1,820 @@
+"""Binary serialization of blocks and transactions"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+import struct
+
+from hashlib import sha256
+
+from datetime import datetime
+from datetime import timedelta
+
+from minimalcryptocurrency import Block
+from minimalcryptocurrency import InputTransaction
+from minimalcryptocurrency import OutputTransaction
+from minimalcryptocurrency import Transaction
+from minimalcryptocurrency import UnspentList
+from minimalcryptocurrency import UnspentTransaction
+
+# Fixed part of a block: version, flags, index, previous hash, timestamp type
+# and value, Merkle root, difficulty, proof, hash and size of the body
+BLOCK_HEADER = struct.Struct('<BBQ32sB8s32sdQ32sI')
+
+# Flags of the block
+FLAG_NO_PREVIOUS = 0x01
+FLAG_FLOAT_DIFFICULTY = 0x02
+FLAG_PRUNED = 0x04
+
+# Types of the timestamps
+TIME_DATETIME = 0
+TIME_INTEGER = 1
+TIME_FLOAT = 2
+
+# Types of the values in the body of a block
+VALUE_NONE = 0
+VALUE_STRING = 1
+VALUE_TRANSACTION = 2
+VALUE_LIST = 3
+
+# Types of the inputs of a transaction
+INPUTS_NONE = 0
+INPUTS_DATETIME = 1
+INPUTS_LIST = 2
+
+# Types of the amounts
+AMOUNT_INTEGER = 0
+AMOUNT_FLOAT = 1
+
+_UINT8 = struct.Struct('<B')
+_UINT16 = struct.Struct('<H')
+_UINT32 = struct.Struct('<I')
+_INT64 = struct.Struct('<q')
+_UINT64 = struct.Struct('<Q')
+_FLOAT64 = struct.Struct('<d')
+_INPUT = struct.Struct('<32sI')
+
+# Header of the snapshots: magic, height, hash of the tip and number of outputs
+SNAPSHOT_MAGIC = b'MCUS'
+SNAPSHOT_HEADER = struct.Struct('<4sQ32sQ')
+
+# Origin of the dates
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _encode_datetime(value):
+    """Serialize a naive date as microseconds since the epoch"""
+
+    if value.tzinfo is not None:
+        raise ValueError("Only naive dates can be serialized")
+
+    return _INT64.pack((value - _EPOCH) // timedelta(microseconds=1))
+
+
+def _decode_datetime(buffer, offset=0):
+    """Deserialize a date stored as microseconds since the epoch"""
+
+    return _EPOCH + timedelta(microseconds=_INT64.unpack_from(buffer, offset)[0])
+
+
+def _encode_hash(hash_id):
+    """Serialize a hash in hex format"""
+
+    value = bytes.fromhex(hash_id)
+
+    if len(value) != 32:
+        raise ValueError("The hash %r cannot be serialized" % hash_id)
+
+    return value
+
+
+def _encode_string(value, size=_UINT32):
+    """Serialize a string with its length"""
+
+    value = value.encode('utf-8')
+
+    return size.pack(len(value)) + value
+
+
+def _decode_string(buffer, offset, size=_UINT32):
+    """Deserialize a string with its length
+
+    Return:
+        (Tuple): the string and the offset after it
+    """
+
+    length = size.unpack_from(buffer, offset)[0]
+    offset += size.size
+
+    return str(buffer[offset:offset + length], 'utf-8'), offset + length
+
+
+def _encode_amount(amount):
+    """Serialize an amount"""
+
+    if isinstance(amount, float):
+        return _UINT8.pack(AMOUNT_FLOAT) + _FLOAT64.pack(amount)
+
+    return _UINT8.pack(AMOUNT_INTEGER) + _INT64.pack(amount)
+
+
+def _decode_amount(buffer, offset):
+    """Deserialize an amount
+
+    Return:
+        (Tuple): the amount and the offset after it
+    """
+
+    if buffer[offset] == AMOUNT_FLOAT:
+        return _FLOAT64.unpack_from(buffer, offset + 1)[0], offset + 9
+
+    return _INT64.unpack_from(buffer, offset + 1)[0], offset + 9
+
+
+def encode_transaction(transaction):
+    """Serialize a transaction
+
+    The transaction contains the id, the inputs, the outputs and the
+    signature.
+
+    Args:
+        transaction (Transaction): a transaction object
+
+    Return:
+        (Bytes): the serialized transaction
+    """
+
+    parts = [_encode_hash(transaction.hash_id)]
+
+    if transaction.inputs is None:
+        parts.append(_UINT8.pack(INPUTS_NONE))
+    elif isinstance(transaction.inputs, datetime):
+        parts.append(_UINT8.pack(INPUTS_DATETIME))
+        parts.append(_encode_datetime(transaction.inputs))
+    else:
+        parts.append(_UINT8.pack(INPUTS_LIST))
+        parts.append(_UINT32.pack(len(transaction.inputs)))
+
+        for inputs in transaction.inputs:
+            parts.append(_INPUT.pack(_encode_hash(inputs.hash_id), inputs.index))
+
+    parts.append(_UINT32.pack(len(transaction.outputs)))
+
+    for output in transaction.outputs:
+        parts.append(_encode_string(output.address, _UINT16))
+        parts.append(_encode_amount(output.amount))
+
+    signature = bytes.fromhex(transaction.signature)
+    parts.append(_UINT16.pack(len(signature)) + signature)
+
+    return b''.join(parts)
+
+
+def decode_transaction(buffer, offset=0):
+    """Deserialize a transaction
+
+    Args:
+        buffer (Bytes): the buffer with the serialized transaction
+        offset (Integer): the position of the transaction in the buffer
+
+    Return:
+        (Tuple): the transaction and the offset after it
+    """
+
+    buffer = memoryview(buffer)
+    hash_id = bytes(buffer[offset:offset + 32]).hex()
+    inputs_type = buffer[offset + 32]
+    offset += 33
+
+    if inputs_type == INPUTS_NONE:
+        inputs = None
+    elif inputs_type == INPUTS_DATETIME:
+        inputs = _decode_datetime(buffer, offset)
+        offset += _INT64.size
+    else:
+        inputs = []
+        count = _UINT32.unpack_from(buffer, offset)[0]
+        offset += _UINT32.size
+
+        for _ in range(count):
+            input_hash, index = _INPUT.unpack_from(buffer, offset)
+            inputs.append(InputTransaction(input_hash.hex(), index))
+            offset += _INPUT.size
+
+    outputs = []
+    count = _UINT32.unpack_from(buffer, offset)[0]
+    offset += _UINT32.size
+
+    for _ in range(count):
+        address, offset = _decode_string(buffer, offset, _UINT16)
+        amount, offset = _decode_amount(buffer, offset)
+        outputs.append(OutputTransaction(address, amount))
+
+    length = _UINT16.unpack_from(buffer, offset)[0]
+    offset += _UINT16.size
+    signature = bytes(buffer[offset:offset + length]).hex()
+
+    transaction = Transaction(inputs, outputs)
+    transaction.signature = signature
+
+    if transaction.hash_id != hash_id:
+        raise ValueError("The id of the transaction %s is not valid" % hash_id)
+
+    return transaction, offset + length
+
+
+def _encode_value(value):
+    """Serialize a value of the data of a block"""
+
+    if value is None:
+        return _UINT8.pack(VALUE_NONE)
+    elif isinstance(value, str):
+        return _UINT8.pack(VALUE_STRING) + _encode_string(value)
+    elif isinstance(value, Transaction):
+        transaction = encode_transaction(value)
+        return _UINT8.pack(VALUE_TRANSACTION) + _UINT32.pack(len(transaction)) + transaction
+    elif isinstance(value, list):
+        return b''.join([_UINT8.pack(VALUE_LIST), _UINT32.pack(len(value))] + [_encode_value(item) for item in value])
+
+    raise TypeError("The data of type %s cannot be serialized" % type(value).__name__)
+
+
+def _decode_value(buffer, offset):
+    """Deserialize a value of the data of a block
+
+    Return:
+        (Tuple): the value and the offset after it
+    """
+
+    value_type = buffer[offset]
+    offset += 1
+
+    if value_type == VALUE_NONE:
+        return None, offset
+    elif value_type == VALUE_STRING:
+        return _decode_string(buffer, offset)
+    elif value_type == VALUE_TRANSACTION:
+        transaction, _ = decode_transaction(buffer, offset + _UINT32.size)
+        return transaction, offset + _UINT32.size + _UINT32.unpack_from(buffer, offset)[0]
+
+    count = _UINT32.unpack_from(buffer, offset)[0]
+    offset += _UINT32.size
+    value = []
+
+    for _ in range(count):
+        item, offset = _decode_value(buffer, offset)
+        value.append(item)
+
+    return value, offset
+
+
+def encode_block(block):
+    """Serialize a block
+
+    The block starts with a fixed size header followed by the data. The data
+    can be None, a string, a transaction or a list of them.
+
+    Args:
+        block (Block): a block object
+
+    Return:
+        (Bytes): the serialized block
+    """
+
+    flags = 0
+
+    if block.previous_hash is None:
+        flags |= FLAG_NO_PREVIOUS
+        previous_hash = bytes(32)
+    else:
+        previous_hash = _encode_hash(block.previous_hash)
+
+    if isinstance(block.difficulty, float):
+        flags |= FLAG_FLOAT_DIFFICULTY
+
+    if block.pruned:
+        flags |= FLAG_PRUNED
+
+    if isinstance(block.timestamp, datetime):
+        time_type, timestamp = TIME_DATETIME, _encode_datetime(block.timestamp)
+    elif isinstance(block.timestamp, float):
+        time_type, timestamp = TIME_FLOAT, _FLOAT64.pack(block.timestamp)
+    else:
+        time_type, timestamp = TIME_INTEGER, _INT64.pack(block.timestamp)
+
+    body = _encode_value(block.data)
+
+    return BLOCK_HEADER.pack(block.version, flags, block.index, previous_hash, time_type, timestamp,
+                             block.merkle_root, block.difficulty, block.proof, _encode_hash(block.hash),
+                             len(body)) + body
+
+
+def decode_block(buffer, offset=0):
+    """Deserialize a block
+
+    The hash of the block is the stored one, so it can be validated with
+    ``Block.is_valid``. The pruned blocks keep the stored Merkle root.
+
+    Args:
+        buffer (Bytes): the buffer with the serialized block
+        offset (Integer): the position of the block in the buffer
+
+    Return:
+        (Block): the block
+    """
+
+    buffer = memoryview(buffer)
+    version, flags, index, previous_hash, time_type, timestamp, root, difficulty, proof, hash_id, _ = \
+        BLOCK_HEADER.unpack_from(buffer, offset)
+
+    if flags & FLAG_NO_PREVIOUS:
+        previous_hash = None
+    else:
+        previous_hash = previous_hash.hex()
+
+    if not flags & FLAG_FLOAT_DIFFICULTY:
+        difficulty = int(difficulty)
+
+    if time_type == TIME_DATETIME:
+        timestamp = _decode_datetime(timestamp)
+    elif time_type == TIME_FLOAT:
+        timestamp = _FLOAT64.unpack(timestamp)[0]
+    else:
+        timestamp = _INT64.unpack(timestamp)[0]
+
+    data, _ = _decode_value(buffer, offset + BLOCK_HEADER.size)
+
+    block = Block(index, data, previous_hash, timestamp, proof, difficulty, version)
+
+    if flags & FLAG_PRUNED:
+        block.prune(root)
+
+    block.hash = hash_id.hex()
+
+    return block
+
+
+def encode_unspent(unspent):
+    """Serialize an unspent transaction
+
+    Args:
+        unspent (UnspentTransaction): an unspent transaction
+
+    Return:
+        (Bytes): the serialized unspent transaction
+    """
+
+    return _INPUT.pack(_encode_hash(unspent.hash_id), unspent.index) + \
+        _encode_string(unspent.address, _UINT16) + _encode_amount(unspent.amount)
+
+
+def decode_unspent(buffer, offset=0):
+    """Deserialize an unspent transaction
+
+    Args:
+        buffer (Bytes): the buffer with the serialized unspent transaction
+        offset (Integer): the position of the unspent transaction in the buffer
+
+    Return:
+        (Tuple): the unspent transaction and the offset after it
+    """
+
+    hash_id, index = _INPUT.unpack_from(buffer, offset)
+    address, offset = _decode_string(buffer, offset + _INPUT.size, _UINT16)
+    amount, offset = _decode_amount(buffer, offset)
+
+    return UnspentTransaction(hash_id.hex(), index, address, amount), offset
+
+
+def write_snapshot(stream, unspent, height, tip_hash):
+    """Write a snapshot of the unspent transactions
+
+    The unspent transactions are written one by one after a header with the
+    height and the hash of the last block, and followed by the sha256 of the
+    whole snapshot. The unconfirmed transactions are not written.
+
+    Args:
+        stream (File): a binary file opened for writing
+        unspent (UnspentList): the list of unspent transactions
+        height (Integer): the number of blocks applied to the list
+        tip_hash (String): the hash of the last block applied to the list
+    """
+
+    checksum = sha256()
+
+    def write(value):
+        checksum.update(value)
+        stream.write(value)
+
+    write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, height, _encode_hash(tip_hash), len(unspent.unspent)))
+
+    for value in unspent.unspent.values():
+        write(encode_unspent(value))
+
+    stream.write(checksum.digest())
+
+
+def read_snapshot(stream):
+    """Read a snapshot of the unspent transactions
+
+    Args:
+        stream (File): a binary file opened for reading
+
+    Return:
+        (Tuple): the list of unspent transactions, the height and the hash of the last block
+    """
+
+    buffer = stream.read()
+
+    if len(buffer) < SNAPSHOT_HEADER.size + 32 or \
+            sha256(memoryview(buffer)[:-32]).digest() != buffer[-32:]:
+        raise ValueError("The snapshot is corrupted")
+
+    magic, height, tip_hash, count = SNAPSHOT_HEADER.unpack_from(buffer)
+
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("The file is not a snapshot")
+
+    unspent = UnspentList()
+    offset = SNAPSHOT_HEADER.size
+
+    for _ in range(count):
+        value, offset = decode_unspent(buffer, offset)
+        unspent.add_unspent(value)
+
+    if offset != len(buffer) - 32:
+        raise ValueError("The snapshot is corrupted")
+
+    return unspent, height, tip_hash.hex()
+
+
+def encode_block_record(block):
+    """Serialize a block preceded by its size
+
+    Args:
+        block (Block): a block object
+
+    Return:
+        (Bytes): the size and the serialized block
+    """
+
+    record = encode_block(block)
+
+    return _UINT32.pack(len(record)) + record
+
+
+def read_block_records(stream):
+    """Read the blocks serialized with their size one by one
+
+    Only one block is kept in memory at a time.
+
+    Args:
+        stream (File): a binary file opened for reading
+
+    Return:
+        (Generator): the blocks
+    """
+
+    while True:
+        size = stream.read(_UINT32.size)
+
+        if not size:
+            return
+        elif len(size) < _UINT32.size:
+            raise ValueError("The stream ends in the middle of a block")
+
+        size = _UINT32.unpack(size)[0]
+        record = stream.read(size)
+
+        if len(record) < size:
+            raise ValueError("The stream ends in the middle of a block")
+
+        yield decode_block(record)
+
+
+def _skip_value(buffer, offset):
+    """Return the offset after a serialized value of the data of a block"""
+
+    value_type = buffer[offset]
+    offset += 1
+
+    if value_type == VALUE_NONE:
+        return offset
+    elif value_type in (VALUE_STRING, VALUE_TRANSACTION):
+        return offset + _UINT32.size + _UINT32.unpack_from(buffer, offset)[0]
+
+    count = _UINT32.unpack_from(buffer, offset)[0]
+    offset += _UINT32.size
+
+    for _ in range(count):
+        offset = _skip_value(buffer, offset)
+
+    return offset
+
+
+class TransactionView:
+    """Read only view of a serialized transaction
+
+    The fields are read from the buffer when they are accessed, the ids and
+    addresses are returned as memoryview slices of the buffer.
+    """
+
+    def __init__(self, buffer, offset=0):
+        """Create a new TransactionView Object
+
+        Args:
+            buffer (Bytes): the buffer with the serialized transaction
+            offset (Integer): the position of the transaction in the buffer
+        """
+
+        self.buffer = memoryview(buffer)
+        self.offset = offset
+
+    @property
+    def hash_id(self):
+        """The id of the transaction"""
+
+        return self.buffer[self.offset:self.offset + 32]
+
+    @property
+    def is_coinbase(self):
+        """Indicate if the transaction has no inputs"""
+
+        return self.buffer[self.offset + 32] != INPUTS_LIST
+
+    def inputs(self):
+        """Iterate over the inputs of the transaction
+
+        Return:
+            (Generator): the id of the spent transaction and the index of the output
+        """
+
+        if self.is_coinbase:
+            return
+
+        offset = self.offset + 33
+        count = _UINT32.unpack_from(self.buffer, offset)[0]
+        offset += _UINT32.size
+
+        for _ in range(count):
+            yield self.buffer[offset:offset + 32], _UINT32.unpack_from(self.buffer, offset + 32)[0]
+            offset += _INPUT.size
+
+    def __outputs_offset(self):
+        """Return the offset of the outputs"""
+
+        inputs_type = self.buffer[self.offset + 32]
+        offset = self.offset + 33
+
+        if inputs_type == INPUTS_DATETIME:
+            offset += _INT64.size
+        elif inputs_type == INPUTS_LIST:
+            offset += _UINT32.size + _INPUT.size * _UINT32.unpack_from(self.buffer, offset)[0]
+
+        return offset
+
+    def outputs(self):
+        """Iterate over the outputs of the transaction
+
+        Return:
+            (Generator): the address as UTF-8 bytes and the amount of each output
+        """
+
+        offset = self.__outputs_offset()
+        count = _UINT32.unpack_from(self.buffer, offset)[0]
+        offset += _UINT32.size
+
+        for _ in range(count):
+            length = _UINT16.unpack_from(self.buffer, offset)[0]
+            address = self.buffer[offset + _UINT16.size:offset + _UINT16.size + length]
+            amount, offset = _decode_amount(self.buffer, offset + _UINT16.size + length)
+
+            yield address, amount
+
+    def to_transaction(self):
+        """Build the transaction object
+
+        Return:
+            (Transaction): the transaction
+        """
+
+        return decode_transaction(self.buffer, self.offset)[0]
+
+
+class BlockView:
+    """Read only view of a serialized block
+
+    The header fields are read from fixed positions of the buffer, so the
+    operations over the header never read the data of the block. The hashes
+    are returned as memoryview slices of the buffer.
+    """
+
+    def __init__(self, buffer, offset=0):
+        """Create a new BlockView Object
+
+        Args:
+            buffer (Bytes): the buffer with the serialized block
+            offset (Integer): the position of the block in the buffer
+        """
+
+        self.buffer = memoryview(buffer)
+        self.offset = offset
+
+    @property
+    def version(self):
+        """The version of the block hash"""
+
+        return self.buffer[self.offset]
+
+    @property
+    def index(self):
+        """The index of the block"""
+
+        return _UINT64.unpack_from(self.buffer, self.offset + 2)[0]
+
+    @property
+    def previous_hash(self):
+        """The hash of the previous block, None for the first block"""
+
+        if self.buffer[self.offset + 1] & FLAG_NO_PREVIOUS:
+            return None
+
+        return self.buffer[self.offset + 10:self.offset + 42]
+
+    @property
+    def timestamp(self):
+        """The time of the block"""
+
+        time_type = self.buffer[self.offset + 42]
+
+        if time_type == TIME_DATETIME:
+            return _decode_datetime(self.buffer, self.offset + 43)
+        elif time_type == TIME_FLOAT:
+            return _FLOAT64.unpack_from(self.buffer, self.offset + 43)[0]
+
+        return _INT64.unpack_from(self.buffer, self.offset + 43)[0]
+
+    @property
+    def merkle_root(self):
+        """The Merkle root of the data"""
+
+        return self.buffer[self.offset + 51:self.offset + 83]
+
+    @property
+    def difficulty(self):
+        """The difficulty of the block"""
+
+        difficulty = _FLOAT64.unpack_from(self.buffer, self.offset + 83)[0]
+
+        if not self.buffer[self.offset + 1] & FLAG_FLOAT_DIFFICULTY:
+            difficulty = int(difficulty)
+
+        return difficulty
+
+    @property
+    def work(self):
+        """The expected number of hashes to find the proof of the block"""
+
+        return 2 ** 256 // Block.difficulty_to_target(self.difficulty)
+
+    @property
+    def proof(self):
+        """The proof of work"""
+
+        return _UINT64.unpack_from(self.buffer, self.offset + 91)[0]
+
+    @property
+    def hash(self):
+        """The hash of the block"""
+
+        return self.buffer[self.offset + 99:self.offset + 131]
+
+    @property
+    def header(self):
+        """The binary header of a block of the header version
+
+        The header is built from the fixed fields, so the data of the block is
+        not read.
+        """
+
+        if self.version != Block.HEADER_VERSION:
+            raise ValueError("Only the blocks of the header version have a binary header")
+
+        if self.buffer[self.offset + 42] == TIME_DATETIME:
+            microseconds = _INT64.unpack_from(self.buffer, self.offset + 43)[0]
+        else:
+            microseconds = int(round(self.timestamp * 1000000))
+
+        return Block.HEADER_STRUCT.pack(self.version, self.index, bytes(self.buffer[self.offset + 10:self.offset + 42]),
+                                        microseconds, bytes(self.merkle_root), self.difficulty, self.proof)
+
+    @property
+    def pruned(self):
+        """Indicate if the data of the block has been discarded"""
+
+        return bool(self.buffer[self.offset + 1] & FLAG_PRUNED)
+
+    @property
+    def body(self):
+        """The serialized data of the block"""
+
+        start = self.offset + BLOCK_HEADER.size
+
+        return self.buffer[start:start + _UINT32.unpack_from(self.buffer, self.offset + 131)[0]]
+
+    def calculate_hash(self):
+        """Calculate the hash of the block
+
+        The hash of the header version is calculated over the header, so the
+        data is not read. The legacy version requires building the block.
+
+        Return:
+            (String): the hash in hex format
+        """
+
+        if self.version == Block.HEADER_VERSION:
+            return sha256(self.header).hexdigest()
+
+        return self.to_block().calculate_hash()
+
+    def follows(self, block):
+        """Indicate if the block follows other one
+
+        Args:
+            block (BlockView): the view of the previous block
+
+        Return:
+            (Logical): True if the index and the previous hash match the block
+        """
+
+        return self.index == block.index + 1 and self.previous_hash == block.hash
+
+    def transactions(self):
+        """Iterate over the transactions in the data of the block
+
+        Return:
+            (Generator): the view of each transaction
+        """
+
+        offset = self.offset + BLOCK_HEADER.size
+
+        if self.buffer[offset] == VALUE_TRANSACTION:
+            yield TransactionView(self.buffer, offset + 1 + _UINT32.size)
+        else:
+            for _, transaction in self.listed_transactions():
+                yield transaction
+
+    def listed_transactions(self):
+        """Iterate over the transactions where the data of the block is a list
+
+        Return:
+            (Generator): the position in the list and the view of each transaction
+        """
+
+        offset = self.offset + BLOCK_HEADER.size
+
+        if self.buffer[offset] == VALUE_LIST:
+            count = _UINT32.unpack_from(self.buffer, offset + 1)[0]
+            offset += 1 + _UINT32.size
+
+            for position in range(count):
+                if self.buffer[offset] == VALUE_TRANSACTION:
+                    yield position, TransactionView(self.buffer, offset + 1 + _UINT32.size)
+
+                offset = _skip_value(self.buffer, offset)
+
+    def txids(self):
+        """Iterate over the ids of the transactions in the data of the block
+
+        Return:
+            (Generator): the id of each transaction
+        """
+
+        for transaction in self.transactions():
+            yield transaction.hash_id
+
+    def to_block(self):
+        """Build the block object
+
+        Return:
+            (Block): the block
+        """
+
+        return decode_block(self.buffer, self.offset)
@@ -17,6 +17,8 @@ setuptools.setup(
 
     install_requires=['ecdsa>=0.13'],
 
+    extras_require={'cryptography': ['cryptography']},
+
     classifiers=[
         'Programming Language :: Python',
         'Programming Language :: Python :: 3',
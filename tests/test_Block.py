@@ -19,12 +19,20 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import asyncio
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
 from datetime import datetime
+from hashlib import sha256
 
 import pytest
 
 from minimalcryptocurrency import Block
 
+from tests.helpers import run
+
 
 def test_creation_block():
     """Test errors during the construcion of an object"""
@@ -172,3 +180,174 @@ def test_genesis_block():
     assert block.timestamp == datetime(2000, 1, 1)
     assert block.data is None
     assert block.proof == 46
+
+
+def test_parallel_mining():
+    """Test the mining process in a pool of processes"""
+
+    block = Block(0, 'Test data', timestamp=0)
+
+    block.difficulty = 8
+
+    # Calculate a valid proof with two workers
+    assert block.mining(init=0, workers=2)
+
+    assert block.hash_satisfies_difficulty
+    assert block.is_valid
+
+    # The proof is the same as the sequential one in the first range
+    proof = block.proof
+
+    assert block.mining(init=0)
+    assert block.proof == proof
+
+    # Set a value which cannot get a valid result
+    assert block.mining(init=0, maximum_iter=10, workers=2) is False
+
+    assert block.proof == 21
+    assert block.is_valid is False
+
+    # The same pool of processes can be used in several calls
+    with ProcessPoolExecutor(2) as executor:
+        assert block.mining(init=0, workers=2, executor=executor)
+        assert block.proof == proof
+
+        assert block.mining(init=0, maximum_iter=10, workers=2, executor=executor) is False
+        assert block.proof == 21
+
+
+def test_hash_parts():
+    """Test the serialization of the block around the proof"""
+
+    block = Block(3, ['First', 'Second'], previous_hash='0f59bb', timestamp=datetime(2000, 1, 1), proof=17,
+                  difficulty=2)
+
+    prefix, suffix = block.hash_parts()
+    midstate = sha256(prefix)
+
+    for proof in range(10):
+        block_hash = midstate.copy()
+        block_hash.update(repr(proof).encode('utf-8') + suffix)
+        block.proof = proof
+
+        assert block_hash.hexdigest() == block.hash
+
+
+def test_header_block():
+    """Test the blocks hashed over the binary header"""
+
+    previous_hash = '5e9fe54187feed1f12324ffa7bd9dc3d662706e1fd66a97eafbbefa912262aa2'
+    block = Block(1, ['First', 'Second'], previous_hash=previous_hash, timestamp=datetime(2000, 1, 1), difficulty=4,
+                  version=Block.HEADER_VERSION)
+
+    assert block.version == Block.HEADER_VERSION
+    assert len(block.header) == 100
+    assert block.hash == sha256(block.header).hexdigest()
+    assert block.hash == block.calculate_hash()
+
+    # The next block keeps the version
+    assert Block(block, 'Data').version == Block.HEADER_VERSION
+
+    # Mining a header block
+    assert block.mining()
+    assert block.is_valid
+
+    # The hash depends on the data through the Merkle root
+    block.data = ['First', 'Other']
+
+    assert block.is_valid is False
+
+    # The legacy version is the default one
+    assert Block(0, 'block data', timestamp=0).version == Block.LEGACY_VERSION
+
+    with pytest.raises(Exception):
+        Block(0, 'block data', version=3)
+
+
+def test_block_target():
+    """Test the integer target of the difficulty"""
+
+    block = Block(0, 'Test Data', timestamp=0)
+
+    assert block.target == 2 ** 256
+
+    block.difficulty = 4
+
+    assert block.target == 2 ** 252
+
+    # The target is the same as counting zeros in the hash
+    for proof in range(100):
+        block.proof = proof
+        binary_hash = bin(int(block.hash, 16))[2:].zfill(256)
+
+        assert block.hash_satisfies_difficulty == (binary_hash[:4] == '0000')
+
+    # Fractional difficulties
+    block.difficulty = 4.5
+
+    assert 2 ** 251 < block.target < 2 ** 252
+    assert block.mining()
+    assert int(block.hash, 16) < block.target
+
+    # Compact format of the target
+    assert Block.target_to_bits(0x00ffff * 2 ** (8 * (0x1d - 3))) == 0x1d00ffff
+    assert Block.bits_to_target(0x1d00ffff) == 0x00ffff * 2 ** (8 * (0x1d - 3))
+    assert Block.bits_to_target(block.bits) <= block.target
+
+
+def test_prune_block():
+    """Test to discard the data of a block"""
+
+    block = Block.genesis_block(['Data'], timestamp=datetime(2000, 1, 1), version=Block.HEADER_VERSION)
+    root = block.merkle_root
+
+    block.prune()
+
+    assert block.pruned
+    assert block.data is None
+    assert block.merkle_root == root
+    assert block.is_valid
+
+    # The hash of the legacy blocks depends on the data
+    with pytest.raises(ValueError):
+        Block.genesis_block(['Data']).prune()
+
+
+def test_mining_async():
+    """Test the mining process in the event loop"""
+
+    block = Block(0, 'Test data', timestamp=0)
+    block.difficulty = 8
+    expected = copy(block)
+    expected.mining(init=0, maximum_iter=10 ** 4)
+
+    steps = []
+
+    def progress(tried, total):
+        steps.append((tried, total))
+
+    with ThreadPoolExecutor(2) as executor:
+        assert run(block.mining_async(init=0, maximum_iter=10 ** 4, workers=2, executor=executor, chunk_size=64,
+                                      progress=progress))
+        assert block.proof == expected.proof
+        assert block.is_valid
+        assert steps and all(total == 10 ** 4 + 1 for _, total in steps)
+
+        # The mining is stopped when requested
+        assert run(block.mining_async(init=0, maximum_iter=100, executor=executor, chunk_size=10,
+                                      stop=lambda: True)) is False
+
+        # The task can be cancelled
+        block.difficulty = 64
+
+        async def cancel():
+            task = asyncio.ensure_future(block.mining_async(init=0, maximum_iter=10 ** 6, executor=executor,
+                                                            chunk_size=100))
+            await asyncio.sleep(0.01)
+            task.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        run(cancel())
+        assert block.is_valid is False
@@ -19,12 +19,30 @@
 #  along with this program.  If not, see <http://www.gnu.org/licenses/>
 #
 
+import asyncio
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+
 from datetime import datetime
+from datetime import timedelta
+from io import BytesIO
 
 import pytest
 
 from minimalcryptocurrency import Block
 from minimalcryptocurrency import BlockChain
+from minimalcryptocurrency import BlockValidationError
+from minimalcryptocurrency import ChainSnapshot
+from minimalcryptocurrency import InputTransaction
+from minimalcryptocurrency import OutputTransaction
+from minimalcryptocurrency import Transaction
+from minimalcryptocurrency import Wallet
+from minimalcryptocurrency import encode_block_record
+from minimalcryptocurrency import read_block_records
+
+from tests.helpers import run
 
 
 def test_creation_blockchain():
@@ -138,6 +156,10 @@ def test_validate_blockchain():
     blockchain.chain[1].index = 2
 
     assert blockchain.chain[1].is_valid is False
+
+    # The blocks are already validated, only a full validation detects the change
+    assert blockchain.is_valid
+    assert blockchain.revalidate(full=True) is False
     assert blockchain.is_valid is False
 
     # Mining new id
@@ -283,4 +305,669 @@ def test_change_block_contains():
     # Alter the blockchain data
     blockchain.chain[2].data = 'Khaki'
 
+    assert blockchain.revalidate(full=True) is False
+
+
+def test_parallel_mining_candidate():
+    """Test mining candidate in a pool of processes"""
+
+    block = Block.genesis_block(timestamp=datetime(2000, 1, 1), difficulty=4, mining=True)
+    blockchain = BlockChain(block)
+
+    # Add a new candidate
+    assert blockchain.add_candidate(None, timestamp=datetime(2000, 1, 2))
+    assert blockchain.mining_candidate(init=0, workers=2)
+
+    assert blockchain.candidate_block is None
+    assert blockchain.num_blocks == 2
+    assert blockchain.is_valid
+
+
+def test_incremental_validation():
+    """Test the validation of the new blocks only"""
+
+    block = Block.genesis_block(timestamp=datetime(2000, 1, 1), difficulty=4, mining=True)
+    blockchain = BlockChain(block)
+
+    for minute in range(1, 4):
+        assert blockchain.add_candidate(None, timestamp=datetime(2000, 1, 1, 0, minute, 0))
+        assert blockchain.mining_candidate()
+
+    assert blockchain.is_valid
+
+    # Alter an old block and append a new one
+    blockchain.chain[1].data = 'Khaki'
+
+    assert blockchain.add_candidate(None, timestamp=datetime(2000, 1, 1, 0, 4, 0))
+    assert blockchain.mining_candidate()
+
+    assert blockchain.is_valid
+    assert blockchain.revalidate(full=True) is False
+
+    # Replace the last validated block
+    blockchain.chain[1].data = None
+
+    assert blockchain.revalidate(full=True)
+
+    blockchain.chain[-1] = block
+
     assert blockchain.is_valid is False
+
+
+def test_block_index():
+    """Test the lookup of blocks and transactions"""
+
+    timestamp = datetime(2000, 1, 1)
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=timestamp)
+    genesis = blockchain.last_block
+
+    assert blockchain.get_block(genesis.hash) is genesis
+    assert blockchain.get_block('00') is None
+    assert blockchain.get_transaction(genesis.data[0].hash_id) is genesis.data[0]
+
+    # The new blocks are indexed
+    assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2))
+    assert blockchain.candidate_proof(0)
+
+    block = blockchain.last_block
+
+    assert blockchain.get_block(block.hash) is block
+    assert blockchain.get_transaction_location(block.data[0].hash_id) == (1, 0)
+
+    # The blocks of a replaced chain are removed
+    other = BlockChain(genesis)
+
+    for step in range(2):
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 3 + step))
+        assert other.candidate_proof(0)
+
+    assert blockchain.replace_chain(other)
+    assert blockchain.get_block(block.hash) is None
+    assert blockchain.get_transaction(block.data[0].hash_id) is None
+    assert blockchain.get_transaction_location(other.last_block.data[0].hash_id) == (2, 0)
+
+    # The chain modified in place is indexed again
+    replaced = blockchain.chain[2]
+    blockchain.chain[2] = block
+
+    assert blockchain.get_block(replaced.hash) is None
+    assert blockchain.get_block(block.hash) is block
+    assert blockchain.get_transaction_location(block.data[0].hash_id) == (2, 0)
+
+
+def test_fork_choice():
+    """Test the switch to the branch with more work"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1))
+    genesis = blockchain.last_block
+    other = BlockChain(genesis)
+    other.amount_mining = 100
+
+    assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2))
+    assert blockchain.candidate_proof(0)
+
+    for step in range(2):
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 2 + step))
+        assert other.candidate_proof(0)
+
+    main_block = blockchain.last_block
+    side_blocks = other.chain[1:]
+
+    # A branch with the same work is kept aside
+    assert blockchain.add_block(side_blocks[0])
+    assert blockchain.last_block is main_block
+    assert blockchain.add_block(side_blocks[0]) is False
+
+    # The branch with more work is the new chain
+    assert blockchain.add_block(side_blocks[1])
+    assert blockchain.last_block is side_blocks[1]
+    assert blockchain.chain_work() == 3
+    assert blockchain.get_block(main_block.hash) is None
+    assert blockchain.get_unspent_list().address_amount('a4f1') == 0
+    assert blockchain.get_unspent_list().address_amount('b5e2') == 200
+    assert blockchain.is_valid
+
+    # The chain returns to the first branch where it has more work
+    blocks = [main_block]
+
+    for step in range(2):
+        blocks.append(Block(blocks[-1], [Transaction(datetime(2000, 1, 3 + step), OutputTransaction('a4f1', 100))],
+                            timestamp=datetime(2000, 1, 3 + step)))
+
+    assert blockchain.add_block(blocks[1])
+    assert blockchain.add_block(blocks[2])
+    assert blockchain.last_block is blocks[2]
+    assert blockchain.num_blocks == 4
+    assert blockchain.get_unspent_list().address_amount('a4f1') == 300
+    assert blockchain.get_unspent_list().address_amount('b5e2') == 0
+
+    # The blocks with invalid transactions or unknown parents are rejected
+    invalid = Block(blocks[2], [Transaction([InputTransaction('00' * 32, 0)], OutputTransaction('a4f1', 100))],
+                    timestamp=datetime(2000, 1, 5))
+
+    assert blockchain.add_block(invalid) is False
+    assert blockchain.add_block(Block(invalid, None, timestamp=datetime(2000, 1, 6))) is False
+    assert blockchain.last_block is blocks[2]
+
+    # A heavier branch with invalid transactions is not switched to and its descendants are rejected
+    branch = [Block(blocks[1], invalid.data, timestamp=datetime(2000, 1, 5))]
+
+    for step in range(2):
+        branch.append(Block(branch[-1], None, timestamp=datetime(2000, 1, 6 + step)))
+
+    assert blockchain.add_block(branch[0])
+    assert blockchain.add_block(branch[1]) is False
+    assert blockchain.add_block(branch[2]) is False
+    assert blockchain.last_block is blocks[2]
+    assert blockchain.get_unspent_list().address_amount('a4f1') == 300
+    assert blockchain.is_valid
+
+
+def test_add_block_rules():
+    """Test the difficulty and interval rules in the blocks added one by one"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1), difficulty=1,
+                                               mining=True)
+    genesis = blockchain.last_block
+    other = BlockChain(genesis)
+    other.amount_mining = 100
+
+    for chain in [blockchain, other]:
+        chain.difficulty_interval = 2
+        chain.block_interval = 2 * 24 * 3600
+
+    # A block too close to the previous one is rejected as in a batch
+    close = Block(genesis, None, timestamp=genesis.timestamp)
+    close.difficulty = 1
+    close.mining(maximum_iter=10 ** 5)
+
+    assert blockchain.add_block(close) is False
+
+    with pytest.raises(BlockValidationError):
+        blockchain.append_blocks([close])
+
+    # The difficulty decreases in the chain and increases in the side branch
+    for step in range(4):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + 3 * step))
+        assert blockchain.mining_candidate(maximum_iter=10 ** 5)
+
+    for step in range(4):
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 2 + step))
+        assert other.mining_candidate(maximum_iter=10 ** 5)
+
+    assert [block.difficulty for block in blockchain.chain] == [1, 1, 1, 1, 0]
+    assert [block.difficulty for block in other.chain] == [1, 1, 1, 1, 2]
+
+    for block in other.chain[1:4]:
+        assert blockchain.add_block(block)
+
+    # The difficulty of a side block is calculated over its branch
+    easy = Block(other.chain[3], None, timestamp=datetime(2000, 1, 6))
+
+    assert blockchain.add_block(easy) is False
+    assert blockchain.last_block is not other.chain[3]
+    assert blockchain.add_block(other.chain[4])
+    assert blockchain.last_block is other.chain[4]
+
+
+def test_reorganization_undo():
+    """Test the rollback of the unspent list in a reorganization"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    blockchain = BlockChain.new_cryptocurrency(Wallet(key).public, 100, timestamp=datetime(2000, 1, 1))
+    other = BlockChain(blockchain.last_block)
+    other.amount_mining = 100
+    unspent = blockchain.get_unspent_list()
+
+    assert blockchain.add_transaction(key, 'a4f1', 10)
+    assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2))
+    assert blockchain.candidate_proof(0)
+
+    transaction = blockchain.last_block.data[0]
+
+    assert unspent.address_amount('a4f1') == 110
+
+    for step in range(2):
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 2 + step))
+        assert other.candidate_proof(0)
+
+    # The list is rolled back and the transaction is unconfirmed again
+    assert blockchain.replace_chain(other)
+    assert blockchain.get_unspent_list() is unspent
+    assert unspent.unconfirmed == [transaction]
+    assert unspent.address_amount('a4f1') == 0
+    assert unspent.address_amount('b5e2') == 200
+    assert transaction.inputs[0].outpoint in unspent.unspent
+
+    # The transaction is confirmed in the next block
+    assert blockchain.generate_candidate('b5e2', timestamp=datetime(2000, 1, 4))
+    assert blockchain.candidate_proof(0)
+    assert unspent.address_amount('a4f1') == 10
+    assert unspent.unconfirmed == []
+
+
+def test_pruning():
+    """Test the pruning mode"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1))
+    other = BlockChain(blockchain.last_block)
+    other.amount_mining = 100
+    blockchain.prune(2)
+
+    for step in range(4):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.candidate_proof(0)
+
+        if step == 0:
+            transaction = blockchain.last_block.data[0]
+            assert blockchain.get_transaction(transaction.hash_id) is transaction
+
+    # Only the data of the last blocks is kept
+    assert [block.pruned for block in blockchain.chain] == [True, True, True, False, False]
+    assert blockchain.revalidate(full=True)
+    assert blockchain.get_unspent_list().address_amount('a4f1') == 400
+    assert blockchain.get_transaction(transaction.hash_id) is None
+    assert other.last_block.data is not None
+
+    # The branches before a pruned block are not used
+    for step in range(6):
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 2 + step))
+        assert other.candidate_proof(0)
+
+    assert blockchain.replace_chain(other) is False
+    assert blockchain.num_blocks == 5
+
+    with pytest.raises(ValueError):
+        blockchain.rebuild_unspent_list()
+
+
+def test_export_import_blocks():
+    """Test the streaming of blocks between chains"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1))
+
+    for step in range(3):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.candidate_proof(0)
+
+    stream = BytesIO(b''.join(blockchain.export_blocks()))
+    other = BlockChain(next(read_block_records(BytesIO(next(blockchain.export_blocks(0, 1))))))
+
+    assert other.import_blocks(stream) == 3
+    assert other.last_block.hash == blockchain.last_block.hash
+    assert other.get_unspent_list().address_amount('a4f1') == 300
+
+    # The import stops in the first invalid block
+    stream = BytesIO(b''.join(blockchain.export_blocks(-1)) + b''.join(blockchain.export_blocks(1, 2)))
+
+    assert BlockChain(blockchain.chain[0]).import_blocks(stream) == 0
+
+    # The blocks are validated with the same rules as a batch
+    close = Block(blockchain.last_block, None, timestamp=blockchain.last_block.timestamp)
+    stream = BytesIO(b''.join(blockchain.export_blocks(1)) + encode_block_record(close))
+    other = BlockChain(blockchain.chain[0])
+
+    with pytest.raises(BlockValidationError):
+        BlockChain(blockchain.chain[0]).append_blocks(blockchain.chain[1:] + [close])
+
+    assert other.import_blocks(stream) == 3
+    assert other.last_block.hash == blockchain.last_block.hash
+
+    with pytest.raises(ValueError):
+        list(read_block_records(BytesIO(next(blockchain.export_blocks())[:-1])))
+
+
+def test_append_blocks():
+    """Test the validation of a batch of blocks"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    blockchain = BlockChain.new_cryptocurrency(Wallet(key).public, 100, timestamp=datetime(2000, 1, 1))
+    other = BlockChain(blockchain.last_block)
+    other.amount_mining = 100
+
+    for chain in [blockchain, other]:
+        chain.difficulty_interval = 2
+        chain.block_interval = 10 ** 6
+
+    for step in range(5):
+        if step == 1:
+            assert blockchain.add_transaction(key, 'b5e2', 10)
+
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.mining_candidate(maximum_iter=10 ** 5)
+
+    # The difficulty is increased every two blocks after the first ones
+    assert [block.difficulty for block in blockchain.chain] == [0, 0, 0, 0, 1, 1]
+
+    assert other.append_blocks(blockchain.chain[1:], workers=2) == 5
+    assert other.last_block is blockchain.last_block
+    assert other.is_valid
+    assert other.get_unspent_list().address_amount('a4f1') == 500
+    assert other.get_unspent_list().address_amount('b5e2') == 10
+
+    # The whole batch is rejected with the height of the invalid block
+    other = BlockChain(blockchain.chain[0])
+    other.difficulty_interval = 2
+    other.block_interval = 10 ** 6
+    invalid = Block(blockchain.chain[2], [Transaction(datetime(2000, 1, 4), OutputTransaction('a4f1', 100)),
+                                          blockchain.chain[2].data[0]], timestamp=datetime(2000, 1, 4))
+    invalid.mining(maximum_iter=10 ** 5)
+
+    with pytest.raises(BlockValidationError) as error:
+        other.append_blocks(blockchain.chain[1:3] + [invalid])
+
+    assert error.value.height == 3
+    assert other.num_blocks == 1
+    assert other.get_unspent_list().address_amount('a4f1') == 0
+
+    with pytest.raises(BlockValidationError) as error:
+        other.append_blocks([blockchain.chain[1], blockchain.chain[3]])
+
+    assert error.value.height == 2
+    assert other.append_blocks(blockchain.chain[1:3]) == 2
+
+
+def test_append_blocks_rollback():
+    """Test that a rejected batch does not change the chain or the unconfirmed transactions"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    blockchain = BlockChain.new_cryptocurrency(Wallet(key).public, 100, timestamp=datetime(2000, 1, 1))
+
+    assert blockchain.add_transaction(key, 'b5e2', 10)
+    pending = blockchain.get_unspent_list().unconfirmed[0]
+
+    # The batch is longer than the undo data kept by the chain
+    for step in range(BlockChain.UNDO_DEPTH + 1):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2) + timedelta(minutes=step))
+        assert blockchain.candidate_proof(0)
+
+    for blocks in [blockchain.chain[1:3], blockchain.chain[1:]]:
+        invalid = Block(blocks[-1], [Transaction([InputTransaction('00' * 32, 0)], OutputTransaction('a4f1', 100))],
+                        timestamp=datetime(2000, 1, 3))
+        other = BlockChain(blockchain.chain[0])
+        other.amount_mining = 100
+
+        with pytest.raises(BlockValidationError) as error:
+            other.append_blocks(blocks + [invalid])
+
+        assert error.value.height == len(blocks) + 1
+        assert other.get_unspent_list().unconfirmed == []
+
+        # The previous unconfirmed transactions are kept, the ones of the blocks are not added
+        assert other.get_unspent_list().append_unconfirmed(pending)
+
+        with pytest.raises(BlockValidationError):
+            other.append_blocks(blocks + [invalid])
+
+        assert other.get_unspent_list().unconfirmed == [pending]
+        assert other.get_unspent_list().address_amount('a4f1') == 0
+        assert other.append_blocks(blocks) == len(blocks)
+        assert other.get_unspent_list().unconfirmed == []
+
+
+def test_next_difficulty():
+    """Test the difficulty schedule"""
+
+    blockchain = BlockChain(Block.genesis_block(timestamp=datetime(2000, 1, 1), difficulty=1, mining=True))
+    blockchain.difficulty_interval = 1
+
+    # The interval between the blocks is the expected one
+    blockchain.block_interval = 24 * 60 * 60
+    assert blockchain.add_candidate(None, timestamp=datetime(2000, 1, 2))
+    assert blockchain.mining_candidate()
+
+    assert blockchain.next_difficulty() == 1
+
+    blockchain.block_interval = 60
+    assert blockchain.next_difficulty() == 0
+
+    blockchain.block_interval = 10 ** 6
+    assert blockchain.next_difficulty() == 2
+
+
+def test_concurrent_readers():
+    """Test the snapshots read while other thread mines"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1), difficulty=4,
+                                               mining=True)
+    snapshot = blockchain.snapshot()
+
+    assert snapshot is blockchain.snapshot()
+    assert snapshot.height == 1
+    assert snapshot.balance('55d83bb9') == 100
+    assert snapshot.block(-1) is blockchain.last_block
+
+    errors = []
+
+    def mine():
+        for step in range(10):
+            blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+            blockchain.mining_candidate(maximum_iter=10 ** 5)
+
+    def read():
+        while miner.is_alive():
+            value = blockchain.snapshot()
+
+            # The state of a snapshot is consistent
+            if value.balance('55d83bb9') + value.balance('a4f1') != 100 * value.height or \
+                    value.block(-1) is not value.last_block:
+                errors.append(value)
+
+    miner = threading.Thread(target=mine)
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    miner.start()
+
+    for reader in readers:
+        reader.start()
+
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    assert blockchain.num_blocks == 11
+    assert blockchain.snapshot().balance('a4f1') == 1000
+
+    # The old snapshots are not modified
+    assert snapshot.height == 1
+    assert snapshot.balance('a4f1') == 0
+
+    # The lock is free while the candidate is mined
+    assert blockchain.add_candidate(None, timestamp=datetime(2000, 2, 1))
+    blockchain.candidate_block.difficulty = 64
+
+    miner = threading.Thread(target=blockchain.mining_candidate, kwargs={'maximum_iter': 10 ** 5})
+    miner.start()
+
+    assert blockchain.lock.acquire(timeout=1)
+    blockchain.lock.release()
+    miner.join()
+
+
+def test_snapshot_changes():
+    """Test that the snapshots keep their state while the chain changes"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1))
+    first = blockchain.snapshot()
+    blocks = []
+
+    for step in range(ChainSnapshot.MERGE_DEPTH + 10):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2) + timedelta(minutes=step))
+        assert blockchain.candidate_proof(0)
+        blocks.append(blockchain.snapshot())
+
+    # The balances changed by each block are merged with the previous ones
+    for height, snapshot in enumerate(blocks, 2):
+        assert snapshot.height == height
+        assert snapshot.balance('a4f1') == 100 * (height - 1)
+        assert snapshot.balance('55d83bb9') == 100
+
+    assert first.balance('a4f1') == 0
+    assert first.block(-1) is blockchain.chain[0]
+
+    # The blocks removed by a reorganization are kept for the previous snapshots
+    other = BlockChain(blockchain.chain[0])
+    other.amount_mining = 100
+
+    for step in range(len(blocks) + 1):
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 2) + timedelta(minutes=step))
+        assert other.candidate_proof(0)
+
+    removed = blockchain.chain[1]
+
+    assert blockchain.replace_chain(other)
+    assert blocks[0].block(1) is removed
+    assert blocks[-1].block(-1) is blocks[-1].last_block
+    assert blockchain.snapshot().block(1) is other.chain[1]
+    assert blockchain.snapshot().balance('b5e2') == 100 * (len(blocks) + 1)
+    assert blockchain.snapshot().balance('a4f1') == 0
+
+
+def test_snapshot_unspent_changes():
+    """Test the snapshot after changes made directly to the unspent list"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    blockchain = BlockChain.new_cryptocurrency(Wallet(key).public, 100, timestamp=datetime(2000, 1, 1))
+    wallet = blockchain.get_wallet(key)
+    unspent = blockchain.get_unspent_list()
+
+    assert wallet.get_balance() == 100
+
+    # The changes of the list are published on the next read
+    assert unspent.append_unconfirmed(wallet.generate_transaction_to('b5e2', 30))
+    assert wallet.get_balance() == unspent.address_amount(wallet.public) == 0
+
+    unspent.confirm_unconfirmed()
+
+    assert wallet.get_balance() == unspent.address_amount(wallet.public) == 70
+    assert blockchain.snapshot().balance('b5e2') == 30
+
+
+def test_lock_free_reads():
+    """Test the readers while a writer holds the lock"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    blockchain = BlockChain.new_cryptocurrency(Wallet(key).public, 100, timestamp=datetime(2000, 1, 1))
+    wallet = blockchain.get_wallet(key)
+
+    # The amount spent by the unconfirmed transactions is not available
+    assert blockchain.add_transaction(key, 'b5e2', 10)
+    assert wallet.get_balance() == 0
+    assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2))
+    assert blockchain.candidate_proof(0)
+
+    block = blockchain.last_block
+    transaction = block.data[0]
+    assert blockchain.get_block(block.hash) is block
+    assert blockchain.is_valid
+
+    results = []
+
+    def read():
+        results.append((blockchain.get_block(block.hash) is block,
+                        blockchain.get_transaction(transaction.hash_id) is transaction,
+                        blockchain.transaction_proof(transaction.hash_id)[0] == block.hash,
+                        blockchain.is_valid,
+                        wallet.get_balance(),
+                        blockchain.snapshot().balance('b5e2')))
+
+    with blockchain.lock:
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(5)
+
+        assert not reader.is_alive()
+
+    assert results == [(True, True, True, True, 90, 10)]
+
+
+def test_mining_candidate_async():
+    """Test the mining of the candidate in the event loop"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1), difficulty=4,
+                                               mining=True)
+
+    with ThreadPoolExecutor(2) as executor:
+        assert run(blockchain.mining_candidate_async()) is False
+
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2))
+        assert run(blockchain.mining_candidate_async(maximum_iter=10 ** 5, executor=executor, chunk_size=256))
+        assert blockchain.num_blocks == 2
+        assert blockchain.is_valid
+
+        # A competing block stops the mining of the candidate
+        other = BlockChain(blockchain.chain[0])
+        other.amount_mining = 100
+        assert other.append_blocks(blockchain.chain[1:]) == 1
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 3))
+        assert other.mining_candidate(maximum_iter=10 ** 5)
+
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 3))
+        blockchain.candidate_block.difficulty = 64
+        tried = []
+
+        async def compete():
+            task = asyncio.ensure_future(blockchain.mining_candidate_async(
+                maximum_iter=10 ** 6, executor=executor, chunk_size=100, progress=lambda done, _: tried.append(done)))
+
+            while not tried:
+                await asyncio.sleep(0.001)
+
+            assert blockchain.add_block(other.last_block)
+
+            return await task
+
+        assert run(compete()) is False
+        assert blockchain.last_block is other.last_block
+        assert 0 < tried[-1] < 10 ** 5
+
+
+def test_append_blocks_async():
+    """Test the validation of a batch of blocks in the event loop"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    blockchain = BlockChain.new_cryptocurrency(Wallet(key).public, 100, timestamp=datetime(2000, 1, 1))
+
+    for step in range(4):
+        if step == 1:
+            assert blockchain.add_transaction(key, 'b5e2', 10)
+
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.mining_candidate(maximum_iter=10 ** 5)
+
+    steps = []
+    other = BlockChain(blockchain.chain[0])
+    other.amount_mining = 100
+
+    with ThreadPoolExecutor(2) as executor:
+        assert run(other.append_blocks_async(blockchain.chain[1:], executor=executor, chunk_size=3,
+                                             progress=lambda done, total: steps.append(done))) == 4
+
+        assert steps == [3, 4]
+        assert other.last_block is blockchain.last_block
+        assert other.get_unspent_list().address_amount('b5e2') == 10
+
+        # The height of the invalid block is reported
+        invalid = copy(blockchain.chain[2])
+        invalid.hash = 'f' * 64
+        other = BlockChain(blockchain.chain[0])
+
+        with pytest.raises(BlockValidationError) as error:
+            run(other.append_blocks_async([blockchain.chain[1], invalid], executor=executor))
+
+        assert error.value.height == 2
+        assert other.num_blocks == 1
+
+    # The legacy blocks are hashed in this process and validated by the default pool
+    blockchain = BlockChain.new_cryptocurrency(Wallet(key).public, 100, timestamp=datetime(2000, 1, 1),
+                                               version=Block.LEGACY_VERSION)
+
+    for step in range(2):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.candidate_proof(0)
+
+    other = BlockChain(blockchain.chain[0])
+    other.amount_mining = 100
+
+    assert run(other.append_blocks_async(blockchain.chain[1:], workers=2)) == 2
+    assert other.last_block is blockchain.last_block
+    assert other.get_unspent_list().address_amount('a4f1') == 200
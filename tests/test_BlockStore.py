@@ -0,0 +1,274 @@
+"""Tests for the Merkle tree functions"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+import sys
+
+from datetime import datetime
+from datetime import timedelta
+from os.path import join
+
+from pytest import raises
+
+from minimalcryptocurrency import Block
+from minimalcryptocurrency import BlockChain
+from minimalcryptocurrency import BlockStore
+from minimalcryptocurrency import Wallet
+
+
+def test_block_store(tmpdir):
+    """Test the storage of blocks on disk"""
+
+    path = str(tmpdir)
+    blocks = [Block.genesis_block('Genesis', timestamp=1)]
+
+    for step in range(1, 5):
+        blocks.append(Block(blocks[-1], 'Block %d' % step, timestamp=step + 1))
+
+    store = BlockStore(path)
+    store.extend(blocks)
+
+    assert len(store) == 5
+    assert store[-1].hash == blocks[-1].hash
+    store.close()
+
+    # The blocks are read from the disk
+    store = BlockStore(path)
+
+    assert len(store) == 5
+    assert [block.hash for block in store] == [block.hash for block in blocks]
+    assert [block.data for block in store[1:3]] == ['Block 1', 'Block 2']
+    assert store.view(2).follows(store.view(1))
+
+    with raises(IndexError):
+        store[5]
+
+    # Only the last blocks can be removed
+    with raises(ValueError):
+        del store[1:2]
+
+    del store[3:]
+
+    assert len(store) == 3
+    store.append(blocks[3])
+    store.close()
+
+    # The records partially written are discarded
+    with open(join(path, BlockStore.LOG_FILE), 'ab') as log:
+        log.write(b'\xff\xff')
+
+    with open(join(path, BlockStore.INDEX_FILE), 'ab') as index:
+        index.write(b'\x00\x01\x00\x00\x00\x00\x00\x00\x00')
+
+    store = BlockStore(path)
+
+    assert len(store) == 4
+    assert store[3].hash == blocks[3].hash
+    store.append(blocks[4])
+    assert store[4].data == 'Block 4'
+    store.close()
+
+
+def test_open_blockchain(tmpdir):
+    """Test a blockchain stored on disk"""
+
+    path = str(tmpdir)
+    wallet_1 = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+    wallet_2 = Wallet('7d6433bcc63f973580dc7562d2ca79fcb12bb4e08c7e7333')
+
+    blockchain = BlockChain.new_cryptocurrency(wallet_1.public, 100, timestamp=datetime(2000, 1, 1, 0, 0, 0),
+                                               difficulty=4, mining=True, store=BlockStore(path))
+
+    assert blockchain.add_transaction(wallet_1.private, wallet_2.public, 10)
+    assert blockchain.generate_candidate(wallet_2.public, timestamp=datetime(2000, 1, 1, 0, 1, 0))
+    assert blockchain.mining_candidate()
+    blockchain.chain.close()
+
+    # The blocks and the balances are recovered
+    blockchain = BlockChain.open(path)
+
+    assert blockchain.num_blocks == 2
+    assert blockchain.amount_mining == 100
+    assert blockchain.is_valid
+    assert blockchain.revalidate(full=True)
+    assert blockchain.get_wallet(wallet_1.private).get_balance() == 90
+    assert blockchain.get_wallet(wallet_2.private).get_balance() == 110
+
+    # The new blocks are appended to the store
+    assert blockchain.generate_candidate(wallet_1.public, timestamp=datetime(2000, 1, 1, 0, 2, 0))
+    assert blockchain.mining_candidate()
+    blockchain.chain.close()
+
+    assert BlockChain.open(path).num_blocks == 3
+
+    # An empty store requires the genesis block
+    store = BlockStore(join(path, 'empty'))
+
+    with raises(ValueError):
+        BlockChain(store=store)
+
+    assert len(store) == 0
+    store.close()
+
+    with raises(ValueError):
+        BlockChain.open(join(path, 'empty'))
+
+
+def test_store_lookups(tmpdir, monkeypatch):
+    """Test the lookups of a stored blockchain without decoding all the blocks"""
+
+    path = str(tmpdir)
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1),
+                                               store=BlockStore(path))
+
+    for step in range(20):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.candidate_proof(0)
+
+    blocks = list(blockchain.chain)
+    work = blockchain.chain_work()
+    blockchain.chain.close()
+
+    decoded = []
+    module = sys.modules[BlockStore.__module__]
+    decode_block = module.decode_block
+    monkeypatch.setattr(module, 'decode_block', lambda *args: decoded.append(args) or decode_block(*args))
+
+    blockchain = BlockChain(store=BlockStore(path))
+    del decoded[:]
+
+    # Only the blocks returned are decoded
+    assert blockchain.get_block(blocks[10].hash).hash == blocks[10].hash
+    assert blockchain.get_transaction_location(blocks[15].data[0].hash_id) == (15, 0)
+    assert blockchain.get_block('00') is None
+    assert blockchain.chain_work() == work
+    assert len(decoded) == 2
+
+
+def test_store_snapshot(tmpdir):
+    """Test the snapshots of a stored blockchain after a reorganization"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1),
+                                               store=BlockStore(str(tmpdir)))
+    other = BlockChain(blockchain.chain[0])
+    other.amount_mining = 100
+
+    for step in range(2):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.candidate_proof(0)
+
+    for step in range(3):
+        assert other.generate_candidate('b5e2', timestamp=datetime(2000, 1, 2 + step))
+        assert other.candidate_proof(0)
+
+    snapshot = blockchain.snapshot()
+    removed = [block.hash for block in blockchain.chain[1:]]
+    previous = blockchain.snapshot()
+
+    for block in other.chain[1:]:
+        assert blockchain.add_block(block)
+
+    # The store is truncated, the snapshot keeps the removed blocks
+    assert blockchain.last_block.hash == other.last_block.hash
+    assert [snapshot.block(height).hash for height in range(1, 3)] == removed
+    assert snapshot.balance('a4f1') == 200
+    assert snapshot.chain_work == 3
+    assert previous.chain_work == 3
+    assert blockchain.snapshot().chain_work == blockchain.chain_work() == 4
+    assert blockchain.snapshot().block(2).hash == other.chain[2].hash
+    assert blockchain.snapshot().balance('a4f1') == 0
+
+
+def test_open_reads(tmpdir, monkeypatch):
+    """Test that opening a stored blockchain does not read all its blocks"""
+
+    path = str(tmpdir)
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1),
+                                               store=BlockStore(path))
+
+    for step in range(50):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2) + timedelta(days=step))
+        assert blockchain.candidate_proof(0)
+
+    work = blockchain.chain_work()
+    blockchain.chain.close()
+
+    reads = []
+    read = BlockStore.read
+    monkeypatch.setattr(BlockStore, 'read', lambda store, height: reads.append(height) or read(store, height))
+
+    blockchain = BlockChain.open(path)
+
+    assert blockchain.num_blocks == 51
+    assert len(reads) <= 3
+
+    # The work is read where it is requested
+    snapshot = blockchain.snapshot()
+    del reads[:]
+
+    assert snapshot.chain_work == work
+    assert len(reads) == 51
+    blockchain.chain.close()
+
+
+def test_unspent_snapshot(tmpdir):
+    """Test the snapshot of the unspent transactions of a blockchain"""
+
+    path = str(tmpdir)
+    wallet_1 = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+    wallet_2 = Wallet('7d6433bcc63f973580dc7562d2ca79fcb12bb4e08c7e7333')
+
+    blockchain = BlockChain.new_cryptocurrency(wallet_1.public, 100, timestamp=datetime(2000, 1, 1, 0, 0, 0),
+                                               store=BlockStore(path))
+    blockchain.chain.close()
+
+    blockchain = BlockChain.open(path)
+    blockchain.save_snapshot()
+
+    assert blockchain.add_transaction(wallet_1.private, wallet_2.public, 10)
+    assert blockchain.generate_candidate(wallet_2.public, timestamp=datetime(2000, 1, 1, 0, 1, 0))
+    assert blockchain.candidate_proof(0)
+    blockchain.chain.close()
+
+    # The blocks after the snapshot are applied
+    blockchain = BlockChain.open(path)
+
+    assert blockchain.load_snapshot()
+    assert blockchain.get_wallet(wallet_1.private).get_balance() == 90
+    assert blockchain.get_wallet(wallet_2.private).get_balance() == 110
+
+    # The snapshot of other chain is not used
+    other = BlockChain.new_cryptocurrency(wallet_2.public, 100, timestamp=datetime(2000, 1, 1, 0, 0, 0))
+
+    assert not other.load_snapshot(blockchain.snapshot_path)
+    assert not other.load_snapshot(join(path, 'missing.dat'))
+
+    # A file is required where the blockchain has no snapshot path
+    with raises(ValueError):
+        other.save_snapshot()
+
+    with raises(ValueError):
+        other.load_snapshot()
+
+    other.save_snapshot(join(path, 'other.dat'))
+
+    assert other.load_snapshot(join(path, 'other.dat'))
+    blockchain.chain.close()
@@ -0,0 +1,143 @@
+"""Tests for the Merkle tree functions"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+from datetime import datetime
+
+import pytest
+
+from minimalcryptocurrency import Block
+from minimalcryptocurrency import BlockChain
+from minimalcryptocurrency import BlockHeader
+from minimalcryptocurrency import HeaderChain
+
+
+def test_block_header():
+    """Test the header of a block"""
+
+    block = Block.genesis_block('Genesis', timestamp=datetime(2000, 1, 1), difficulty=4, mining=True,
+                                version=Block.HEADER_VERSION)
+    header = BlockHeader.from_block(block)
+
+    assert header.hash == block.hash
+    assert header.index == 0
+    assert header.previous_hash is None
+    assert header.timestamp == block.timestamp
+    assert header.merkle_root == block.merkle_root
+    assert header.proof == block.proof
+    assert header.work == block.work
+    assert header.is_valid
+
+    # The header of a legacy block cannot be validated
+    assert not BlockHeader.from_block(Block.genesis_block('Genesis', timestamp=datetime(2000, 1, 1))).is_valid
+
+
+def test_header_chain():
+    """Test the validation of a chain of headers"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1), difficulty=4,
+                                               mining=True)
+
+    for step in range(3):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.mining_candidate()
+
+    chain = HeaderChain(blockchain.chain[0].header)
+
+    assert chain.add_headers(block.header for block in blockchain.chain[1:]) == 3
+    assert chain.num_headers == 4
+    assert chain.last_header.hash == blockchain.last_block.hash
+    assert chain.chain_work == blockchain.chain_work()
+    assert chain.get_header(blockchain.chain[2].hash).index == 2
+    assert chain.get_header('00' * 32) is None
+
+    # The headers must follow the last one and satisfy the difficulty
+    assert not chain.add_header(blockchain.chain[2])
+
+    block = Block(blockchain.last_block, None, timestamp=datetime(2000, 1, 6))
+
+    while block.is_valid:
+        block.proof += 1
+
+    assert not chain.add_header(block)
+
+    with pytest.raises(ValueError):
+        HeaderChain(blockchain.chain[1])
+
+
+def test_header_difficulty():
+    """Test the difficulty and the interval of the headers"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1), difficulty=1,
+                                               mining=True)
+    blockchain.difficulty_interval = 2
+    blockchain.block_interval = 2 * 24 * 3600
+
+    for step in range(4):
+        assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2 + step))
+        assert blockchain.mining_candidate(maximum_iter=10 ** 5)
+
+    assert blockchain.last_block.difficulty == 2
+
+    # The difficulty is updated with the parameters of the blockchain
+    chain = HeaderChain(blockchain.chain[0])
+
+    assert chain.add_headers(blockchain.chain[1:]) == 3
+
+    chain.difficulty_interval = blockchain.difficulty_interval
+    chain.block_interval = blockchain.block_interval
+
+    assert chain.add_header(blockchain.chain[4])
+
+    # A forged header with a lower difficulty is rejected
+    chain = HeaderChain(blockchain.chain[0])
+    forged = Block(blockchain.chain[0], None, timestamp=datetime(2000, 1, 2))
+    forged.difficulty = 0
+
+    assert not chain.add_header(forged)
+
+    # The headers too close to the previous one are rejected
+    close = Block(blockchain.chain[0], None, timestamp=datetime(2000, 1, 1, 0, 0, 30))
+    close.mining(maximum_iter=10 ** 5)
+
+    assert close.is_valid
+    assert not chain.add_header(close)
+    assert chain.add_header(blockchain.chain[1])
+
+
+def test_transaction_proof():
+    """Test the proof of inclusion of a transaction"""
+
+    blockchain = BlockChain.new_cryptocurrency('55d83bb9', 100, timestamp=datetime(2000, 1, 1))
+
+    assert blockchain.generate_candidate('a4f1', timestamp=datetime(2000, 1, 2))
+    assert blockchain.candidate_proof(0)
+
+    chain = HeaderChain(blockchain.chain[0])
+    chain.add_header(blockchain.chain[1])
+
+    transaction = blockchain.last_block.data[0]
+    block_hash, position, proof = blockchain.transaction_proof(transaction.hash_id)
+
+    assert block_hash == blockchain.last_block.hash
+    assert chain.verify_transaction(transaction.hash_id, block_hash, position, proof)
+    assert not chain.verify_transaction(blockchain.chain[0].data[0].hash_id, block_hash, position, proof)
+    assert blockchain.transaction_proof('00' * 32) is None
@@ -58,6 +58,17 @@ def test_unspent_transaction():
     assert unspent.address == account
     assert unspent.amount == 12
 
+    # The unspent transactions are indexed by the output
+    assert unspent.outpoint == ('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4', 5)
+    assert unspent in {UnspentTransaction(unspent.hash_id, 5, account, 12)}
+    assert hash(unspent) == hash(InputTransaction(unspent.hash_id, 5))
+
+    unspent_list = UnspentList()
+
+    assert unspent_list.add_unspent(unspent)
+    assert unspent_list.add_unspent(unspent) is False
+    assert unspent_list.unspent[unspent.outpoint] is unspent
+
 
 def test_basic_transaction():
     """"Test basic transactions"""
@@ -75,11 +86,11 @@ def test_basic_transaction():
     unspent = UnspentList()
 
     # Assign 10 coins to user 1
-    unspent.unspent.append(
+    unspent.add_unspent(
         UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4', 0, public_1, 10))
 
     # Assign 10 coins to user 2
-    unspent.unspent.append(
+    unspent.add_unspent(
         UnspentTransaction('fa34b15a4eb8e91ebeff64edba51d21905e1ac8ce2bff8865da08055bced0dd4', 0, public_2, 10))
 
     # Validate users amount
@@ -135,11 +146,11 @@ def test_multiple_transaction():
     unspent = UnspentList()
 
     # Assign 10 coins to user 1
-    unspent.unspent.append(
+    unspent.add_unspent(
         UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4', 0, public_1, 10))
 
     # Assign 10 coins to user 2
-    unspent.unspent.append(
+    unspent.add_unspent(
         UnspentTransaction('fa34b15a4eb8e91ebeff64edba51d21905e1ac8ce2bff8865da08055bced0dd4', 0, public_2, 10))
 
     # Validate users amount
@@ -245,3 +256,45 @@ def test_multiple_transaction():
     assert unspent.address_amount(public_1) == 8
     assert unspent.address_amount(public_2) == 6
     assert unspent.address_amount(public_3) == 6
+
+
+def test_address_index():
+    """Test the balances and transactions by address"""
+
+    private_1 = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    public_1 = generate_public_key(private_1)
+    public_2 = generate_public_key('7d6433bcc63f973580dc7562d2ca79fcb12bb4e08c7e7333')
+
+    unspent = UnspentList()
+
+    for index in range(10):
+        unspent.add_unspent(UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4',
+                                               index, public_1, 0.1))
+
+    # The balance has not rounding errors
+    assert unspent.address_amount(public_1) == 1
+    assert len(unspent.address_transactions(public_1)) == 10
+    assert unspent.address_transactions(public_2) == []
+
+    # The unconfirmed transactions are discounted
+    inputs = [InputTransaction(transaction.hash_id, transaction.index)
+              for transaction in unspent.address_transactions(public_1)[:5]]
+    transaction = Transaction(inputs, OutputTransaction(public_2, 0.5), private_1)
+
+    assert unspent.append_unconfirmed(transaction)
+    assert unspent.address_amount(public_1) == 0.5
+    assert unspent.address_amount(public_2) == 0
+    assert len(unspent.address_transactions(public_1)) == 5
+
+    # Confirm the transaction
+    assert unspent.confirm_unconfirmed()
+    assert unspent.address_amount(public_1) == 0.5
+    assert unspent.address_amount(public_2) == 0.5
+
+    # Remove all the transactions of an address
+    for transaction in unspent.address_transactions(public_2):
+        assert unspent.remove_unspent(transaction.outpoint) is transaction
+
+    assert unspent.remove_unspent(transaction.outpoint) is None
+    assert unspent.address_amount(public_2) == 0
+    assert unspent.address_transactions(public_2) == []
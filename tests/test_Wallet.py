@@ -67,8 +67,8 @@ def test_wallet_operation():
     unspent = UnspentList()
 
     # Assign 100 coins to the wallet #1
-    unspent.unspent.append(UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4',
-                                              0, wallet_1.get_account(), 100))
+    unspent.add_unspent(UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4',
+                                           0, wallet_1.get_account(), 100))
 
     assert unspent.address_amount(wallet_1.get_account()) == 100
     assert unspent.address_amount(wallet_2.get_account()) == 0
@@ -0,0 +1,81 @@
+"""Tests for the cryptography backends"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+import pytest
+
+from minimalcryptocurrency import available_backends
+from minimalcryptocurrency import generate_public_key
+from minimalcryptocurrency import get_backend
+from minimalcryptocurrency import is_signature_valid
+from minimalcryptocurrency import set_backend
+from minimalcryptocurrency import signature
+from minimalcryptocurrency.backends import EcdsaBackend
+from minimalcryptocurrency.backends import create_backend
+
+
+def test_ecdsa_backend():
+    """Test the default backend"""
+
+    assert 'ecdsa' in available_backends()
+    assert isinstance(get_backend(), EcdsaBackend)
+
+    with pytest.raises(ValueError):
+        create_backend('unknown')
+
+
+def test_cryptography_backend():
+    """Test the backend based on the cryptography package"""
+
+    pytest.importorskip('cryptography')
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    public_key = '55d83bb921c148822bfe7057604bf3bb6d499976ea1054943f91c9caf28f2717bfcdf5e5b8c1fc0d18d510691765506c'
+    ecdsa = create_backend('ecdsa')
+    native = create_backend('cryptography')
+
+    assert 'cryptography' in available_backends()
+
+    # The public keys are the same
+    assert native.public_key(native.load_signing_key(bytes.fromhex(key))).hex() == public_key
+    assert native.load_verifying_key(bytes.fromhex(key + key)) is None
+
+    # The signatures are interoperable
+    message = b'First'
+    verifying_keys = [backend.load_verifying_key(bytes.fromhex(public_key)) for backend in (ecdsa, native)]
+
+    for backend in (ecdsa, native):
+        backend_signature = backend.sign(backend.load_signing_key(bytes.fromhex(key)), message)
+
+        assert ecdsa.verify(verifying_keys[0], backend_signature, message)
+        assert native.verify(verifying_keys[1], backend_signature, message)
+        assert native.verify(verifying_keys[1], backend_signature, b'Other') is False
+        assert native.verify(verifying_keys[1], b'', message) is False
+
+    # Use the backend in the package functions
+    set_backend('cryptography')
+
+    try:
+        assert generate_public_key(key) == public_key
+        assert is_signature_valid('Native', signature('Native', key), public_key)
+        assert is_signature_valid('Other', signature('Native', key), public_key) is False
+    finally:
+        set_backend('ecdsa')
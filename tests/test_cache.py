@@ -0,0 +1,59 @@
+"""Tests for the LRUCache object"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+from minimalcryptocurrency.cache import LRUCache
+
+
+def test_lru_cache():
+    """Test the eviction of the least recently used values"""
+
+    cache = LRUCache(2)
+
+    cache.put('a', 1)
+    cache.put('b', 2)
+
+    assert cache.get('a') == 1
+
+    # The least recently used value is removed
+    cache.put('c', 3)
+
+    assert 'b' not in cache
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.info() == (2, 1, 2, 2)
+
+    # Reduce the size of the cache
+    cache.resize(1)
+
+    assert len(cache) == 1
+    assert 'c' in cache
+    assert cache.pop('c') == 3
+
+    # Disable the cache
+    cache.resize(0)
+    cache.put('a', 1)
+
+    assert len(cache) == 0
+
+    cache.clear()
+
+    assert cache.info() == (0, 0, 0, 0)
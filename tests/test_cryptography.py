@@ -20,9 +20,22 @@
 #
 
 
+from concurrent.futures import ThreadPoolExecutor
+
+from minimalcryptocurrency import clear_key_cache
+from minimalcryptocurrency import clear_signature_cache
 from minimalcryptocurrency import generate_public_key
 from minimalcryptocurrency import is_signature_valid
+from minimalcryptocurrency import key_cache_info
+from minimalcryptocurrency import precompute_key
+from minimalcryptocurrency import set_key_cache_size
+from minimalcryptocurrency import set_signature_cache_size
 from minimalcryptocurrency import signature
+from minimalcryptocurrency import signature_cache_info
+from minimalcryptocurrency import verify_signatures
+from minimalcryptocurrency import verify_signatures_async
+
+from tests.helpers import run
 
 
 def test_generate_public_key():
@@ -65,3 +78,104 @@ def test_signature():
     assert is_signature_valid('Other',
                               signature('Other', 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'),
                               'd2d74e5f661d84ee5ecee5087aeeefe364686e7cb3561ebf5fa33f92930d2add2ff5f6c468a94950e63c38e92900ee27') is False
+
+
+def test_verify_signatures():
+    """Test the validation of signatures in a pool of processes"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    public_key = generate_public_key(key)
+
+    signatures = [('First', signature('First', key), public_key),
+                  ('Other', signature('Second', key), public_key),
+                  ('Second', signature('Second', key), public_key)]
+
+    assert verify_signatures(signatures, workers=2) == [True, False, True]
+    assert verify_signatures(signatures, workers=1) == [True, False, True]
+    assert verify_signatures([], workers=2) == []
+
+
+def test_verify_signatures_async():
+    """Test the validation of signatures in the event loop"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    public_key = generate_public_key(key)
+
+    signatures = [('First', signature('First', key), public_key),
+                  ('Other', signature('Second', key), public_key),
+                  ('Second', signature('Second', key), public_key)]
+    steps = []
+
+    clear_signature_cache()
+
+    with ThreadPoolExecutor(2) as executor:
+        assert run(verify_signatures_async(signatures, executor=executor, chunk_size=2,
+                                           progress=lambda done, total: steps.append(done))) == \
+            [True, False, True]
+
+    assert steps == [2, 3]
+    assert run(verify_signatures_async(signatures, workers=2)) == [True, False, True]
+    assert run(verify_signatures_async([])) == []
+
+
+def test_signature_cache():
+    """Test the cache of validated signatures"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+    public_key = generate_public_key(key)
+    message_signature = signature('First', key)
+
+    clear_signature_cache()
+
+    assert is_signature_valid('First', message_signature, public_key)
+    assert is_signature_valid('First', message_signature, public_key)
+    assert is_signature_valid('Other', message_signature, public_key) is False
+    assert is_signature_valid('Other', message_signature, public_key) is False
+
+    info = signature_cache_info()
+
+    assert info.hits == 2
+    assert info.misses == 2
+    assert info.currsize == 2
+
+    # The results of the pool are stored in the cache
+    assert verify_signatures([('First', message_signature, public_key),
+                              ('Second', message_signature, public_key)], workers=2) == [True, False]
+    assert signature_cache_info().currsize == 3
+
+    # Reduce the cache
+    set_signature_cache_size(1)
+
+    assert signature_cache_info().currsize == 1
+
+    set_signature_cache_size(65536)
+    clear_signature_cache()
+
+
+def test_key_cache():
+    """Test the cache of parsed keys"""
+
+    key = 'aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518'
+
+    clear_key_cache()
+    clear_signature_cache()
+
+    public_key = generate_public_key(key)
+
+    assert generate_public_key(key) == public_key
+    assert key_cache_info().hits == 1
+
+    # Sign and validate with the cached keys
+    precompute_key(public_key)
+
+    assert is_signature_valid('First', signature('First', key), public_key)
+    assert is_signature_valid('Second', signature('Second', key), public_key)
+    assert key_cache_info().currsize == 2
+
+    # Disable the cache
+    set_key_cache_size(0)
+
+    assert key_cache_info().currsize == 0
+    assert generate_public_key(key) == public_key
+
+    set_key_cache_size(1024)
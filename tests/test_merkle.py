@@ -0,0 +1,77 @@
+"""Tests for the Merkle tree functions"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+from hashlib import sha256
+
+import pytest
+
+from minimalcryptocurrency import OutputTransaction
+from minimalcryptocurrency import Transaction
+from minimalcryptocurrency import merkle_leaves
+from minimalcryptocurrency import merkle_proof
+from minimalcryptocurrency import merkle_root
+from minimalcryptocurrency import verify_merkle_proof
+
+
+def test_merkle_leaves():
+    """Test the leaves for the data of a block"""
+
+    transaction = Transaction(None, OutputTransaction('55d83bb9', 10))
+
+    assert merkle_leaves(None) == []
+    assert merkle_leaves('Data') == [sha256(b"'Data'").digest()]
+    assert merkle_leaves([transaction]) == [bytes.fromhex(transaction.hash_id)]
+
+
+def test_merkle_root():
+    """Test the root of a Merkle tree"""
+
+    leaves = [sha256(value).digest() for value in [b'a', b'b', b'c']]
+
+    assert merkle_root([]) == bytes(32)
+    assert merkle_root(leaves[:1]) == leaves[0]
+    assert merkle_root(leaves[:2]) == sha256(leaves[0] + leaves[1]).digest()
+
+    # The last node is duplicated in odd levels
+    left = sha256(leaves[0] + leaves[1]).digest()
+    right = sha256(leaves[2] + leaves[2]).digest()
+
+    assert merkle_root(leaves) == sha256(left + right).digest()
+
+
+def test_merkle_proof():
+    """Test the proofs of inclusion in a Merkle tree"""
+
+    for size in range(1, 8):
+        leaves = [sha256(bytes([value])).digest() for value in range(size)]
+        root = merkle_root(leaves)
+
+        for position in range(size):
+            proof = merkle_proof(leaves, position)
+
+            assert verify_merkle_proof(leaves[position], position, proof, root)
+
+    leaves = [sha256(value).digest() for value in [b'a', b'b', b'c']]
+
+    assert not verify_merkle_proof(leaves[0], 0, merkle_proof(leaves, 1), merkle_root(leaves))
+
+    with pytest.raises(IndexError):
+        merkle_proof(leaves, 3)
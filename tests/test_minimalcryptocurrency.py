@@ -84,3 +84,77 @@ def test_minimal_cryptocurrency():
     assert wallet_1.get_balance() == 150
     assert wallet_2.get_balance() == 155
     assert wallet_3.get_balance() == 95
+
+
+def test_incremental_unspent():
+    """Test the update of the unspent list with the new blocks"""
+
+    wallet_1 = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+    wallet_2 = Wallet('7d6433bcc63f973580dc7562d2ca79fcb12bb4e08c7e7333')
+    wallet_3 = Wallet('3d66f0ea52a2c5cf42893560d5522e82621790edeb7f609b')
+
+    blockchain = BlockChain.new_cryptocurrency(wallet_1.public, 100, timestamp=datetime(2000, 1, 1, 0, 0, 0),
+                                               difficulty=4, mining=True)
+    wallet_1 = blockchain.get_wallet(wallet_1.private)
+    wallet_2 = blockchain.get_wallet(wallet_2.private)
+    wallet_3 = blockchain.get_wallet(wallet_3.private)
+    unspent = blockchain.get_unspent_list()
+
+    # A transaction in the block and other one in conflict with it
+    transaction = wallet_1.generate_transaction_to(wallet_3.public, 60)
+
+    assert blockchain.add_transaction(wallet_1.private, wallet_2.public, 10)
+    assert blockchain.add_candidate([transaction], timestamp=datetime(2000, 1, 1, 0, 1, 0))
+    assert blockchain.mining_candidate()
+
+    # The list is updated and the transaction in conflict is removed
+    assert blockchain.get_unspent_list() is unspent
+    assert unspent.unconfirmed == []
+    assert unspent.address_amount(wallet_1.public) == 40
+    assert unspent.address_amount(wallet_3.public) == 60
+
+    # A valid transaction is kept for the next block
+    assert blockchain.add_transaction(wallet_1.private, wallet_2.public, 10)
+    assert blockchain.add_candidate([], timestamp=datetime(2000, 1, 1, 0, 2, 0))
+    assert blockchain.mining_candidate()
+
+    assert len(unspent.unconfirmed) == 1
+
+    assert blockchain.generate_candidate(wallet_3.public, timestamp=datetime(2000, 1, 1, 0, 3, 0))
+    assert blockchain.mining_candidate()
+
+    assert blockchain.get_unspent_list() is unspent
+    assert unspent.unconfirmed == []
+    assert wallet_1.get_balance() == 30
+    assert wallet_2.get_balance() == 10
+    assert wallet_3.get_balance() == 160
+
+    # The rebuilt list has the same balances
+    unspent = blockchain.rebuild_unspent_list()
+
+    assert unspent.address_amount(wallet_1.public) == 30
+    assert unspent.address_amount(wallet_3.public) == 160
+
+
+def test_parallel_unspent():
+    """Test the rebuild of the unspent list validating signatures in parallel"""
+
+    wallet_1 = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+    wallet_2 = Wallet('7d6433bcc63f973580dc7562d2ca79fcb12bb4e08c7e7333')
+
+    blockchain = BlockChain.new_cryptocurrency(wallet_1.public, 100, timestamp=datetime(2000, 1, 1, 0, 0, 0),
+                                               difficulty=4, mining=True)
+
+    for minute in range(1, 4):
+        assert blockchain.add_transaction(wallet_1.private, wallet_2.public, 10)
+        assert blockchain.generate_candidate(wallet_2.public, timestamp=datetime(2000, 1, 1, 0, minute, 0))
+        assert blockchain.mining_candidate()
+
+    # The blocks without transactions are skipped
+    assert blockchain.add_candidate(None, timestamp=datetime(2000, 1, 1, 0, 4, 0))
+    assert blockchain.mining_candidate()
+
+    unspent = blockchain.rebuild_unspent_list(workers=2)
+
+    assert unspent.address_amount(wallet_1.public) == 70
+    assert unspent.address_amount(wallet_2.public) == 330
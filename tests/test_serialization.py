@@ -0,0 +1,191 @@
+"""Tests for the Merkle tree functions"""
+
+#
+#  Created by Daniel Rodriguez Perez.
+#
+#  Copyright (c) 2018 Daniel Rodriguez Perez.
+#
+#  This program is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program.  If not, see <http://www.gnu.org/licenses/>
+#
+
+
+from datetime import datetime
+from io import BytesIO
+
+from pytest import raises
+
+from minimalcryptocurrency import Block
+from minimalcryptocurrency import BlockView
+from minimalcryptocurrency import InputTransaction
+from minimalcryptocurrency import OutputTransaction
+from minimalcryptocurrency import Transaction
+from minimalcryptocurrency import UnspentList
+from minimalcryptocurrency import UnspentTransaction
+from minimalcryptocurrency import Wallet
+from minimalcryptocurrency import decode_block
+from minimalcryptocurrency import decode_transaction
+from minimalcryptocurrency import encode_block
+from minimalcryptocurrency import encode_transaction
+from minimalcryptocurrency import read_snapshot
+from minimalcryptocurrency import write_snapshot
+
+
+def test_transaction_serialization():
+    """Test the serialization of the transactions"""
+
+    wallet = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+
+    coinbase = Transaction(datetime(2000, 1, 1, 0, 0, 0), OutputTransaction(wallet.public, 100))
+    transaction = Transaction([InputTransaction(coinbase.hash_id, 0)],
+                              [OutputTransaction('55d83bb9', 10.5), OutputTransaction(wallet.public, 89.5)])
+    transaction.sign(wallet.private)
+
+    for value in [coinbase, transaction, Transaction(None, OutputTransaction('55d83bb9', 10))]:
+        result, offset = decode_transaction(encode_transaction(value))
+
+        assert offset == len(encode_transaction(value))
+        assert result.hash_id == value.hash_id
+        assert result.inputs == value.inputs
+        assert result.signature == value.signature
+        assert [(output.address, output.amount) for output in result.outputs] == \
+               [(output.address, output.amount) for output in value.outputs]
+
+    # The id of the transaction is validated
+    record = bytearray(encode_transaction(coinbase))
+    record[-3] ^= 1
+
+    with raises(ValueError):
+        decode_transaction(bytes(record))
+
+
+def test_block_serialization():
+    """Test the serialization of the blocks"""
+
+    transaction = Transaction(datetime(2000, 1, 1, 0, 0, 0), OutputTransaction('55d83bb9', 100))
+
+    genesis = Block.genesis_block('Genesis', timestamp=1, difficulty=4, mining=True)
+    block = Block(1, [transaction], genesis.hash, timestamp=datetime(2000, 1, 1, 0, 1, 0), difficulty=2.5,
+                  version=Block.HEADER_VERSION)
+    block.mining()
+
+    for value in [genesis, block, Block(block, ['a', None, ['b']], timestamp=1.5)]:
+        result = decode_block(encode_block(value))
+
+        assert result.index == value.index
+        assert result.previous_hash == value.previous_hash
+        assert result.timestamp == value.timestamp
+        assert result.difficulty == value.difficulty
+        assert result.proof == value.proof
+        assert result.version == value.version
+        assert result.hash == value.hash
+
+    assert decode_block(encode_block(genesis)) == genesis
+    assert decode_block(encode_block(block)).is_valid
+    assert decode_block(encode_block(block)).data[0].hash_id == transaction.hash_id
+
+    # The pruned blocks keep the Merkle root
+    block.prune()
+
+    assert decode_block(encode_block(block)).pruned
+    assert decode_block(encode_block(block)).is_valid
+
+    # Only the known types are serialized
+    with raises(TypeError):
+        encode_block(Block(block, {'a': 1}))
+
+
+def test_unspent_snapshot():
+    """Test the snapshot of the unspent transactions"""
+
+    unspent = UnspentList()
+    unspent.add_unspent(UnspentTransaction('00' * 32, 0, '55d83bb9', 10))
+    unspent.add_unspent(UnspentTransaction('11' * 32, 1, '55d83bb9', 2.5))
+    unspent.add_unspent(UnspentTransaction('22' * 32, 0, 'a4f1', 7))
+
+    stream = BytesIO()
+    write_snapshot(stream, unspent, 3, 'ff' * 32)
+    stream.seek(0)
+
+    result, height, tip_hash = read_snapshot(stream)
+
+    assert height == 3
+    assert tip_hash == 'ff' * 32
+    assert result.unspent == unspent.unspent
+    assert result.address_amount('55d83bb9') == 12.5
+
+    # The checksum is validated
+    record = bytearray(stream.getvalue())
+    record[60] ^= 1
+
+    with raises(ValueError):
+        read_snapshot(BytesIO(bytes(record)))
+
+
+def test_block_view():
+    """Test the views of serialized blocks and transactions"""
+
+    wallet = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+
+    coinbase = Transaction(datetime(2000, 1, 1, 0, 0, 0), OutputTransaction(wallet.public, 100))
+    transaction = Transaction([InputTransaction(coinbase.hash_id, 0)],
+                              [OutputTransaction('55d83bb9', 10.5), OutputTransaction(wallet.public, 89.5)])
+    transaction.sign(wallet.private)
+
+    genesis = Block.genesis_block([coinbase], timestamp=datetime(2000, 1, 1), version=Block.HEADER_VERSION)
+    block = Block(genesis, [transaction, 'Note', coinbase], timestamp=datetime(2000, 1, 2))
+
+    genesis_view = BlockView(encode_block(genesis))
+    view = BlockView(b'\x00' + encode_block(block), 1)
+
+    assert BlockView(encode_block(Block(0, None, timestamp=1))).previous_hash is None
+    assert view.index == 1
+    assert view.version == Block.HEADER_VERSION
+    assert view.hash.hex() == block.hash
+    assert view.previous_hash.hex() == genesis.hash
+    assert view.merkle_root == block.merkle_root
+    assert view.difficulty == 0 and view.proof == 0
+    assert not view.pruned
+    assert view.follows(genesis_view)
+    assert not genesis_view.follows(view)
+
+    # The hash is checked over the header without reading the body
+    assert view.timestamp == block.timestamp
+    assert view.header == block.header
+    assert view.calculate_hash() == block.hash
+    assert BlockView(encode_block(Block(0, None, timestamp=1.5))).timestamp == 1.5
+
+    numeric = Block(0, None, timestamp=1.5, version=Block.HEADER_VERSION)
+
+    assert BlockView(encode_block(numeric)).calculate_hash() == numeric.hash
+
+    legacy = Block(0, 'Data', timestamp=1)
+
+    assert BlockView(encode_block(legacy)).calculate_hash() == legacy.hash
+
+    with raises(ValueError):
+        BlockView(encode_block(legacy)).header
+
+    # The transactions are read from the body
+    assert [txid.hex() for txid in view.txids()] == [transaction.hash_id, coinbase.hash_id]
+
+    transaction_view, coinbase_view = view.transactions()
+
+    assert not transaction_view.is_coinbase
+    assert coinbase_view.is_coinbase
+    assert list(coinbase_view.inputs()) == []
+    assert [(txid.hex(), index) for txid, index in transaction_view.inputs()] == [(coinbase.hash_id, 0)]
+    assert [(bytes(address).decode(), amount) for address, amount in transaction_view.outputs()] == \
+           [('55d83bb9', 10.5), (wallet.public, 89.5)]
+    assert transaction_view.to_transaction().signature == transaction.signature
+    assert view.to_block().is_valid
@@ -38,8 +38,8 @@ def test_unconfirmed():
     unspent = UnspentList()
 
     # Assign 250 coins to the wallet #1
-    unspent.unspent.append(UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4',
-                                              0, wallet_1.get_account(), 250))
+    unspent.add_unspent(UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4',
+                                           0, wallet_1.get_account(), 250))
 
     assert unspent.address_amount(wallet_1.get_account()) == 250
     assert unspent.address_amount(wallet_2.get_account()) == 0
@@ -114,3 +114,64 @@ def test_unconfirmed_minner():
     assert unspent.confirm_unconfirmed()
     assert wallet_1.get_balance() == 5
     assert wallet_2.get_balance() == 0
+
+
+def test_unconfirmed_conflicts():
+    """Test the detection of conflicts with the unconfirmed transactions"""
+
+    wallet_1 = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+    wallet_2 = Wallet('7d6433bcc63f973580dc7562d2ca79fcb12bb4e08c7e7333')
+
+    unspent = UnspentList()
+    wallet_1.unspent = unspent
+
+    for index in range(3):
+        unspent.add_unspent(UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4',
+                                               index, wallet_1.get_account(), 10))
+
+    # Two transactions which spend the same output
+    transaction_1 = wallet_1.generate_transaction_to(wallet_2.get_account(), 10)
+    transaction_2 = wallet_1.generate_transaction_to(wallet_1.get_account(), 10)
+
+    assert unspent.append_unconfirmed(transaction_1)
+    assert unspent.append_unconfirmed(transaction_2) is False
+
+    # A transaction which spend other outputs
+    assert unspent.append_unconfirmed(wallet_1.generate_transaction_to(wallet_2.get_account(), 20))
+    assert wallet_1.get_balance() == 0
+
+    # A coinbase transaction with the same outputs
+    inputs = datetime(2000, 1, 1, 0, 0, 0)
+
+    assert unspent.append_unconfirmed(Transaction(inputs, OutputTransaction(wallet_2.public, 5)))
+    assert unspent.append_unconfirmed(Transaction(inputs, OutputTransaction(wallet_2.public, 5))) is False
+
+    assert unspent.confirm_unconfirmed()
+    assert unspent.address_amount(wallet_2.get_account()) == 35
+
+
+def test_unconfirmed_batch():
+    """Test the validation of the signatures in a pool of processes"""
+
+    wallet_1 = Wallet('aedc3975fa118bec4a1d203cd2b996c4ceb5aa398b7f7518')
+    wallet_2 = Wallet('7d6433bcc63f973580dc7562d2ca79fcb12bb4e08c7e7333')
+
+    unspent = UnspentList()
+    wallet_1.unspent = unspent
+
+    for index in range(3):
+        unspent.add_unspent(UnspentTransaction('d749929fe94b9a37dbe5d74cb297ad24b46e467898545f4e109eb21835046ac4',
+                                               index, wallet_1.get_account(), 10))
+
+    transactions = [wallet_1.generate_transaction_to(wallet_2.get_account(), 10),
+                    wallet_1.generate_transaction_to(wallet_2.get_account(), 10),
+                    wallet_1.generate_transaction_to(wallet_2.get_account(), 20)]
+
+    # An invalid signature
+    transactions[2].sign(wallet_2.private)
+
+    assert unspent.append_unconfirmed_batch(transactions, workers=2) == [True, False, False]
+    assert unspent.confirm_unconfirmed()
+
+    assert unspent.address_amount(wallet_1.get_account()) == 20
+    assert unspent.address_amount(wallet_2.get_account()) == 10